@@ -1,12 +1,58 @@
 import streamlit as st
 import requests
 import pandas as pd
+import pyarrow as pa
 import json
+import time
 from io import StringIO
 
 # FastAPI Backend URL
 FASTAPI_URL = "http://127.0.0.1:8000"
 
+# Ask the backend for Arrow IPC, which streams in record batches and loads without JSON parsing
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+REQUEST_HEADERS = {"Accept": f"{ARROW_MEDIA_TYPE}, application/json;q=0.5"}
+JOB_POLL_SECONDS = 1.0
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+def to_dataframe(response):
+    """Converts a backend response (Arrow IPC stream or JSON) into a DataFrame."""
+    if response.headers.get("content-type", "").startswith(ARROW_MEDIA_TYPE):
+        return pa.ipc.open_stream(response.content).read_pandas()
+
+    cleaned_data_raw = response.json()["cleaned_data"]
+    if isinstance(cleaned_data_raw, str):
+        return pd.DataFrame(json.loads(cleaned_data_raw))  # Convert string JSON to dict
+    return pd.DataFrame(cleaned_data_raw)
+
+def run_job(endpoint, **request_kwargs):
+    """Submits a cleaning job, polls its status with a progress bar and returns the result response (or None)."""
+    submitted = requests.post(f"{FASTAPI_URL}/jobs/{endpoint}", **request_kwargs)
+    if submitted.status_code != 202:
+        st.error(f"❌ Failed to submit job: {submitted.text}")
+        return None
+
+    job_id = submitted.json()["id"]
+    progress_bar = st.progress(0.0, text="⏳ Queued")
+    while True:
+        job = requests.get(f"{FASTAPI_URL}/jobs/{job_id}").json()
+        progress = job["progress"]
+        share = progress["batches_done"] / progress["batches_total"] if progress["batches_total"] else 0.0
+        progress_bar.progress(min(share, 1.0), text=(
+            f"⚙️ {job['status'].capitalize()}: {progress['rows_done']:,} rows cleaned, "
+            f"{progress['batches_done']}/{progress['batches_total']} AI batches"
+        ))
+        if job["status"] in FINISHED_STATUSES:
+            break
+        time.sleep(JOB_POLL_SECONDS)
+
+    if job["status"] != "succeeded":
+        st.error(f"❌ Job {job['status']}: {job['error'] or ''}")
+        return None
+    progress_bar.progress(1.0, text=f"✅ Cleaned {progress['rows_done']:,} rows")
+    return requests.get(f"{FASTAPI_URL}/jobs/{job_id}/result", headers=REQUEST_HEADERS)
+
 # Streamlit UI Configuration
 st.set_page_config(page_title="AI-Powered Data Cleaning", layout="wide")
 
@@ -27,12 +73,17 @@ st.markdown("""
 # ✅ Handling CSV/Excel Upload
 if data_source == "CSV/Excel":
     st.subheader("📂 Upload File for Cleaning")
-    uploaded_file = st.file_uploader("Choose a CSV or Excel file", type=["csv", "xlsx"])
+    uploaded_file = st.file_uploader("Choose a CSV, Excel, Parquet or Feather file",
+                                     type=["csv", "xlsx", "parquet", "feather"])
     
     if uploaded_file is not None:
         file_extension = uploaded_file.name.split(".")[-1]
         if file_extension == "csv":
             df = pd.read_csv(uploaded_file)
+        elif file_extension == "parquet":
+            df = pd.read_parquet(uploaded_file)
+        elif file_extension == "feather":
+            df = pd.read_feather(uploaded_file)
         else:
             df = pd.read_excel(uploaded_file)
 
@@ -41,19 +92,14 @@ if data_source == "CSV/Excel":
 
         if st.button("🚀 Clean Data"):
             files = {"file": (uploaded_file.name, uploaded_file.getvalue())}
-            response = requests.post(f"{FASTAPI_URL}/clean-data", files=files)
+            response = run_job("clean-data", files=files)
 
-            if response.status_code == 200:
-                st.subheader("🔍 Raw API Response (Debugging)")
-                st.json(response.json())  # Debugging: Check actual response format
+            if response is not None and response.status_code == 200:
+                st.caption(f"🔍 Received {len(response.content):,} bytes as {response.headers.get('content-type')}")
 
                 # Parse cleaned data properly
                 try:
-                    cleaned_data_raw = response.json()["cleaned_data"]
-                    if isinstance(cleaned_data_raw, str):
-                        cleaned_data = pd.DataFrame(json.loads(cleaned_data_raw))  # Convert string JSON to dict
-                    else:
-                        cleaned_data = pd.DataFrame(cleaned_data_raw)
+                    cleaned_data = to_dataframe(response)
 
                     st.subheader("✅ Cleaned Data:")
                     st.dataframe(cleaned_data)
@@ -69,18 +115,13 @@ elif data_source == "Database Query":
     query = st.text_area("Enter SQL Query:", "SELECT * FROM my_table;")
 
     if st.button("🔄 Fetch & Clean Data"):
-        response = requests.post(f"{FASTAPI_URL}/clean-db", json={"db_url": db_url, "query": query})
+        response = run_job("clean-db", json={"db_url": db_url, "query": query})
 
-        if response.status_code == 200:
-            st.subheader("🔍 Raw API Response (Debugging)")
-            st.json(response.json())  # Debugging: Check actual response format
+        if response is not None and response.status_code == 200:
+            st.caption(f"🔍 Received {len(response.content):,} bytes as {response.headers.get('content-type')}")
 
             try:
-                cleaned_data_raw = response.json()["cleaned_data"]
-                if isinstance(cleaned_data_raw, str):
-                    cleaned_data = pd.DataFrame(json.loads(cleaned_data_raw))
-                else:
-                    cleaned_data = pd.DataFrame(cleaned_data_raw)
+                cleaned_data = to_dataframe(response)
 
                 st.subheader("✅ Cleaned Data:")
                 st.dataframe(cleaned_data)
@@ -95,18 +136,13 @@ elif data_source == "API Data":
     api_url = st.text_input("Enter API Endpoint:", "https://jsonplaceholder.typicode.com/posts")
 
     if st.button("🔄 Fetch & Clean Data"):
-        response = requests.post(f"{FASTAPI_URL}/clean-api", json={"api_url": api_url})
+        response = run_job("clean-api", json={"api_url": api_url})
 
-        if response.status_code == 200:
-            st.subheader("🔍 Raw API Response (Debugging)")
-            st.json(response.json())  # Debugging: Check actual response format
+        if response is not None and response.status_code == 200:
+            st.caption(f"🔍 Received {len(response.content):,} bytes as {response.headers.get('content-type')}")
 
             try:
-                cleaned_data_raw = response.json()["cleaned_data"]
-                if isinstance(cleaned_data_raw, str):
-                    cleaned_data = pd.DataFrame(json.loads(cleaned_data_raw))
-                else:
-                    cleaned_data = pd.DataFrame(cleaned_data_raw)
+                cleaned_data = to_dataframe(response)
 
                 st.subheader("✅ Cleaned Data:")
                 st.dataframe(cleaned_data)
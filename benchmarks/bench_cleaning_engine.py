@@ -0,0 +1,57 @@
+"""Compares DataCleaning.clean_data with CleaningEngine.clean_data on generated frames.
+
+Usage: python benchmarks/bench_cleaning_engine.py [rows ...]   (default: 10k 100k 1M 10M)
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "scripts"))
+
+from cleaning_engine import CleaningEngine  # noqa: E402
+from data_cleaning import DataCleaning  # noqa: E402
+
+
+def generated_frame(rows, seed=0):
+    """Mixed frame with nulls, duplicates and a numeric column stored as text."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "id": rng.integers(0, rows // 2 + 1, rows),
+        "name": rng.choice(["Alice", "Bob", "Charlie", "David", "Eve"], rows),
+        "age": rng.integers(18, 80, rows).astype(float),
+        "city": rng.choice(["New York", "Los Angeles", "Chicago", "Houston"], rows).astype(object),
+        "salary": rng.integers(30_000, 150_000, rows).astype(str).astype(object),
+    })
+    df.loc[rng.random(rows) < 0.05, "age"] = np.nan
+    df.loc[rng.random(rows) < 0.05, "city"] = None
+    df.loc[rng.random(rows) < 0.05, "salary"] = None
+    return df
+
+
+def measure(clean, df):
+    tracemalloc.start()
+    start = time.perf_counter()
+    clean(df.copy())
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main(sizes=(10_000, 100_000, 1_000_000, 10_000_000)):
+    print(f"{'rows':>10} {'DataCleaning':>16} {'CleaningEngine':>16} {'speedup':>8}")
+    for rows in sizes:
+        df = generated_frame(rows)
+        legacy_time, legacy_peak = measure(DataCleaning().clean_data, df)
+        engine_time, engine_peak = measure(CleaningEngine().clean_data, df)
+        print(f"{rows:>10,} {legacy_time:>7.2f}s {legacy_peak:>6.0f}MB {engine_time:>7.2f}s {engine_peak:>6.0f}MB "
+              f"{legacy_time / engine_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(*([tuple(int(arg) for arg in sys.argv[1:])] if sys.argv[1:] else []))
@@ -0,0 +1,32 @@
+"""Measures AIAgent batch throughput against a fake LLM at increasing concurrency limits."""
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "scripts"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from ai_agent import AIAgent  # noqa: E402
+from fake_llm import FakeLLM  # noqa: E402
+
+
+def main(rows=2000, batch_size=20, latency=0.05):
+    df = pd.DataFrame({"id": range(rows), "name": ["Alice"] * rows, "salary": [50000] * rows})
+    baseline = None
+    for concurrency in (1, 2, 4, 8, 16, 32):
+        agent = AIAgent(llm=FakeLLM(latency=latency))
+        start = time.perf_counter()
+        output = agent.process_data(df, batch_size=batch_size, concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        assert output == AIAgent(llm=FakeLLM(latency=0)).process_data(df, batch_size=batch_size)
+        print(f"concurrency={concurrency:>3}  batches={agent.llm.calls:>4}  "
+              f"elapsed={elapsed:6.2f}s  speedup={baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
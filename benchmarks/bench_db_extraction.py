@@ -0,0 +1,94 @@
+"""Compares one-shot pd.read_sql with pooled, server-side-cursor chunked extraction on a generated SQLite table.
+
+Reports peak RSS for each mode (in fresh processes) and how many connections a burst of queries opens.
+Usage: python benchmarks/bench_db_extraction.py [size_mb] [chunksize] [requests]
+"""
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from sqlalchemy import create_engine, event
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(os.path.dirname(ROOT), "scripts"))
+
+from bench_streaming_memory import write_csv  # noqa: E402
+
+
+def write_table(path, size_mb):
+    """Loads a generated CSV of about size_mb into table `data` of a SQLite file."""
+    csv_path = path + ".csv"
+    write_csv(csv_path, size_mb)
+    with sqlite3.connect(path) as connection:
+        for chunk in pd.read_csv(csv_path, chunksize=200_000):
+            chunk.to_sql("data", connection, index=False, if_exists="append")
+    os.remove(csv_path)
+
+
+def run(mode, db_url, chunksize):
+    """Cleans the table with the rule-based cleaner and prints peak RSS in MB (runs in a fresh process)."""
+    from data_cleaning import DataCleaning
+    from database import EngineRegistry, read_sql_chunks
+
+    cleaner = DataCleaning()
+    engine = EngineRegistry().get(db_url)
+    with open(os.devnull, "w") as sink:
+        if mode == "full":
+            sink.write(cleaner.clean_data(pd.read_sql("SELECT * FROM data", engine)).to_json(orient="records", lines=True))
+        else:
+            for chunk in read_sql_chunks(engine, "SELECT * FROM data", chunksize):
+                sink.write(cleaner.clean_data(chunk).to_json(orient="records", lines=True))
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def count_connections(db_url, requests, pooled):
+    """Runs `requests` small queries from 16 threads and returns the number of DBAPI connections opened."""
+    from database import EngineRegistry, read_sql_chunks
+
+    registry = EngineRegistry()
+    opened = []
+
+    def engine_for_request():
+        engine = registry.get(db_url) if pooled else create_engine(db_url)
+        if not getattr(engine, "_counted", False):
+            event.listen(engine, "connect", lambda *args: opened.append(1))
+            engine._counted = True
+        return engine
+
+    def query(_):
+        return sum(len(chunk) for chunk in read_sql_chunks(engine_for_request(), "SELECT * FROM data LIMIT 100"))
+
+    with ThreadPoolExecutor(16) as pool:
+        list(pool.map(query, range(requests)))
+    registry.dispose()
+    return len(opened)
+
+
+def main(size_mb=256, chunksize=50_000, requests=200):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.sqlite")
+        write_table(path, size_mb)
+        db_url = f"sqlite:///{path}"
+        print(f"table: {os.path.getsize(path) / 1024 / 1024:.0f} MB, chunksize={chunksize}")
+        for mode in ("chunked", "full"):
+            result = subprocess.run(
+                [sys.executable, __file__, "--run", mode, db_url, str(chunksize)], capture_output=True, text=True
+            )
+            peak = result.stdout.strip() or f"failed: {result.stderr.strip().splitlines()[-1:]}"
+            print(f"{mode:>8}: peak RSS {peak} MB")
+        for pooled in (True, False):
+            label = "pooled" if pooled else "per-request engine"
+            print(f"{label:>20}: {count_connections(db_url, requests, pooled)} connections for {requests} queries")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        run(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        main(*(int(arg) for arg in sys.argv[1:4]))
@@ -0,0 +1,88 @@
+"""Compares parse time, peak RSS and frame memory of the pandas loaders and the Arrow FileReader.
+
+Each loader runs in a fresh process on the same generated file, so peak RSS is its own.
+
+Usage: python benchmarks/bench_file_ingestion.py [rows] [excel_rows]
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), "scripts"))
+sys.path.append(BENCH_DIR)
+
+LOADERS = {
+    # name: (file format, reader options, or None for the plain pandas loader)
+    "pandas csv": ("csv", None),
+    "arrow csv": ("csv", {"category_ratio": None}),
+    "arrow csv + categories": ("csv", {}),
+    "arrow csv + pyarrow dtypes": ("csv", {"dtype_backend": "pyarrow"}),
+    "pandas xlsx": ("xlsx", None),
+    "streaming xlsx": ("xlsx", {}),
+    "pandas parquet": ("parquet", None),
+    "parquet": ("parquet", {}),
+    "feather": ("feather", {}),
+}
+
+
+def run(name, path):
+    """Loads path with one loader and prints a JSON line of timings (runs in a fresh process)."""
+    from file_readers import FileReader
+
+    fmt, options = LOADERS[name]
+    start = time.perf_counter()
+    if options is None:
+        df = {"csv": pd.read_csv, "xlsx": pd.read_excel, "parquet": pd.read_parquet}[fmt](path)
+    else:
+        df = FileReader(**options).read(path, fmt)
+    seconds = time.perf_counter() - start
+    print(json.dumps({
+        "seconds": seconds,
+        "rows": len(df),
+        "frame_mb": df.memory_usage(deep=True).sum() / 1024 / 1024,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def generate(tmp, rows, excel_rows):
+    """Writes the input files (runs in its own process: ru_maxrss survives exec, so the parent must stay small)."""
+    from datagen import generate_frame
+
+    df = generate_frame(rows)
+    df.to_csv(os.path.join(tmp, "data.csv"), index=False)
+    df.to_parquet(os.path.join(tmp, "data.parquet"))
+    df.to_feather(os.path.join(tmp, "data.feather"))
+    df.head(excel_rows).to_excel(os.path.join(tmp, "data.xlsx"), index=False)
+
+
+def main(rows=1_000_000, excel_rows=50_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run([sys.executable, __file__, "--generate", tmp, str(rows), str(excel_rows)], check=True)
+        paths = {fmt: os.path.join(tmp, f"data.{fmt}") for fmt in ("csv", "xlsx", "parquet", "feather")}
+        print(f"rows: {rows:,} ({excel_rows:,} for xlsx), cpus: {os.cpu_count()}")
+        print(f"{'loader':<28}{'seconds':>9}{'rows/s':>13}{'frame MB':>10}{'peak MB':>9}")
+        for name, (fmt, _) in LOADERS.items():
+            result = subprocess.run([sys.executable, __file__, "--run", name, paths[fmt]],
+                                    capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"{name:<28} failed: {result.stderr.strip().splitlines()[-1:]}")
+                continue
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            print(f"{name:<28}{stats['seconds']:>9.2f}{stats['rows'] / stats['seconds']:>13,.0f}"
+                  f"{stats['frame_mb']:>10.1f}{stats['peak_rss_mb']:>9.0f}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        run(sys.argv[2], sys.argv[3])
+    elif sys.argv[1:2] == ["--generate"]:
+        generate(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        main(*(int(arg) for arg in sys.argv[1:3]))
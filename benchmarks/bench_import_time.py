@@ -0,0 +1,73 @@
+"""Measures cold import time of the backend and agent modules, and the cost deferred to the first LLM call.
+
+Every measurement runs in a fresh interpreter; the median of several runs is reported, followed by
+the slowest imports of the backend module as reported by `python -X importtime`.
+
+Usage: python benchmarks/bench_import_time.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+SCRIPTS = os.path.join(ROOT, "scripts")
+
+TARGETS = {
+    # name: (statement timed in a fresh process, extra environment)
+    "backend, rule-only": ("import scripts.backend", {"LLM_BACKEND": "none"}),
+    "backend, openai without key": ("import scripts.backend", {"LLM_BACKEND": "openai"}),
+    "backend, stub": ("import scripts.backend", {"LLM_BACKEND": "stub"}),
+    "ai_agent": ("import ai_agent", {}),
+    "cleaning_engine": ("import cleaning_engine", {}),
+    # Deferred to the first batch sent: the OpenAI client (no request is made) and the LangGraph graph
+    "first LLM use": ("agent.llm, agent.graph", {"OPENAI_API_KEY": "sk-benchmark"},
+                      "from ai_agent import AIAgent; agent = AIAgent()"),
+}
+
+
+def measure(statement, env, setup=""):
+    code = (f"import time; {setup}\nstart = time.perf_counter()\n{statement}\n"
+            "print(time.perf_counter() - start)")
+    environment = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+    environment.update(env, PYTHONPATH=os.pathsep.join([ROOT, SCRIPTS]), LLM_CACHE_PATH="", PROFILE_CACHE_PATH="")
+    result = subprocess.run([sys.executable, "-c", code], env=environment, capture_output=True, text=True, cwd=ROOT)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module, env, count=10):
+    environment = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+    environment.update(env, PYTHONPATH=ROOT, LLM_CACHE_PATH="", PROFILE_CACHE_PATH="")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], env=environment,
+                            capture_output=True, text=True, cwd=ROOT)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Direct children of the imported module are indented by three spaces
+        if name.startswith("   ") and not name.startswith("    "):
+            rows.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main(runs=5):
+    print(f"{'import':<30}{'median s':>10}{'min s':>8}")
+    for name, (statement, env, *setup) in TARGETS.items():
+        try:
+            seconds = [measure(statement, env, *setup) for _ in range(runs)]
+        except RuntimeError as e:
+            print(f"{name:<30} failed: {e}")
+            continue
+        print(f"{name:<30}{statistics.median(seconds):>10.3f}{min(seconds):>8.3f}")
+
+    print("\nslowest direct imports of scripts.backend (rule-only):")
+    for seconds, module in slowest_imports("scripts.backend", {"LLM_BACKEND": "none"}):
+        print(f"  {module:<28}{seconds:>8.3f}s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,75 @@
+"""Compares the error and speed of local imputation strategies against global mean/mode fills.
+
+Ages depend on the city, salaries on age and score, and the tier on the city. A tenth of the
+values of each of these columns is removed, and each strategy's fills are compared with the removed
+values: mean absolute error for numbers, accuracy for the tier. "auto" picks a strategy per column;
+"auto (stored)" reuses the model fitted by "auto", as the next chunk or run of a source does.
+
+Usage: python benchmarks/bench_imputation.py [rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), "scripts"))
+sys.path.append(BENCH_DIR)
+
+from imputation import ImputationEngine, ImputerStore  # noqa: E402
+
+CITY_AGES = {"New York": 30, "Los Angeles": 40, "Chicago": 50, "Houston": 60}
+CITY_TIERS = {"New York": "gold", "Los Angeles": "silver", "Chicago": "bronze", "Houston": "bronze"}
+
+
+def generate_people(rows, missing_rate=0.1, seed=0):
+    """Returns (frame with nulls, complete frame)."""
+    rng = np.random.default_rng(seed)
+    city = pd.Series(rng.choice(list(CITY_AGES), rows))
+    age = (city.map(CITY_AGES) + rng.normal(0, 3, rows)).round()
+    score = rng.normal(50, 10, rows).round(2)
+    complete = pd.DataFrame({
+        "id": np.arange(rows),
+        "city": city,
+        "age": age,
+        "score": score,
+        "salary": (1000 * age + 500 * score + rng.normal(0, 2000, rows)).round(),
+        "tier": city.map(CITY_TIERS),
+    })
+    df = complete.copy()
+    for col in ("age", "score", "salary", "tier"):
+        df.loc[rng.random(rows) < missing_rate, col] = None
+    return df, complete
+
+
+def errors(df, filled, complete):
+    result = []
+    for col in ("age", "salary"):
+        missing = df[col].isna()
+        result.append(float((filled.loc[missing, col] - complete.loc[missing, col]).abs().mean()))
+    missing = df["tier"].isna()
+    result.append(float((filled.loc[missing, "tier"] == complete.loc[missing, "tier"]).mean()))
+    return result
+
+
+def main(rows=100_000):
+    df, complete = generate_people(rows)
+    baseline = df.fillna({"age": df["age"].mean(), "salary": df["salary"].mean(), "tier": df["tier"].mode()[0]})
+    print(f"{rows:,} rows, {int(df.isna().sum().sum()):,} nulls")
+    print(f"{'strategy':<16}{'seconds':>9}{'age MAE':>10}{'salary MAE':>12}{'tier accuracy':>15}")
+    print(f"{'global fills':<16}{'':>9}" + "{:>10.2f}{:>12.0f}{:>15.3f}".format(*errors(df, baseline, complete)))
+
+    store = ImputerStore(None)
+    runs = [(name, ImputationEngine(name)) for name in ("group", "iterative", "knn")]
+    runs += [("auto", ImputationEngine(store=store)), ("auto (stored)", ImputationEngine(store=store))]
+    for name, engine in runs:
+        start = time.perf_counter()
+        filled = engine.impute(df, source="bench" if name.startswith("auto") else None)
+        seconds = time.perf_counter() - start
+        print(f"{name:<16}{seconds:>9.2f}" + "{:>10.2f}{:>12.0f}{:>15.3f}".format(*errors(df, filled, complete)))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
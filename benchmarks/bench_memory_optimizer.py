@@ -0,0 +1,35 @@
+"""Reports frame memory before and after MemoryOptimizer on rule-cleaned generated data, per column and in rows per GB.
+
+Usage: python benchmarks/bench_memory_optimizer.py [rows] [text_length]
+"""
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), "scripts"))
+sys.path.append(BENCH_DIR)
+
+from cleaning_engine import CleaningEngine  # noqa: E402
+from datagen import generate_frame  # noqa: E402
+from memory_optimizer import MemoryOptimizer  # noqa: E402
+
+
+def main(rows=1_000_000, text_length=20):
+    cleaned = CleaningEngine(preserve_integers=True).clean_data(generate_frame(rows, text_length=text_length))
+    start = time.perf_counter()
+    _, report = MemoryOptimizer().optimize(cleaned)
+    seconds = time.perf_counter() - start
+
+    print(report.to_string())
+    before, after = report["bytes_before"].sum(), report["bytes_after"].sum()
+    print(f"\n{len(cleaned):,} rows optimized in {seconds:.2f}s")
+    print(f"bytes per row: {before / len(cleaned):.0f} → {after / len(cleaned):.0f}")
+    print(f"rows per GB:   {len(cleaned) * 1e9 / before:,.0f} → {len(cleaned) * 1e9 / after:,.0f} "
+          f"({before / after:.1f}x)")
+    without_text = report.drop(index=[col for col in report.index if col.startswith("notes")])
+    print(f"excluding free text: {without_text['bytes_before'].sum() / without_text['bytes_after'].sum():.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
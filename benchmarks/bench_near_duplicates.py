@@ -0,0 +1,89 @@
+"""Measures throughput, precision and recall of fuzzy near-duplicate detection on perturbed copies.
+
+Distinct person records (name, email, city, age) are generated, and a share of them is copied with
+realistic damage: changed case, stray whitespace and punctuation, a one-letter typo or a missing
+value. Exact duplicate removal finds none of these copies. Precision and recall are counted over
+pairs of rows: a detected pair is correct when both rows come from the same original record.
+
+Usage: python benchmarks/bench_near_duplicates.py [max_rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), "scripts"))
+sys.path.append(BENCH_DIR)
+
+from datagen import CITIES  # noqa: E402
+from near_duplicates import NearDuplicateDetector  # noqa: E402
+
+LETTERS = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+
+
+def _words(rng, rows, length):
+    return pd.Series(rng.choice(LETTERS, (rows, length)).view(f"<U{length}").ravel()).str.capitalize()
+
+
+def generate_people(rows=10_000, duplicate_rate=0.1, seed=0):
+    """Returns (frame, entity) where entity[i] is the original record row i was copied from."""
+    rng = np.random.default_rng(seed)
+    originals = int(rows / (1 + duplicate_rate))
+    first, last = _words(rng, originals, 6), _words(rng, originals, 8)
+    people = pd.DataFrame({
+        "name": first + " " + last,
+        "email": (first + "." + last).str.lower() + "@example.com",
+        "city": rng.choice(CITIES[:5], originals),
+        "age": rng.integers(18, 80, originals).astype(float),
+    })
+    entity = np.concatenate([np.arange(originals), rng.integers(0, originals, rows - originals)])
+    df = people.iloc[entity].reset_index(drop=True)
+
+    copies = np.arange(originals, rows)
+    damage = rng.integers(0, 4, len(copies))
+    names = df.loc[copies, "name"]
+    df.loc[copies[damage == 0], "name"] = names[damage == 0].str.upper()
+    df.loc[copies[damage == 1], "name"] = " " + names[damage == 1].str.replace(" ", ",  ") + " "
+    typo = copies[damage == 2]
+    positions = rng.integers(0, 6, len(typo))
+    df.loc[typo, "name"] = [name[:p] + "x" + name[p + 1:] for name, p in zip(df.loc[typo, "name"], positions)]
+    df.loc[copies[damage == 3], "age"] = np.nan
+    df.loc[copies[rng.random(len(copies)) < 0.3], "city"] = df.loc[copies, "city"].str.lower()
+    return df, entity
+
+
+def pair_quality(cluster_ids, entity):
+    """(precision, recall) of the row pairs put in one cluster against the pairs copied from one record."""
+    def pair_count(labels):
+        sizes = pd.Series(labels).value_counts().to_numpy()
+        return int((sizes * (sizes - 1) // 2).sum())
+
+    found = pair_count(cluster_ids)
+    true = pair_count(entity)
+    correct = pair_count(pd.factorize(pd.Series(list(zip(cluster_ids, entity))))[0])
+    return (correct / found if found else 1.0), (correct / true if true else 1.0)
+
+
+def main(max_rows=1_000_000):
+    print(f"{'rows':>10}  {'method':<9}{'seconds':>9}{'rows/sec':>12}{'exact dups':>12}"
+          f"{'clusters':>10}{'precision':>11}{'recall':>8}")
+    rows = 10_000
+    while rows <= max_rows:
+        df, entity = generate_people(rows)
+        exact = int(df.duplicated().sum())
+        for method in ("sorted", "minhash"):
+            detector = NearDuplicateDetector(columns=["name", "email", "city", "age"], method=method)
+            start = time.perf_counter()
+            cluster_ids, _ = detector.find(df)
+            seconds = time.perf_counter() - start
+            precision, recall = pair_quality(cluster_ids.to_numpy(), entity)
+            print(f"{rows:>10,}  {method:<9}{seconds:>9.2f}{rows / seconds:>12,.0f}{exact:>12,}"
+                  f"{cluster_ids.nunique():>10,}{precision:>11.3f}{recall:>8.3f}")
+        rows *= 10
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,79 @@
+"""Compares LLM calls and prompt tokens of row-by-row AI cleaning against learned value normalization.
+
+Row cleaning sends the rows the dirty-row detector flags (misspelled cities among them) to the fake
+LLM, so its cost grows with the row count, and misspellings common enough not to look rare are
+missed ("left dirty"). Value normalization sends each distinct city once, stores the
+answers and remaps the column, so its cost stays flat. A second normalization run reuses the
+stored dictionary and makes no LLM calls at all.
+
+Usage: python benchmarks/bench_normalization.py [max_rows]
+"""
+import asyncio
+import csv
+import io
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), "scripts"))
+sys.path.append(BENCH_DIR)
+
+from ai_agent import AIAgent  # noqa: E402
+from cleaning_engine import CleaningEngine  # noqa: E402
+from datagen import generate_frame  # noqa: E402
+from dirty_rows import DirtyRowDetector  # noqa: E402
+from fake_llm import FakeLLM  # noqa: E402
+from llm_backends import echo_data  # noqa: E402
+from normalization import NormalizationStore, ValueNormalizer  # noqa: E402
+from pipeline import CleaningPipeline  # noqa: E402
+from tokenizer import estimate_tokens  # noqa: E402
+
+CANONICAL = {" chicago": "Chicago", "chicago": "Chicago", "new york ": "New York", "new york": "New York",
+             "Hustn": "Houston"}
+
+
+class CountingLLM(FakeLLM):
+    """Fake LLM that fixes known misspellings in the echoed CSV and counts prompt tokens."""
+
+    def __init__(self):
+        super().__init__(latency=0, response_fn=self.fix)
+        self.prompt_tokens = 0
+
+    def fix(self, prompt):
+        self.prompt_tokens += estimate_tokens(prompt)
+        rows = csv.reader(io.StringIO(echo_data(prompt)))
+        out = io.StringIO()
+        csv.writer(out, lineterminator="\n").writerows([[CANONICAL.get(v, v) for v in row] for row in rows])
+        return out.getvalue()
+
+
+def run(df, store=None):
+    llm = CountingLLM()
+    pipeline = CleaningPipeline(
+        CleaningEngine(), AIAgent(llm=llm), dirty_detector=DirtyRowDetector(), token_budget=2000,
+        normalizer=ValueNormalizer(store) if store is not None else None,
+    )
+    start = time.perf_counter()
+    cleaned = asyncio.run(pipeline.arun(df, source="bench"))
+    seconds = time.perf_counter() - start
+    misspelled = int(cleaned["city"].isin(list(CANONICAL)).sum())
+    return llm.calls, llm.prompt_tokens, seconds, misspelled
+
+
+def main(max_rows=100_000):
+    print(f"{'rows':>9}  {'mode':<24}{'LLM calls':>10}{'prompt tokens':>15}{'seconds':>9}{'left dirty':>11}")
+    rows = 1_000
+    while rows <= max_rows:
+        df = generate_frame(rows, columns=4, null_rate=0, duplicate_rate=0)
+        store = NormalizationStore(None)
+        for mode, result in (("row cleaning", run(df)),
+                             ("normalization (cold)", run(df, store)),
+                             ("normalization (stored)", run(df, store))):
+            calls, tokens, seconds, misspelled = result
+            print(f"{rows:>9,}  {mode:<24}{calls:>10,}{tokens:>15,}{seconds:>9.2f}{misspelled:>11,}")
+        rows *= 10
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
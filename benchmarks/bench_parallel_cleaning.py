@@ -0,0 +1,38 @@
+"""Compares DataCleaning.clean_data with ParallelCleaning at several worker counts and checks the results match.
+
+Usage: python benchmarks/bench_parallel_cleaning.py [rows] [workers ...]   (default: 2M rows, 1 2 4 8 workers)
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(os.path.dirname(ROOT), "scripts"))
+
+from bench_cleaning_engine import generated_frame  # noqa: E402
+from data_cleaning import DataCleaning  # noqa: E402
+from parallel_cleaning import ParallelCleaning  # noqa: E402
+
+
+def main(rows=2_000_000, workers=(1, 2, 4, 8)):
+    df = generated_frame(rows)
+    start = time.perf_counter()
+    expected = DataCleaning().clean_data(df.copy())
+    serial = time.perf_counter() - start
+    print(f"{rows:,} rows on {os.cpu_count()} cores; serial DataCleaning {serial:.2f}s")
+    print(f"{'workers':>8} {'time':>8} {'speedup':>8}")
+    for count in workers:
+        cleaner = ParallelCleaning(workers=count, min_rows_per_worker=1)
+        start = time.perf_counter()
+        result = cleaner.clean_data(df)
+        elapsed = time.perf_counter() - start
+        pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-12)
+        print(f"{count:>8} {elapsed:>7.2f}s {serial / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*([args[0]] if args else []), *([tuple(args[1:])] if args[1:] else []))
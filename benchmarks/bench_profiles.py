@@ -0,0 +1,76 @@
+"""Compares column-profile sketches with exact pandas statistics, and cold against cached-profile cleaning.
+
+A cold run profiles the source and cleans it; a cached run cleans with the stored profile, as a
+repeated upload or query does. Streamed runs clean chunk by chunk, where the profile replaces
+per-chunk statistics with whole-source ones.
+
+Usage: python benchmarks/bench_profiles.py [rows] [chunksize]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), "scripts"))
+sys.path.append(BENCH_DIR)
+
+from cleaning_engine import CleaningEngine  # noqa: E402
+from datagen import generate_frame  # noqa: E402
+from profiles import FrameProfile, ProfileCache  # noqa: E402
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def accuracy(df, profile):
+    print(f"{'column':<14}{'mean err':>10}{'median':>14}{'exact':>14}{'distinct':>10}{'exact':>10}{'mode ok':>9}")
+    for col in df.columns:
+        column = profile.column(col)
+        numbers = pd.to_numeric(df[col], errors="coerce") if column.inferred_type == "numeric" else None
+        mean_error = abs(column.mean - numbers.mean()) / abs(numbers.mean()) if numbers is not None else None
+        mode = df[col].mode(dropna=True)
+        mode_ok = str(column.mode) == str(mode.iloc[0]) if len(mode) else column.mode is None
+        print(f"{col:<14}{mean_error if mean_error is not None else float('nan'):>10.1e}"
+              f"{column.median:>14.6g}{numbers.median() if numbers is not None else float('nan'):>14.6g}"
+              f"{column.distinct.estimate():>10,}{df[col].nunique():>10,}{str(mode_ok):>9}")
+
+
+def main(rows=1_000_000, chunksize=50_000):
+    df = generate_frame(rows)
+    engine = CleaningEngine()
+    chunks = [df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize)]
+
+    profile, build_seconds = timed(FrameProfile.from_frame, df)
+    accuracy(df, profile)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ProfileCache(os.path.join(tmp, "profiles.sqlite"))
+        _, store_seconds = timed(cache.set, "bench", profile)
+        size = len(json.dumps(profile.to_dict()))
+        _, load_seconds = timed(ProfileCache(os.path.join(tmp, "profiles.sqlite")).get, "bench")
+
+    _, plain_seconds = timed(engine.clean_data, df)
+    _, cached_seconds = timed(engine.clean_data, df, profile)
+    _, chunked_plain = timed(lambda: [engine.clean_data(chunk) for chunk in chunks])
+    _, chunked_cached = timed(lambda: [engine.clean_data(chunk, profile) for chunk in chunks])
+
+    print(f"\n{rows:,} rows, {len(df.columns)} columns, {len(chunks)} chunks of {chunksize:,}")
+    print(f"profile: built in {build_seconds:.2f}s ({rows / build_seconds:,.0f} rows/s), {size / 1024:.0f} KiB stored, "
+          f"stored in {store_seconds * 1000:.0f} ms, loaded from SQLite in {load_seconds * 1000:.0f} ms")
+    print(f"{'rule cleaning':<30}{'seconds':>9}")
+    print(f"{'whole, own statistics':<30}{plain_seconds:>9.2f}")
+    print(f"{'whole, cached profile':<30}{cached_seconds:>9.2f}")
+    print(f"{'whole, cold (profile + clean)':<30}{build_seconds + cached_seconds:>9.2f}")
+    print(f"{'chunked, per-chunk statistics':<30}{chunked_plain:>9.2f}")
+    print(f"{'chunked, cached profile':<30}{chunked_cached:>9.2f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
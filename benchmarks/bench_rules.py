@@ -0,0 +1,74 @@
+"""Times data-quality rule evaluation: the compiled single pass against checking each rule on its own.
+
+The per-rule baseline converts the column again for every rule and runs text checks on every row,
+as a loop of independent pandas checks would. The compiled pass converts each column once and runs
+text checks once per distinct value.
+
+Usage: python benchmarks/bench_rules.py [max_rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), "scripts"))
+sys.path.append(BENCH_DIR)
+
+from datagen import CITIES, generate_frame  # noqa: E402
+from rules import RuleSet  # noqa: E402
+
+SUITE = {"expectation_suite_name": "bench", "expectations": [
+    {"expectation_type": "expect_column_values_to_not_be_null", "kwargs": {"column": "name"}},
+    {"expectation_type": "expect_column_values_to_be_between", "kwargs": {"column": "age", "min_value": 18,
+                                                                          "max_value": 79}},
+    {"expectation_type": "expect_column_values_to_be_in_set", "kwargs": {"column": "city", "value_set": CITIES[:5]}},
+    {"expectation_type": "expect_column_values_to_match_regex", "kwargs": {"column": "salary_text",
+                                                                           "regex": r"^\d{5,6}$"}},
+    {"expectation_type": "expect_column_values_to_be_between", "kwargs": {"column": "salary_text",
+                                                                          "min_value": 30_000}},
+    {"expectation_type": "expect_column_values_to_match_regex", "kwargs": {"column": "joined",
+                                                                           "regex": r"^\d{4}-\d{2}-\d{2}$"}},
+    {"expectation_type": "expect_column_values_to_be_unique", "kwargs": {"column": "id"}},
+    {"expectation_type": "expect_column_pair_values_a_to_be_greater_than_b",
+     "kwargs": {"column_A": "score", "column_B": "age"}},
+]}
+
+
+def per_rule(df):
+    """Each rule on its own, with its own conversions and row-by-row text checks."""
+    present = df.notna()
+    return pd.DataFrame({
+        "name": df["name"].isna(),
+        "age": present["age"] & ~pd.to_numeric(df["age"], errors="coerce").between(18, 79),
+        "city": present["city"] & ~df["city"].astype(str).isin(CITIES[:5]),
+        "salary_regex": present["salary_text"] & ~df["salary_text"].astype(str).str.contains(r"^\d{5,6}$"),
+        "salary_min": present["salary_text"] & ~(pd.to_numeric(df["salary_text"], errors="coerce") >= 30_000),
+        "joined": present["joined"] & ~df["joined"].astype(str).str.contains(r"^\d{4}-\d{2}-\d{2}$"),
+        "id": df["id"].duplicated(keep=False),
+        "pair": present["score"] & present["age"] & ~(df["score"] > df["age"]),
+    })
+
+
+def main(max_rows=1_000_000):
+    rules = RuleSet.from_dict(SUITE)
+    print(f"{'rows':>10}  {'per-rule':>10}  {'compiled':>10}  {'rows/sec':>12}  violating rows")
+    rows = 10_000
+    while rows <= max_rows:
+        df = generate_frame(rows, columns=8)
+        start = time.perf_counter()
+        expected = per_rule(df)
+        baseline = time.perf_counter() - start
+        start = time.perf_counter()
+        violations = rules.evaluate(df)
+        compiled = time.perf_counter() - start
+        assert np.array_equal(expected.to_numpy(), violations.to_numpy()), "compiled rules disagree with the baseline"
+        print(f"{rows:>10,}  {baseline:>9.2f}s  {compiled:>9.2f}s  {rows / compiled:>12,.0f}  "
+              f"{int(violations.any(axis=1).sum()):,}")
+        rows *= 10
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
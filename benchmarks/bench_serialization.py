@@ -0,0 +1,89 @@
+"""Reports prompt and completion tokens per row for every prompt format on the sample data and on generated frames.
+
+Completions are simulated by filling every null: row formats echo the whole cleaned batch back,
+while the patch format returns only the filled cells. The "table" column is the DataFrame.to_string
+rendering prompts used before the compact formats, kept as a baseline; it cannot be parsed back.
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "scripts"))
+
+from serialization import FORMATS, DirtyColumnsFormat, PatchFormat, PromptFormat  # noqa: E402
+from tokenizer import estimate_tokens  # noqa: E402
+
+
+class TableBaseline(PromptFormat):
+    """The legacy DataFrame.to_string rendering, padded and index-repeating."""
+
+    name = "table"
+
+    def render_rows(self, df, problems=None):
+        lines = df.reset_index(drop=True).to_string().split("\n")
+        return lines[0], lines[1:]
+
+
+BENCH_FORMATS = {"table": TableBaseline(), **FORMATS}
+
+
+def generated_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "name": rng.choice(["Alice", "Bob", "Charlie", "David", "Eve"], rows),
+        "age": rng.integers(18, 80, rows).astype(float),
+        "city": rng.choice(["New York", "Los Angeles", "Chicago", "Houston"], rows),
+        "salary": rng.integers(30_000, 150_000, rows),
+        "body": ["lorem ipsum dolor sit amet " * int(n) for n in rng.integers(1, 6, rows)],
+    })
+    df.loc[rng.random(rows) < 0.05, "age"] = np.nan
+    df.loc[rng.random(rows) < 0.05, "city"] = None
+    return df
+
+
+def tokens_per_row(df, fmt, batch_size=20):
+    total = sum(estimate_tokens(fmt.serialize(df.iloc[i:i + batch_size])) for i in range(0, len(df), batch_size))
+    return total / len(df)
+
+
+def cleaned(df):
+    """Stand-in for the model's answer: nulls filled with the column mean or most frequent value."""
+    fill = {col: df[col].mean() if pd.api.types.is_numeric_dtype(df[col]) else df[col].mode().iat[0] for col in df}
+    return df.fillna(fill)
+
+
+def completion(df_batch, fmt):
+    if isinstance(fmt, DirtyColumnsFormat):
+        return fmt.csv.serialize(cleaned(fmt._payload(df_batch)))  # Only the columns that were sent
+    if not isinstance(fmt, PatchFormat):
+        return fmt.serialize(cleaned(df_batch))
+    filled, positions = cleaned(df_batch), np.nonzero(df_batch.isna().to_numpy())
+    patches = [{"row": int(row), "column": str(df_batch.columns[col]), "value": filled.iat[row, col]}
+               for row, col in zip(*positions)]
+    return json.dumps({"patches": patches}, default=str)
+
+
+def completion_tokens_per_row(df, fmt, batch_size=20):
+    total = sum(estimate_tokens(completion(df.iloc[i:i + batch_size], fmt)) for i in range(0, len(df), batch_size))
+    return total / len(df)
+
+
+def main():
+    frames = {"sample_data.csv": pd.read_csv(os.path.join(ROOT, "data", "sample_data.csv"))}
+    for rows in (1_000, 10_000):
+        frames[f"generated[{rows}]"] = generated_frame(rows)
+
+    for title, measure in (("Prompt", tokens_per_row), ("Completion", completion_tokens_per_row)):
+        print(f"{title} tokens per row")
+        print(f"{'frame':<20}" + "".join(f"{name:>10}" for name in BENCH_FORMATS))
+        for label, df in frames.items():
+            print(f"{label:<20}" + "".join(f"{measure(df, fmt):>10.1f}" for fmt in BENCH_FORMATS.values()))
+
+
+if __name__ == "__main__":
+    main()
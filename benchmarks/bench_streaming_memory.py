@@ -0,0 +1,85 @@
+"""Compares peak RSS of whole-file vs streamed /clean-data cleaning on a generated CSV (1 GB by default).
+
+Both modes follow the endpoint's path: the upload is spooled, parsed with FileReader, cleaned by the
+rule-based CleaningPipeline (no LLM) and serialized with encode_frames, as JSON for a whole upload and
+as NDJSON chunk by chunk when streamed.
+
+Usage: python benchmarks/bench_streaming_memory.py [size_mb] [chunksize]
+"""
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "scripts"))
+
+
+def write_csv(path, size_mb, block_rows=200_000, seed=0):
+    """Appends random blocks to path until it reaches size_mb."""
+    rng = np.random.default_rng(seed)
+    header = True
+    while not os.path.exists(path) or os.path.getsize(path) < size_mb * 1024 * 1024:
+        block = pd.DataFrame({
+            "id": rng.integers(0, 1 << 40, block_rows),
+            "name": rng.choice(["Alice", "Bob", "Charlie", "David", "Eve"], block_rows),
+            "age": np.where(rng.random(block_rows) < 0.05, np.nan, rng.integers(18, 80, block_rows)),
+            "city": rng.choice(["New York", "Los Angeles", "Chicago", "Houston", None], block_rows),
+            "salary": rng.integers(30_000, 150_000, block_rows),
+        })
+        block.to_csv(path, mode="a", header=header, index=False)
+        header = False
+
+
+async def clean_upload(mode, path, chunksize, sink):
+    from starlette.datastructures import UploadFile
+
+    from cleaning_engine import CleaningEngine
+    from file_readers import FileReader
+    from memory_optimizer import MemoryOptimizer
+    from pipeline import CleaningPipeline
+    from streaming import aclean_chunks, aiter_chunks, aiter_record_batches, encode_frames, spool_upload
+
+    reader = FileReader()
+    pipeline = CleaningPipeline(CleaningEngine(), None, optimizer=MemoryOptimizer())
+    with open(path, "rb") as upload:
+        spool = await spool_upload(UploadFile(upload, filename=os.path.basename(path)))
+    if mode == "full":
+        df = await pipeline.arun(await asyncio.to_thread(reader.read, spool, "csv"))
+        frames, fmt = aiter_record_batches(df), "json"
+    else:
+        frames, fmt = aclean_chunks(aiter_chunks(reader.iter_chunks(spool, "csv", chunksize)), pipeline.arun), "ndjson"
+    async for data in encode_frames(frames, fmt, on_close=spool.close):
+        sink.write(data)
+
+
+def run(mode, path, chunksize):
+    """Cleans path as /clean-data would and prints peak RSS in MB (runs in a fresh process)."""
+    with open(os.devnull, "wb") as sink:
+        asyncio.run(clean_upload(mode, path, chunksize, sink))
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def main(size_mb=1024, chunksize=50_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "upload.csv")
+        write_csv(path, size_mb)
+        print(f"input: {os.path.getsize(path) / 1024 / 1024:.0f} MB, chunksize={chunksize}")
+        for mode in ("chunked", "full"):
+            result = subprocess.run(
+                [sys.executable, __file__, "--run", mode, path, str(chunksize)], capture_output=True, text=True
+            )
+            peak = result.stdout.strip() or f"failed: {result.stderr.strip().splitlines()[-1:]}"
+            print(f"{mode:>8}: peak RSS {peak} MB")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        run(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,57 @@
+"""Synthetic datasets for benchmarks, controlled by size, width, null rate, duplicate rate and text length."""
+import numpy as np
+import pandas as pd
+
+NAMES = ["Alice", "Bob", "Charlie", "David", "Eve", "Frank", "Grace", "Heidi"]
+CITIES = ["New York", "Los Angeles", "Chicago", "Houston", "Phoenix", " chicago", "new york ", "Hustn"]
+COLUMN_KINDS = ("id", "name", "age", "city", "salary_text", "score", "notes", "joined")
+
+
+def generate_frame(rows=10_000, columns=8, null_rate=0.05, duplicate_rate=0.05, text_length=20, seed=0):
+    """Returns a frame mixing ids, categories, floats, numbers stored as text, free text and dates.
+
+    Column kinds cycle through COLUMN_KINDS, so any width can be requested. Nulls are spread uniformly
+    (never in id columns), and duplicate_rate of the rows are exact copies of earlier rows.
+    The same arguments always produce the same frame.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for position in range(columns):
+        kind = COLUMN_KINDS[position % len(COLUMN_KINDS)]
+        name = kind if position < len(COLUMN_KINDS) else f"{kind}_{position // len(COLUMN_KINDS)}"
+        data[name] = _column(kind, rows, text_length, rng)
+    df = pd.DataFrame(data)
+
+    for name in df.columns:
+        if not name.startswith("id") and null_rate > 0:
+            df.loc[rng.random(rows) < null_rate, name] = None
+
+    duplicates = int(rows * duplicate_rate)
+    if duplicates and rows > 1:
+        targets = rng.choice(np.arange(1, rows), size=min(duplicates, rows - 1), replace=False)
+        sources = (rng.random(len(targets)) * targets).astype(int)  # Copy an earlier row
+        df.iloc[targets] = df.iloc[sources].to_numpy()
+    return df
+
+
+def _column(kind, rows, text_length, rng):
+    if kind == "id":
+        return np.arange(rows)
+    if kind == "name":
+        return rng.choice(NAMES, rows).astype(object)
+    if kind == "age":
+        return rng.integers(18, 80, rows).astype(float)
+    if kind == "city":
+        return rng.choice(CITIES, rows, p=[0.3, 0.25, 0.2, 0.15, 0.07, 0.01, 0.01, 0.01]).astype(object)
+    if kind == "salary_text":
+        return rng.integers(30_000, 150_000, rows).astype(str).astype(object)
+    if kind == "score":
+        return rng.normal(50, 15, rows).round(2)
+    if kind == "notes":
+        letters = np.array(list("abcdefghijklmnopqrstuvwxyz     "))
+        chars = rng.choice(letters, (rows, max(text_length, 1)))
+        return pd.Series(chars.view(f"<U{max(text_length, 1)}").ravel()).str.strip().astype(object)
+    if kind == "joined":
+        days = rng.integers(0, 3650, rows)
+        return (pd.Timestamp("2015-01-01") + pd.to_timedelta(days, unit="D")).strftime("%Y-%m-%d").astype(object)
+    raise ValueError(f"Unknown column kind {kind!r}.")
@@ -0,0 +1,16 @@
+import time
+
+
+class FakeLLM:
+    """Deterministic stand-in for the OpenAI LLM that simulates network latency."""
+
+    def __init__(self, latency=0.1, response_fn=None):
+        self.latency = latency
+        self.response_fn = response_fn or (lambda prompt: prompt)
+        self.calls = 0
+
+    def invoke(self, prompt):
+        """Sleeps for the configured latency and returns a deterministic response."""
+        self.calls += 1
+        time.sleep(self.latency)
+        return self.response_fn(prompt)
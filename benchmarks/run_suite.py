@@ -0,0 +1,411 @@
+"""End-to-end benchmark suite: rule-based cleaning, AI batching, every backend endpoint and every ingestion path.
+
+Each case runs in a fresh process so peak RSS is its own. Results (median seconds, rows/sec and peak RSS
+per case) are written to JSON, and two result files can be compared to spot regressions.
+
+Usage:
+    python benchmarks/run_suite.py [--rows N] [--cases 'endpoint.*'] [--output results.json]
+    python benchmarks/run_suite.py --compare baseline.json candidate.json [--threshold 0.1]
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.append(os.path.join(ROOT, "scripts"))
+sys.path.append(ROOT)
+sys.path.append(BENCH_DIR)
+
+CASES = {}
+
+
+def case(name):
+    """Registers `setup(args, tmp) -> (run, rows)`; only run() is timed."""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def _frame(args, rows=None):
+    from datagen import generate_frame
+
+    return generate_frame(rows or args.rows, args.columns, args.null_rate, args.duplicate_rate, args.text_length)
+
+
+def _backend(args):
+    import scripts.backend as backend
+    from fake_llm import FakeLLM
+    from llm_backends import echo_data
+
+    backend.ai_agent.llm = FakeLLM(args.latency, echo_data)
+    return backend
+
+
+def _client(args):
+    from fastapi.testclient import TestClient
+
+    # Entered so every request runs on one event loop, as under uvicorn; the shared API session is bound to it.
+    return TestClient(_backend(args).app).__enter__()
+
+
+def _sqlite(args, tmp, rows=None):
+    import sqlite3
+
+    path = os.path.join(tmp, "data.sqlite")
+    with sqlite3.connect(path) as connection:
+        _frame(args, rows).to_sql("data", connection, index=False)
+    return f"sqlite:///{path}"
+
+
+def _records(args, rows=None):
+    return json.loads(_frame(args, rows).to_json(orient="records"))
+
+
+# ------------------------ Rule-based and AI cleaning ------------------------
+
+@case("clean_data.legacy")
+def _(args, tmp):
+    from data_cleaning import DataCleaning
+
+    df = _frame(args)
+    return lambda: DataCleaning().clean_data(df.copy()), len(df)
+
+
+@case("clean_data.engine")
+def _(args, tmp):
+    from cleaning_engine import CleaningEngine
+
+    df = _frame(args)
+    return lambda: CleaningEngine().clean_data(df), len(df)
+
+
+@case("clean_data.engine_profiled")
+def _(args, tmp):
+    from cleaning_engine import CleaningEngine
+    from profiles import FrameProfile
+
+    df = _frame(args)
+    profile = FrameProfile.from_frame(df)
+    return lambda: CleaningEngine().clean_data(df, profile), len(df)
+
+
+@case("profile.build")
+def _(args, tmp):
+    from profiles import FrameProfile
+
+    df = _frame(args)
+    return lambda: FrameProfile.from_frame(df), len(df)
+
+
+@case("rules.evaluate")
+def _(args, tmp):
+    from bench_rules import SUITE
+    from rules import RuleSet
+
+    df, rules = _frame(args), RuleSet.from_dict(SUITE)
+    return lambda: rules.evaluate(df), len(df)
+
+
+@case("near_duplicates.find")
+def _(args, tmp):
+    from bench_near_duplicates import generate_people
+    from near_duplicates import NearDuplicateDetector
+
+    df, _ = generate_people(args.rows)
+    return lambda: NearDuplicateDetector().find(df), len(df)
+
+
+def _process_data(args, concurrency):
+    from ai_agent import AIAgent
+    from fake_llm import FakeLLM
+    from llm_backends import echo_data
+
+    df = _frame(args, args.llm_rows)
+    agent = AIAgent(llm=FakeLLM(args.latency, echo_data))
+    return lambda: agent.process_data(df, concurrency=concurrency, token_budget=args.token_budget), len(df)
+
+
+@case("process_data.sequential")
+def _(args, tmp):
+    return _process_data(args, 1)
+
+
+@case("process_data.concurrent")
+def _(args, tmp):
+    return _process_data(args, 8)
+
+
+# ------------------------ Backend endpoints ------------------------
+
+@case("endpoint.clean_data")
+def _(args, tmp):
+    client, body = _client(args), _frame(args).to_csv(index=False).encode()
+    return lambda: client.post("/clean-data", files={"file": ("data.csv", body)}).raise_for_status(), args.rows
+
+
+@case("endpoint.clean_data_stream")
+def _(args, tmp):
+    client, body = _client(args), _frame(args).to_csv(index=False).encode()
+    return lambda: client.post(
+        "/clean-data?stream=ndjson", files={"file": ("data.csv", body)}
+    ).raise_for_status(), args.rows
+
+
+@case("endpoint.clean_db")
+def _(args, tmp):
+    client, db_url = _client(args), _sqlite(args, tmp)
+    body = {"db_url": db_url, "query": "SELECT * FROM data"}
+    return lambda: client.post("/clean-db", json=body).raise_for_status(), args.rows
+
+
+@case("endpoint.clean_api")
+def _(args, tmp):
+    from stub_api import StubApi
+
+    client, api = _client(args), StubApi(_records(args)).start()
+    body = {"api_url": api.url, "pagination": "offset", "page_size": args.page_size}
+    return lambda: client.post("/clean-api", json=body).raise_for_status(), args.rows
+
+
+def _job(client, path, **request):
+    job = client.post(path, **request).json()
+    while client.get(f"/jobs/{job['id']}").json()["status"] not in ("succeeded", "failed", "cancelled"):
+        time.sleep(0.01)
+    client.get(f"/jobs/{job['id']}/result").raise_for_status()
+
+
+@case("endpoint.jobs_clean_data")
+def _(args, tmp):
+    client, body = _client(args), _frame(args).to_csv(index=False).encode()
+    return lambda: _job(client, "/jobs/clean-data", files={"file": ("data.csv", body)}), args.rows
+
+
+@case("endpoint.jobs_clean_db")
+def _(args, tmp):
+    client, db_url = _client(args), _sqlite(args, tmp)
+    return lambda: _job(client, "/jobs/clean-db", json={"db_url": db_url, "query": "SELECT * FROM data"}), args.rows
+
+
+@case("endpoint.jobs_clean_api")
+def _(args, tmp):
+    from stub_api import StubApi
+
+    client, api = _client(args), StubApi(_records(args)).start()
+    body = {"api_url": api.url, "pagination": "offset", "page_size": args.page_size}
+    return lambda: _job(client, "/jobs/clean-api", json=body), args.rows
+
+
+@case("endpoint.metrics")
+def _(args, tmp):
+    client = _client(args)
+    return lambda: client.get("/metrics").raise_for_status(), 0
+
+
+# ------------------------ Ingestion ------------------------
+
+@case("ingest.csv")
+def _(args, tmp):
+    from data_ingestion import DataIngestion
+
+    path = os.path.join(tmp, "data.csv")
+    _frame(args).to_csv(path, index=False)
+    return lambda: DataIngestion().load_csv(path), args.rows
+
+
+@case("ingest.excel")
+def _(args, tmp):
+    from data_ingestion import DataIngestion
+
+    path = os.path.join(tmp, "data.xlsx")
+    _frame(args).to_excel(path, index=False)
+    return lambda: DataIngestion().load_excel(path), args.rows
+
+
+@case("ingest.parquet")
+def _(args, tmp):
+    from data_ingestion import DataIngestion
+
+    path = os.path.join(tmp, "data.parquet")
+    _frame(args).to_parquet(path)
+    return lambda: DataIngestion().load_parquet(path), args.rows
+
+
+@case("ingest.feather")
+def _(args, tmp):
+    from data_ingestion import DataIngestion
+
+    path = os.path.join(tmp, "data.feather")
+    _frame(args).to_feather(path)
+    return lambda: DataIngestion().load_feather(path), args.rows
+
+
+@case("ingest.sqlite")
+def _(args, tmp):
+    from data_ingestion import DataIngestion
+
+    ingestion = DataIngestion(_sqlite(args, tmp))
+    return lambda: ingestion.load_from_database("SELECT * FROM data"), args.rows
+
+
+@case("ingest.api")
+def _(args, tmp):
+    from api_ingestion import make_paginator
+    from data_ingestion import DataIngestion
+    from stub_api import StubApi
+
+    api, ingestion = StubApi(_records(args)).start(), DataIngestion()
+    paginator = make_paginator("offset", page_size=args.page_size)
+    return lambda: ingestion.fetch_from_api(api.url, paginator=paginator), args.rows
+
+
+@case("ingest.api_concurrent")
+def _(args, tmp):
+    import asyncio
+
+    from api_ingestion import ApiClient, make_paginator
+    from stub_api import StubApi
+
+    api = StubApi(_records(args)).start()
+
+    async def fetch():
+        async with ApiClient() as client:
+            paginator = make_paginator("offset", page_size=args.page_size)
+            return [frame async for frame in client.iter_frames(api.url, paginator=paginator, concurrency=8)]
+
+    return lambda: asyncio.run(fetch()), args.rows
+
+
+# ------------------------ Runner ------------------------
+
+def run_case(name, args):
+    """Runs one case in this process and prints its result as JSON."""
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["LLM_CACHE_PATH"] = ""  # Every repeat must reach the (fake) LLM
+        os.environ["INCREMENTAL_STATE_PATH"] = os.path.join(tmp, "state.sqlite")
+        os.environ["PROFILE_CACHE_PATH"] = ""  # Repeats reuse the first run's column profiles, in memory
+        os.environ["IMPUTATION_PATH"] = ""  # ... and its fitted imputers
+        run, rows = CASES[name](args, tmp)
+        setup_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        seconds = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run()
+            seconds.append(time.perf_counter() - start)
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    median = sorted(seconds)[len(seconds) // 2]
+    print(json.dumps({
+        "name": name,
+        "rows": rows,
+        "seconds": seconds,
+        "median_seconds": median,
+        "rows_per_second": rows / median if rows and median else None,
+        "setup_rss_mb": round(setup_rss, 1),
+        "peak_rss_mb": round(peak_rss, 1),
+    }))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args):
+    names = [name for name in CASES if any(fnmatch.fnmatch(name, pattern) for pattern in args.cases)]
+    parameters = {option: getattr(args, option) for option in (
+        "rows", "columns", "null_rate", "duplicate_rate", "text_length", "latency", "llm_rows", "token_budget",
+        "page_size", "repeat")}
+    forwarded = [item for option, value in parameters.items()
+                 for item in (f"--{option.replace('_', '-')}", str(value))]
+    results = []
+    for name in names:
+        completed = subprocess.run([sys.executable, __file__, "--case", name, *forwarded],
+                                   capture_output=True, text=True)
+        lines = completed.stdout.strip().splitlines()
+        if completed.returncode != 0 or not lines:
+            error = (completed.stderr.strip().splitlines() or ["no output"])[-1]
+            results.append({"name": name, "error": error})
+            print(f"{name:<28} failed: {error}")
+            continue
+        result = json.loads(lines[-1])
+        results.append(result)
+        rate = f"{result['rows_per_second']:>12,.0f} rows/s" if result["rows_per_second"] else " " * 19
+        print(f"{name:<28} {result['median_seconds']:>8.3f}s {rate} {result['peak_rss_mb']:>8.1f} MB peak")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": parameters,
+        "results": results,
+    }
+    output = args.output or os.path.join(BENCH_DIR, "results", f"{report['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"📊 Results written to {output}")
+
+
+def compare(baseline_path, candidate_path, threshold):
+    """Prints time and peak-memory ratios per case; returns the number of regressions beyond threshold."""
+    with open(baseline_path) as handle:
+        baseline = {result["name"]: result for result in json.load(handle)["results"] if "error" not in result}
+    with open(candidate_path) as handle:
+        candidate = json.load(handle)["results"]
+    regressions = 0
+    print(f"{'case':<28} {'time':>8} {'peak RSS':>9}")
+    for result in candidate:
+        before = baseline.get(result["name"])
+        if before is None or "error" in result:
+            continue
+        time_ratio = result["median_seconds"] / before["median_seconds"]
+        memory_ratio = result["peak_rss_mb"] / before["peak_rss_mb"]
+        regressed = time_ratio > 1 + threshold or memory_ratio > 1 + threshold
+        regressions += regressed
+        print(f"{result['name']:<28} {time_ratio:>7.2f}x {memory_ratio:>8.2f}x {'⚠️ regression' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--null-rate", type=float, default=0.05)
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--text-length", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake LLM seconds per call.")
+    parser.add_argument("--llm-rows", type=int, default=1_000, help="Rows sent through AIAgent.process_data.")
+    parser.add_argument("--token-budget", type=int, default=1500)
+    parser.add_argument("--page-size", type=int, default=1_000, help="Records per stub API page.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cases", nargs="*", default=["*"], help="Glob patterns of case names.")
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/<commit>.json).")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"))
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed slowdown/growth before flagging.")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+    if args.case:
+        run_case(args.case, args)
+    else:
+        run_suite(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Local JSON API with limit/offset pagination, served from a background thread for ingestion benchmarks."""
+import asyncio
+import threading
+
+from aiohttp import web
+
+
+class StubApi:
+    """Serves records at /records?limit=&offset= (a bare list when no limit is given) on a free local port."""
+
+    def __init__(self, records, latency=0.0):
+        self.records = records
+        self.latency = latency
+        self.requests = 0
+        self.url = None
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+
+    async def _records(self, request):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if "limit" not in request.query:
+            return web.json_response(self.records)
+        limit, offset = int(request.query["limit"]), int(request.query.get("offset", 0))
+        return web.json_response({"data": self.records[offset:offset + limit]})
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get("/records", self._records)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/records"
+
+    def start(self):
+        started = threading.Event()
+
+        def serve():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start())
+            started.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=serve, daemon=True).start()
+        started.wait()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -1,20 +1,36 @@
-import openai
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 import pandas as pd
 from dotenv import load_dotenv
-import os
-from langchain_openai import OpenAI
-from langgraph.graph import StateGraph, END
 from pydantic import BaseModel
 
-# Load API key from environment
+from batching import BatchPlanner
+from llm_backends import LLM_BACKENDS, make_llm
+from llm_cache import LLMCache
+from metrics import NULL_METRICS
+from rate_limiter import RateLimiter, backoff_delay
+from serialization import SerializationError, get_format
+from tokenizer import estimate_tokens
+
+# Load settings such as OPENAI_API_KEY and LLM_BACKEND from .env; the LLM client itself is built on first use
 load_dotenv()
-openai_api_key = os.getenv("OPENAI_API_KEY")
 
-if not openai_api_key:
-    raise ValueError("❌ OPENAI_API_KEY is missing. Set it in .env or as an environment variable.")
+# Duplicates are removed by rule-based cleaning beforehand; the LLM must return one row per input row.
+PROMPT_TEMPLATE = """
+            You are an AI Data Cleaning Agent. Analyze the dataset:
 
-# Define AI Model
-llm = OpenAI(openai_api_key=openai_api_key, temperature=0)
+            {data}
+
+            Identify missing values, choose the best imputation strategy (mean, mode, median),
+            and format text correctly.
+            {context}
+            {instructions}
+            """
 
 
 class CleaningState(BaseModel):
@@ -23,17 +39,59 @@ class CleaningState(BaseModel):
     structured_response: str = ""
 
 class AIAgent:
-    def __init__(self):
-        self.graph = self.create_graph()
+    """Cleans row batches with an LLM through a one-node LangGraph agent.
+
+    The LLM client (see llm_backends.make_llm) and the compiled graph are built on first use, so
+    importing and constructing the agent stays cheap and needs no API key until a batch is sent.
+    """
+
+    def __init__(self, llm=None, max_retries=3, backoff_base=1.0, backoff_max=30.0, cache=None, prompt_format="csv",
+                 metrics=None, llm_backend="openai"):
+        if llm is None and llm_backend not in LLM_BACKENDS:
+            raise ValueError(f"Unknown LLM backend {llm_backend!r}. Use one of {', '.join(LLM_BACKENDS)}.")
+        self._llm = llm
+        self._graph = None
+        # One lock per lazy attribute: compiling the graph inspects agent_logic, which reads self.llm.
+        self._llm_lock = threading.Lock()
+        self._graph_lock = threading.Lock()
+        self.llm_backend = llm_backend
+        self.cache = cache
+        self.metrics = metrics or NULL_METRICS
+        self.prompt_format = get_format(prompt_format)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    self._llm = make_llm(self.llm_backend)
+        return self._llm
+
+    @llm.setter
+    def llm(self, llm):
+        self._llm = llm
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            with self._graph_lock:
+                if self._graph is None:
+                    self._graph = self.create_graph()
+        return self._graph
 
     def create_graph(self):
         """Creates and returns a LangGraph agent graph with state management."""
+        from langgraph.graph import StateGraph, END
+
         graph = StateGraph(CleaningState)
 
         # ✅ FIX: Ensure agent outputs structured response
         def agent_logic(state: CleaningState) -> CleaningState:
             """Processes input and returns a structured response."""
-            response = llm.invoke(state.input_text)
+            response = self.llm.invoke(state.input_text)
             return CleaningState(input_text=state.input_text, structured_response=response)  # Ensuring structured response
 
         graph.add_node("cleaning_agent", agent_logic)
@@ -41,30 +99,247 @@ class AIAgent:
         graph.set_entry_point("cleaning_agent")
         return graph.compile()
 
-    def process_data(self, df, batch_size=20):
-        """Processes data in batches to avoid OpenAI's token limit."""
-        cleaned_responses = []
+    def build_batches(self, df, batch_size=20, token_budget=None, context="", statistics=""):
+        """Splits the DataFrame into row batches, by row count or packed to a prompt token budget."""
+        return [rows for rows, *_ in self._plan_batches(df, batch_size, token_budget, context, statistics)]
 
-        for i in range(0, len(df), batch_size):
-            df_batch = df.iloc[i:i + batch_size]  #  Process 20 rows at a time
+    def _plan_batches(self, df, batch_size=20, token_budget=None, context="", statistics="", problems=None):
+        """Returns (rows, prompt rows, problem cells or None) per batch.
 
-            prompt = f"""
-            You are an AI Data Cleaning Agent. Analyze the dataset:
+        Prompt rows are what gets rendered: with a token budget, text cells too long for any batch are
+        truncated there. The original rows are kept for passthrough and for merging results back.
+        `problems` is an optional boolean frame aligned with df marking the cells that need cleaning.
+        """
+        def cells(start, stop):
+            return problems.iloc[start:stop] if problems is not None else None
 
-            {df_batch.to_string()}
+        if token_budget is None:
+            return [(df.iloc[i:i + batch_size],) * 2 + (cells(i, i + batch_size),)
+                    for i in range(0, len(df), batch_size)]
 
-            Identify missing values, choose the best imputation strategy (mean, mode, median), 
-            remove duplicates, and format text correctly.
+        overhead = estimate_tokens(self._format_prompt("", context, statistics))
+        planner = BatchPlanner(token_budget, overhead_tokens=overhead,
+                               render_rows=partial(self.prompt_format.render_rows, problems=problems))
+        with self.metrics.stage("plan_batches", rows=len(df)):
+            prompt_df, batches = planner.plan(df)
+        summary = planner.summarize(batches)
+        print(f"📦 Planned {summary['batches']} batches for {summary['rows']} rows "
+              f"(mean fill {summary['mean_fill']:.0%}, {summary['overflowing']} over budget)")
+        pairs = []
+        for batch in batches:
+            rows = df.iloc[batch.start:batch.stop]
+            pairs.append((rows, prompt_df.iloc[batch.start:batch.stop] if batch.truncated else rows,
+                          cells(batch.start, batch.stop)))
+        return pairs
 
-            Return the cleaned data as structured text.
-            """
+    def build_prompts(self, df, batch_size=20, token_budget=None):
+        """Renders one prompt per batch."""
+        batches = self._plan_batches(df, batch_size, token_budget)
+        return [self.render_prompt(prompt_rows) for _, prompt_rows, _ in batches]
+
+    def render_prompt(self, df_batch, context="", statistics=""):
+        """Renders the cleaning prompt for one batch in the agent's prompt format.
+
+        `context` is optional text about how to clean (see rules.RuleSet.describe) and `statistics` optional
+        whole-dataset column statistics (see profiles.FrameProfile.describe).
+        """
+        return self._format_prompt(self.prompt_format.serialize(df_batch), context, statistics)
+
+    def _format_prompt(self, data, context="", statistics=""):
+        return PROMPT_TEMPLATE.format(
+            data=data,
+            context=self._context_block(context, statistics),
+            instructions=self.prompt_format.instructions,
+        )
+
+    @staticmethod
+    def _context_block(context, statistics=""):
+        parts = [context] if context else []
+        if statistics:
+            parts.insert(0, f"{statistics}\nUse these statistics when imputing; the rows above are only a sample.")
+        return "".join(f"\n{part}" for part in parts) + "\n" if parts else ""
+
+    def model_settings(self):
+        """Returns the LLM settings that affect its output, used as part of the cache key."""
+        settings = {name: getattr(self.llm, name, None) for name in ("model_name", "temperature", "max_tokens", "top_p")}
+        settings["llm"] = type(self.llm).__name__
+        return settings
+
+    def cache_key(self, prompt):
+        """Content-addressed key: the rendered prompt (template + normalized batch) plus model settings."""
+        return LLMCache.make_key(PROMPT_TEMPLATE, self.prompt_format.name, self.model_settings(), prompt)
 
-            state = CleaningState(input_text=prompt, structured_response="")
-            response = self.graph.invoke(state)
+    def invoke_batch(self, prompt):
+        """Runs a single prompt through the agent graph and returns the response text."""
+        state = CleaningState(input_text=prompt, structured_response="")
+        try:
+            with self.metrics.stage("llm_batch"):
+                response = self.graph.invoke(state)
+        except Exception:
+            self.metrics.inc("llm_requests_total", outcome="error")
+            raise
 
-            if isinstance(response, dict):
-                response = CleaningState(**response)
+        if isinstance(response, dict):
+            response = CleaningState(**response)
 
-            cleaned_responses.append(response.structured_response)  # Store results
+        self.metrics.inc("llm_requests_total", outcome="ok")
+        self.metrics.inc("llm_tokens_total", estimate_tokens(prompt), direction="in")
+        self.metrics.inc("llm_tokens_total", estimate_tokens(response.structured_response), direction="out")
+        return response.structured_response
 
+    def _invoke_with_retry(self, prompt):
+        """Invokes a batch, retrying failures with jittered exponential backoff."""
+        key = self.cache_key(prompt) if self.cache is not None else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.metrics.inc("llm_batches_total", source="cache")
+                return cached
+
+        self.metrics.inc("llm_batches_total", source="llm")
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.invoke_batch(prompt)
+                break
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                self.metrics.inc("llm_retries_total", reason="error")
+                time.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+
+        if key is not None:
+            self.cache.set(key, response)
+        return response
+
+    def process_data(self, df, batch_size=20, concurrency=1, requests_per_minute=None, tokens_per_minute=None,
+                     token_budget=None):
+        """Processes data in batches to avoid OpenAI's token limit.
+
+        With concurrency > 1 or a rate limit set, batches are dispatched concurrently
+        via `aprocess_data`. Call `aprocess_data` directly from async code.
+        """
+        if concurrency > 1 or requests_per_minute or tokens_per_minute:
+            return asyncio.run(self.aprocess_data(
+                df, batch_size, concurrency, requests_per_minute, tokens_per_minute, token_budget
+            ))
+
+        batches = self._plan_batches(df, batch_size, token_budget)
+        cleaned_responses = [
+            self._invoke_with_retry(self.render_prompt(batch)) if self.prompt_format.needs_llm(batch) else ""
+            for _, batch, _ in batches
+        ]
         return "\n".join(cleaned_responses)  # Combine all cleaned results
+
+    async def aprocess_data(self, df, batch_size=20, concurrency=4, requests_per_minute=None, tokens_per_minute=None,
+                            token_budget=None):
+        """Processes batches with up to `concurrency` LLM calls in flight, preserving batch order."""
+        batches = self._plan_batches(df, batch_size, token_budget)
+        responses = await self._adispatch(batches, concurrency, requests_per_minute, tokens_per_minute)
+        return "\n".join(responses)
+
+    async def aprocess_frame(self, df, batch_size=20, concurrency=4, requests_per_minute=None, tokens_per_minute=None,
+                             token_budget=None, progress=None, context="", statistics="", problems=None):
+        """Like aprocess_data, but parses each batch response strictly and returns a DataFrame indexed like df.
+
+        A batch whose response does not parse is sent again on its own, with the parse error appended
+        to the prompt, without failing or re-running the other batches.
+        `progress`, if given, has add_total(batches) called once planned and advance() after every batch.
+        `context` and `statistics`, if given, are whole-dataset text added to every prompt (see render_prompt).
+        Statistics are left out of cache keys: they shift as a source's profile grows, and the same rows
+        should not be sent again for that.
+        `problems`, if given, is a boolean frame aligned with df marking the cells that need cleaning; prompt
+        formats that send only problem columns (dirty, patch) use it.
+        """
+        batches = self._plan_batches(df, batch_size, token_budget, context, statistics, problems)
+        if not batches:
+            return df.copy()
+        if progress is not None:
+            progress.add_total(len(batches))
+        frames = await self._adispatch(
+            batches, concurrency, requests_per_minute, tokens_per_minute, progress, parse=True, context=context,
+            statistics=statistics,
+        )
+        return pd.concat(frames)
+
+    def _parse(self, response, rows, prompt_rows, problems=None):
+        with self.metrics.stage("parse_response", rows=len(rows)):
+            parsed = self.prompt_format.parse(response, prompt_rows, problems)
+        if prompt_rows is rows:
+            return parsed
+        # The LLM only saw the start of truncated cells, so their original text is kept.
+        for col in rows.select_dtypes(include="object").columns:
+            truncated = (prompt_rows[col] != rows[col]).to_numpy() & rows[col].notna().to_numpy()
+            if truncated.any() and col in parsed.columns:
+                parsed[col] = parsed[col].mask(truncated, rows[col])
+        return parsed
+
+    async def _adispatch(self, batches, concurrency, requests_per_minute, tokens_per_minute, progress=None,
+                         parse=False, context="", statistics=""):
+        """Sends batches from _plan_batches with up to `concurrency` LLM calls in flight, returning responses in order.
+
+        With parse=True each response is parsed with the prompt format and the parsed frames are returned;
+        malformed responses count as failed attempts of their batch and are never cached.
+        """
+        limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        semaphore = asyncio.Semaphore(concurrency)
+        loop = asyncio.get_running_loop()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            async def run(rows, prompt_rows, problems):
+                response = await send(rows, prompt_rows, problems)
+                if progress is not None:
+                    progress.advance()
+                return response
+
+            async def send(rows, prompt_rows, problems):
+                if not self.prompt_format.needs_llm(prompt_rows, problems):
+                    self.metrics.inc("llm_batches_total", source="skipped")
+                    return rows.copy() if parse else ""
+                data = self.prompt_format.serialize(prompt_rows, problems)
+                prompt = self._format_prompt(data, context, statistics)
+
+                # Cache hits skip the semaphore and rate limiter entirely. Keys leave out the statistics.
+                key = self.cache_key(self._format_prompt(data, context)) if self.cache is not None else None
+                if key is not None:
+                    cached = self.cache.get(key)
+                    if cached is not None:
+                        try:
+                            result = self._parse(cached, rows, prompt_rows, problems) if parse else cached
+                            self.metrics.inc("llm_batches_total", source="cache")
+                            return result
+                        except SerializationError:
+                            pass  # Cached before the format got stricter; ask again
+
+                self.metrics.inc("llm_batches_total", source="llm")
+
+                # Prompt tokens plus an equal allowance for the completion.
+                tokens = 2 * estimate_tokens(prompt)
+                attempt_prompt = prompt
+                async with semaphore:
+                    for attempt in range(self.max_retries + 1):
+                        with self.metrics.stage("rate_limit_wait"):
+                            await limiter.acquire(tokens)
+                        try:
+                            # Copy the context so the call's timing lands in this request's Server-Timing header.
+                            response = await loop.run_in_executor(
+                                executor, contextvars.copy_context().run, self.invoke_batch, attempt_prompt
+                            )
+                            result = self._parse(response, rows, prompt_rows, problems) if parse else response
+                            break
+                        except SerializationError as e:
+                            if attempt == self.max_retries:
+                                raise
+                            # A malformed answer is not transient: retry at once, telling the model what was wrong.
+                            self.metrics.inc("llm_retries_total", reason="malformed")
+                            attempt_prompt = f"{prompt}\nYour previous answer was rejected: {e}\nAnswer again."
+                        except Exception:
+                            if attempt == self.max_retries:
+                                raise
+                            self.metrics.inc("llm_retries_total", reason="error")
+                            await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+
+                if key is not None:
+                    self.cache.set(key, response)
+                return result
+
+            return await asyncio.gather(*(run(*batch) for batch in batches))
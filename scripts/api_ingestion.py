@@ -0,0 +1,320 @@
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from urllib.parse import urlencode
+
+import pandas as pd
+
+from rate_limiter import backoff_delay
+
+DEFAULT_TIMEOUT_SECONDS = 30
+DEFAULT_PAGE_CONCURRENCY = 4
+DEFAULT_CONNECTION_LIMIT = 100  # Connections kept open across all hosts by the shared session
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RECORD_KEYS = ("data", "results", "items", "records", "rows")  # Where list payloads usually live in an object
+
+
+class ApiError(RuntimeError):
+    """Raised when an API page cannot be fetched."""
+
+    def __init__(self, url, status):
+        super().__init__(f"API request to {url} failed with status {status}.")
+        self.url = url
+        self.status = status
+
+
+def _lookup(payload, path):
+    """Follows a dotted path ("meta.next_cursor") through nested dicts; returns None if it is missing."""
+    for part in path.split("."):
+        if not isinstance(payload, dict):
+            return None
+        payload = payload.get(part)
+    return payload
+
+
+def extract_records(payload, records_path=None):
+    """Returns the list of records in a page: the payload itself, the list at records_path, or a usual key."""
+    if records_path:
+        payload = _lookup(payload, records_path)
+    elif isinstance(payload, dict):
+        listed = next((payload[key] for key in RECORD_KEYS if isinstance(payload.get(key), list)), None)
+        if listed is not None:
+            payload = listed
+        elif payload and all(isinstance(value, list) for value in payload.values()):
+            payload = pd.DataFrame(payload).to_dict("records")  # Column-oriented {"col": [...]} payload
+        else:
+            payload = [payload]
+    if payload is None:
+        return []
+    return payload if isinstance(payload, list) else [payload]
+
+
+def records_to_frame(records):
+    """Flattens nested JSON records into columns (address.city, ...)."""
+    return pd.json_normalize(records) if records else pd.DataFrame()
+
+
+class Paginator:
+    """Single request, no pagination. Subclasses describe how to get from one page to the next.
+
+    `next_request` receives the request that produced a page, its JSON payload, its records and its
+    Link header relations ({rel: url}); it returns the (url, params) of the next page, or None.
+    """
+
+    concurrent = False
+
+    def first_request(self, url, params):
+        return url, dict(params or {})
+
+    def next_request(self, request, payload, records, links):
+        return None
+
+
+class OffsetPaginator(Paginator):
+    """limit/offset (or page/per_page) pagination, where every page's parameters are known upfront.
+
+    Pages are fetched concurrently; the sequence ends at the first page with fewer than page_size records.
+    """
+
+    concurrent = True
+
+    def __init__(self, page_size=100, limit_param="limit", offset_param="offset", by_page=False, first_page=1):
+        self.page_size = page_size
+        self.limit_param = limit_param
+        self.offset_param = offset_param
+        self.by_page = by_page  # offset_param counts pages (first_page, first_page + 1, ...) rather than rows
+        self.first_page = first_page
+
+    def page_request(self, url, params, index):
+        """Returns the request for the index-th page (from 0)."""
+        offset = self.first_page + index if self.by_page else index * self.page_size
+        return url, {**(params or {}), self.limit_param: self.page_size, self.offset_param: offset}
+
+    def first_request(self, url, params):
+        return self.page_request(url, params, 0)
+
+    def is_last(self, records):
+        return len(records) < self.page_size
+
+    def next_request(self, request, payload, records, links):
+        # Sequential fallback, used by the blocking client.
+        if self.is_last(records):
+            return None
+        url, params = request
+        step = 1 if self.by_page else self.page_size
+        return url, {**params, self.offset_param: params[self.offset_param] + step}
+
+
+class CursorPaginator(Paginator):
+    """The response carries the next cursor (or the next page's URL) at cursor_path."""
+
+    def __init__(self, cursor_path="next_cursor", cursor_param="cursor"):
+        self.cursor_path = cursor_path
+        self.cursor_param = cursor_param
+
+    def next_request(self, request, payload, records, links):
+        cursor = _lookup(payload, self.cursor_path)
+        if cursor in (None, "") or not records:
+            return None
+        url, params = request
+        if isinstance(cursor, str) and cursor.startswith(("http://", "https://")):
+            return cursor, {}
+        return url, {**params, self.cursor_param: cursor}
+
+
+class LinkHeaderPaginator(Paginator):
+    """Follows the rel="next" URL of the Link header (RFC 8288), as GitHub-style APIs send."""
+
+    def next_request(self, request, payload, records, links):
+        return (links["next"], {}) if links.get("next") else None
+
+
+PAGINATORS = {
+    "none": Paginator,
+    "offset": OffsetPaginator,
+    "page": lambda **options: OffsetPaginator(**{"offset_param": "page", "limit_param": "per_page", **options},
+                                              by_page=True),
+    "cursor": CursorPaginator,
+    "link": LinkHeaderPaginator,
+}
+
+
+def make_paginator(kind="none", **options):
+    """Builds a paginator by name: none, offset, page, cursor or link."""
+    try:
+        factory = PAGINATORS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown pagination {kind!r}. Choose from {sorted(PAGINATORS)}.") from None
+    return factory(**options)
+
+
+class HttpCache:
+    """In-memory LRU of page payloads with their ETag and Last-Modified validators, for conditional requests."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, params):
+        return f"{url}?{urlencode(sorted((params or {}).items()))}"
+
+    def validators(self, key):
+        """Returns the If-None-Match / If-Modified-Since headers for a cached page."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return {}
+        etag, last_modified = entry[0], entry[1]
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def get(self, key):
+        """Returns (payload, links) of a cached page after a 304, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2], entry[3]
+
+    def set(self, key, headers, payload, links):
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._entries[key] = (etag, last_modified, payload, links)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class ApiClient:
+    """Paginated JSON API ingestion over one pooled aiohttp session.
+
+    The session keeps connections alive between pages and requests, asks for gzip/deflate, and applies
+    a timeout to every request. Pages are normalized into DataFrames as they arrive, so cleaning can
+    start before the last page is fetched. A ClientSession belongs to the event loop it was opened on,
+    so background jobs, which run on their own loops, open their own client and share the HTTP cache.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT_SECONDS, connection_limit=DEFAULT_CONNECTION_LIMIT, cache=None,
+                 max_retries=3, backoff_base=0.5, backoff_max=10.0):
+        self.timeout = timeout
+        self.connection_limit = connection_limit
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._session = None
+
+    async def open(self):
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.connection_limit, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Accept": "application/json"},
+            )
+        return self
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def fetch_page(self, url, params=None):
+        """Fetches one page and returns (payload, links), revalidating cached pages and retrying transient errors."""
+        await self.open()
+        key = HttpCache.key(url, params) if self.cache is not None else None
+        headers = self.cache.validators(key) if key is not None else {}
+        for attempt in range(self.max_retries + 1):
+            async with self._session.get(url, params=params, headers=headers) as response:
+                if response.status == 304 and key is not None:
+                    cached = self.cache.get(key)
+                    if cached is not None:
+                        return cached
+                if response.status == 200:
+                    payload = await response.json(content_type=None)
+                    links = {str(rel): str(link["url"]) for rel, link in response.links.items()}
+                    if key is not None:
+                        self.cache.set(key, response.headers, payload, links)
+                    return payload, links
+                if response.status not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise ApiError(url, response.status)
+                retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else backoff_delay(
+                attempt, self.backoff_base, self.backoff_max)
+            await asyncio.sleep(delay)
+
+    async def iter_frames(self, url, params=None, paginator=None, records_path=None,
+                          concurrency=DEFAULT_PAGE_CONCURRENCY, max_pages=None):
+        """Yields one DataFrame per non-empty page, in page order."""
+        paginator = paginator or Paginator()
+        if paginator.concurrent:
+            pages = self._iter_concurrent(url, params, paginator, records_path, concurrency, max_pages)
+        else:
+            pages = self._iter_sequential(url, params, paginator, records_path, max_pages)
+        async for records in pages:
+            if records:
+                yield await asyncio.to_thread(records_to_frame, records)
+
+    async def _iter_sequential(self, url, params, paginator, records_path, max_pages):
+        # The next page is requested as soon as its URL is known, while the caller processes this one.
+        request = paginator.first_request(url, params)
+        task = asyncio.ensure_future(self.fetch_page(*request))
+        pages = 0
+        try:
+            while task is not None:
+                payload, links = await task
+                pages += 1
+                records = extract_records(payload, records_path)
+                next_request = paginator.next_request(request, payload, records, links)
+                task = None
+                if next_request is not None and (max_pages is None or pages < max_pages):
+                    request = next_request
+                    task = asyncio.ensure_future(self.fetch_page(*request))
+                yield records
+        finally:
+            if task is not None:
+                task.cancel()
+
+    async def _iter_concurrent(self, url, params, paginator, records_path, concurrency, max_pages):
+        # Keep up to `concurrency` pages in flight and hand them out in order until a short page.
+        window = deque()
+        scheduled = 0
+
+        def schedule():
+            nonlocal scheduled
+            window.append(asyncio.ensure_future(self.fetch_page(*paginator.page_request(url, params, scheduled))))
+            scheduled += 1
+
+        try:
+            while len(window) < concurrency and (max_pages is None or scheduled < max_pages):
+                schedule()
+            while window:
+                payload, _ = await window.popleft()
+                records = extract_records(payload, records_path)
+                if paginator.is_last(records):
+                    yield records
+                    return
+                if max_pages is None or scheduled < max_pages:
+                    schedule()
+                yield records
+        finally:
+            for task in window:
+                task.cancel()
@@ -1,83 +1,440 @@
+import asyncio
 import sys
+from contextlib import asynccontextmanager
+from functools import partial
+import time
 import os
 import pandas as pd
-import io
-import aiohttp
-from fastapi import FastAPI, UploadFile, File, Query, HTTPException
-from sqlalchemy import create_engine
-from pydantic import BaseModel
-import requests
+from fastapi import FastAPI, UploadFile, File, Query, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.engine import make_url
 
 # Ensure the scripts folder is in Python's path
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
 from scripts.ai_agent import AIAgent  # Import AI Agent
+from scripts.llm_cache import LLMCache, DEFAULT_CACHE_PATH
 from scripts.data_cleaning import DataCleaning  # Import Rule-Based Data Cleaning
+from scripts.cleaning_engine import CleaningEngine
+from scripts.parallel_cleaning import ParallelCleaning
+from scripts.batching import DEFAULT_TOKEN_BUDGET
+from scripts.database import EngineRegistry, read_sql_chunks
+from scripts.api_ingestion import ApiClient, HttpCache, make_paginator, DEFAULT_PAGE_CONCURRENCY
+from scripts.incremental import IncrementalState, IncrementalSync, DEFAULT_STATE_PATH
+from scripts.deduplication import RowDeduplicator
+from scripts.dirty_rows import DirtyRowDetector
+from scripts.pipeline import CleaningPipeline
+from scripts.memory_optimizer import MemoryOptimizer
+from scripts.imputation import DEFAULT_IMPUTER_PATH, ImputationEngine, ImputerStore
+from scripts.near_duplicates import DEFAULT_THRESHOLD, NearDuplicateDetector
+from scripts.rules import RuleSet
+from scripts.normalization import DEFAULT_MAX_DISTINCT, DEFAULT_NORMALIZATION_PATH, NormalizationStore, ValueNormalizer
+from scripts.jobs import JobManager, SUCCEEDED, DEFAULT_JOB_WORKERS, DEFAULT_JOB_TTL_SECONDS, FINISHED
+from scripts.metrics import Metrics
+from scripts.file_readers import FileReader, file_format, DEFAULT_CATEGORY_RATIO
+from scripts.profiles import (
+    DEFAULT_PROFILE_PATH, FrameProfile, ProfileCache, aprofile_chunks, fingerprint_file, source_key,
+)
+from scripts.streaming import (
+    DEFAULT_CHUNK_ROWS,
+    MEDIA_TYPES,
+    STREAM_MEDIA_TYPES,
+    aclean_chunks,
+    aiter_chunks,
+    aiter_frames,
+    aiter_record_batches,
+    aprepend,
+    encode_frames,
+    negotiate_format,
+    spool_upload,
+)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app):
+    """Stops background jobs and closes pooled database and HTTP connections when the server shuts down."""
+    yield
+    jobs.shutdown()
+    db_engines.dispose()
+    await api_client.close()
+
+app = FastAPI(lifespan=lifespan)
+
+# Concurrent LLM dispatch settings (rate limits are optional and disabled when unset)
+AI_CONCURRENCY = int(os.getenv("AI_CONCURRENCY", "4"))
+AI_REQUESTS_PER_MINUTE = int(os.getenv("AI_REQUESTS_PER_MINUTE", "0")) or None
+AI_TOKENS_PER_MINUTE = int(os.getenv("AI_TOKENS_PER_MINUTE", "0")) or None
+AI_TOKEN_BUDGET = int(os.getenv("AI_TOKEN_BUDGET", str(DEFAULT_TOKEN_BUDGET)))
+AI_PROMPT_FORMAT = os.getenv("AI_PROMPT_FORMAT", "csv")  # csv, jsonl, dirty or patch
+
+# LLM used for AI cleaning: "openai" (needs OPENAI_API_KEY, checked on the first LLM call), "stub" (offline,
+# returns every batch unchanged) or "none" for rule-based cleaning only
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+
+# Persistent LLM response cache (set LLM_CACHE_PATH to an empty string to keep it in memory only)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Rule-based cleaner: the planned single-pass engine, "legacy" for DataCleaning, or "parallel" for
+# DataCleaning semantics spread over RULE_CLEANER_WORKERS processes (0 uses every core)
+RULE_CLEANER = os.getenv("RULE_CLEANER", "engine")
+RULE_CLEANER_WORKERS = int(os.getenv("RULE_CLEANER_WORKERS", "0")) or None
+
+# Send only unique rows to the LLM and fan the results back out (set AI_DEDUPLICATE=0 to disable)
+AI_DEDUPLICATE = os.getenv("AI_DEDUPLICATE", "1") == "1"
+
+# Send only rows that still look dirty after rule-based cleaning (set AI_DIRTY_ROWS_ONLY=0 to send every row)
+AI_DIRTY_ROWS_ONLY = os.getenv("AI_DIRTY_ROWS_ONLY", "1") == "1"
+
+# Fill nulls locally before the fill strategy and the LLM: per column, group-wise fills (e.g. age by city), a
+# model on the other numeric columns or the global mean/median, chosen on a sample with the source profile; text
+# no local model predicts is left to the LLM. Fitted imputers are kept per source and content fingerprint in
+# IMPUTATION_PATH for IMPUTATION_TTL_SECONDS (set LOCAL_IMPUTATION=0 to disable; IMPUTATION_STRATEGY forces group,
+# knn, iterative, mean, median or mode for every column)
+LOCAL_IMPUTATION = os.getenv("LOCAL_IMPUTATION", "1") == "1"
+IMPUTATION_STRATEGY = os.getenv("IMPUTATION_STRATEGY", "auto")
+IMPUTATION_PATH = os.getenv("IMPUTATION_PATH", DEFAULT_IMPUTER_PATH)
+IMPUTATION_TTL_SECONDS = int(os.getenv("IMPUTATION_TTL_SECONDS", str(24 * 3600)))
+
+# Upload parsing: "arrow" (multi-threaded pyarrow CSV, streaming read-only Excel) or "pandas"; FILE_DTYPE_BACKEND=pyarrow
+# keeps columns Arrow-backed, and text columns with at most FILE_CATEGORY_RATIO distinct values become categoricals
+FILE_READER_ENGINE = os.getenv("FILE_READER_ENGINE", "arrow")
+FILE_DTYPE_BACKEND = os.getenv("FILE_DTYPE_BACKEND", "numpy")
+FILE_CATEGORY_RATIO = float(os.getenv("FILE_CATEGORY_RATIO", str(DEFAULT_CATEGORY_RATIO))) or None
+
+file_reader = FileReader(FILE_READER_ENGINE, FILE_DTYPE_BACKEND, FILE_CATEGORY_RATIO)
+
+# Downcast numbers, keep whole-number columns as nullable ints and turn low-cardinality text into categoricals
+# after rule-based cleaning (set MEMORY_OPTIMIZER=0 to disable)
+MEMORY_OPTIMIZER = os.getenv("MEMORY_OPTIMIZER", "1") == "1"
+
+# Round mean/median and local imputation fills of columns holding only whole numbers, so they stay integral
+# (and compact) instead of getting fractional fills; changes the filled values, so off by default
+PRESERVE_INTEGERS = os.getenv("PRESERVE_INTEGERS", "0") == "1"
+
+# Normalize low-cardinality text columns by sending each distinct value to the LLM once and remapping whole
+# columns with the learned dictionaries, kept per source and column in NORMALIZATION_PATH (set
+# AI_NORMALIZE_VALUES=0 to disable; columns with more than NORMALIZE_MAX_DISTINCT values are left to row cleaning)
+AI_NORMALIZE_VALUES = os.getenv("AI_NORMALIZE_VALUES", "1") == "1"
+NORMALIZATION_PATH = os.getenv("NORMALIZATION_PATH", DEFAULT_NORMALIZATION_PATH)
+NORMALIZE_MAX_DISTINCT = int(os.getenv("NORMALIZE_MAX_DISTINCT", str(DEFAULT_MAX_DISTINCT)))
+
+# Merge rows that are the same record spelled differently (case, spacing, punctuation, typos) before cleaning
+# (set NEAR_DUPLICATES=1 to enable). NEAR_DUPLICATE_COLUMNS is a comma-separated list of columns to compare
+# (default: every column except row ids), NEAR_DUPLICATE_METHOD the blocking index ("sorted" neighbourhood or
+# "minhash" LSH) and NEAR_DUPLICATE_POLICY how a cluster becomes one row ("coalesce", "first" or "most_complete")
+NEAR_DUPLICATES = os.getenv("NEAR_DUPLICATES", "0") == "1"
+NEAR_DUPLICATE_COLUMNS = [col.strip() for col in os.getenv("NEAR_DUPLICATE_COLUMNS", "").split(",") if col.strip()]
+NEAR_DUPLICATE_METHOD = os.getenv("NEAR_DUPLICATE_METHOD", "sorted")
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", str(DEFAULT_THRESHOLD)))
+NEAR_DUPLICATE_POLICY = os.getenv("NEAR_DUPLICATE_POLICY", "coalesce")
+
+# Data-quality rules for every endpoint: an expectation suite in Great Expectations' JSON layout whose
+# expectations say per column what values must satisfy (ranges, regex formats, allowed sets, uniqueness, column
+# pairs) and, in meta.action, whether violations are flagged for the LLM, nulled for imputation or dropped
+RULES_PATH = os.getenv("RULES_PATH", "")
+
+# Pooled database engines, one per URL (pool_size + max_overflow bounds the connections per database)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+db_engines = EngineRegistry(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+
+# Shared HTTP session for /clean-api (connections per server) and per-request timeout in seconds
+API_CONNECTION_LIMIT = int(os.getenv("API_CONNECTION_LIMIT", "100"))
+API_TIMEOUT_SECONDS = float(os.getenv("API_TIMEOUT_SECONDS", "30"))
+
+# Watermarks, running imputation statistics and row hashes for incremental /clean-db runs
+INCREMENTAL_STATE_PATH = os.getenv("INCREMENTAL_STATE_PATH", DEFAULT_STATE_PATH)
+
+# Column profiles (counts, sums, quantile, frequent-value and distinct-count sketches) cached per source: uploads
+# by content hash, queries and APIs for PROFILE_TTL_SECONDS (set COLUMN_PROFILES=0 to disable, PROFILE_CACHE_PATH
+# to an empty string to keep them in memory only)
+COLUMN_PROFILES = os.getenv("COLUMN_PROFILES", "1") == "1"
+PROFILE_CACHE_PATH = os.getenv("PROFILE_CACHE_PATH", DEFAULT_PROFILE_PATH)
+PROFILE_TTL_SECONDS = int(os.getenv("PROFILE_TTL_SECONDS", "3600"))
+
+# Background cleaning jobs (see /jobs): worker threads and how long finished results are kept
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(DEFAULT_JOB_WORKERS)))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", str(DEFAULT_JOB_TTL_SECONDS)))
+
+# Stage latency histograms and counters served at /metrics; SERVER_TIMING=1 adds a Server-Timing header
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+metrics = Metrics(enabled=METRICS_ENABLED)
+metrics.describe("cleaning_stage_seconds", "Time spent in each pipeline stage.")
+metrics.describe("cleaning_stage_rows_total", "Rows processed by each pipeline stage.")
+metrics.describe("cleaning_stage_rows_per_second", "Throughput of the last run of each pipeline stage.")
+metrics.describe("llm_batches_total", "LLM batches by source: llm call, cache hit or skipped as clean.")
+metrics.describe("llm_requests_total", "LLM calls by outcome.")
+metrics.describe("llm_retries_total", "LLM calls retried, by reason: call error or malformed response.")
+metrics.describe("llm_tokens_total", "Estimated LLM prompt (in) and completion (out) tokens.")
+metrics.describe("normalization_values_total", "Distinct text values normalized, from a learned dictionary or the LLM.")
+metrics.describe("imputed_values_total", "Null values filled by local imputation, by strategy.")
+metrics.describe("rule_violations_total", "Rows violating each data-quality rule, by rule and action.")
+metrics.describe("near_duplicates_merged_total", "Rows merged into another row as a near duplicate.")
+metrics.describe("memory_bytes_saved_total", "Bytes saved by the memory optimizer on rule-cleaned frames.")
+metrics.describe("http_request_seconds", "Time to response headers by route.")
 
 # Initialize AI agent and rule-based data cleaner
-ai_agent = AIAgent()
-cleaner = DataCleaning()
+ai_agent = None if LLM_BACKEND == "none" else AIAgent(
+    cache=LLMCache(LLM_CACHE_PATH or None, ttl_seconds=LLM_CACHE_TTL_SECONDS),
+    prompt_format=AI_PROMPT_FORMAT,
+    metrics=metrics,
+    llm_backend=LLM_BACKEND,
+)
+rules = RuleSet.load(RULES_PATH, metrics) if RULES_PATH else None
+imputer = ImputationEngine(
+    IMPUTATION_STRATEGY,
+    store=ImputerStore(IMPUTATION_PATH or None, ttl_seconds=IMPUTATION_TTL_SECONDS),
+    metrics=metrics,
+    preserve_integers=PRESERVE_INTEGERS,
+) if LOCAL_IMPUTATION else None
+if RULE_CLEANER == "legacy":
+    cleaner = DataCleaning(imputer)
+elif RULE_CLEANER == "parallel":
+    cleaner = ParallelCleaning(workers=RULE_CLEANER_WORKERS, imputer=imputer)
+else:
+    cleaner = CleaningEngine(preserve_integers=PRESERVE_INTEGERS, imputer=imputer)
+pipeline = CleaningPipeline(
+    cleaner,
+    ai_agent,
+    deduplicator=RowDeduplicator() if AI_DEDUPLICATE else None,
+    dirty_detector=DirtyRowDetector() if AI_DIRTY_ROWS_ONLY else None,
+    concurrency=AI_CONCURRENCY,
+    requests_per_minute=AI_REQUESTS_PER_MINUTE,
+    tokens_per_minute=AI_TOKENS_PER_MINUTE,
+    token_budget=AI_TOKEN_BUDGET,
+    metrics=metrics,
+    optimizer=MemoryOptimizer() if MEMORY_OPTIMIZER else None,
+    normalizer=ValueNormalizer(
+        NormalizationStore(NORMALIZATION_PATH or None), max_distinct=NORMALIZE_MAX_DISTINCT, metrics=metrics
+    ) if AI_NORMALIZE_VALUES else None,
+    near_duplicates=NearDuplicateDetector(
+        NEAR_DUPLICATE_COLUMNS or None, NEAR_DUPLICATE_METHOD, NEAR_DUPLICATE_THRESHOLD, policy=NEAR_DUPLICATE_POLICY
+    ) if NEAR_DUPLICATES else None,
+    rules=rules,
+)
+jobs = JobManager(max_workers=JOB_WORKERS, ttl_seconds=JOB_TTL_SECONDS)
+incremental_state = IncrementalState(INCREMENTAL_STATE_PATH)
+api_cache = HttpCache()
+profiles = ProfileCache(PROFILE_CACHE_PATH or None, ttl_seconds=PROFILE_TTL_SECONDS)
+api_client = ApiClient(timeout=API_TIMEOUT_SECONDS, connection_limit=API_CONNECTION_LIMIT, cache=api_cache)
+
+
+def cleaned_response(frames, fmt, on_close=None):
+    """Streams cleaned frames back in record batches as JSON, NDJSON, CSV, Arrow IPC or Parquet."""
+    return StreamingResponse(encode_frames(frames, fmt, on_close, metrics), media_type=MEDIA_TYPES[fmt])
+
+
+def profiled_frame(df):
+    """What a profile describes: the data after the rules have nulled and dropped violating values."""
+    return rules.enforce(df, record=False) if rules is not None else df
+
+
+def profiled(chunks, key, source, expires=False):
+    """Returns (chunks, clean) for a source: its cached profile, or one built as its chunks pass and cached at the end.
+
+    Without a cached profile each chunk is cleaned with the statistics of the chunks read so far.
+    `source` names the source's normalization dictionaries; `key` also keys its fitted imputers.
+    """
+    if not COLUMN_PROFILES:
+        return chunks, partial(pipeline.arun, source=source, fingerprint=key)
+    profile = profiles.get(key)
+    if profile is None:
+        profile = FrameProfile()
+        chunks = aprofile_chunks(chunks, profile, lambda done: profiles.set(key, done, expires), profiled_frame)
+    return chunks, partial(pipeline.arun, profile=profile, source=source, fingerprint=key)
+
+
+async def frame_profile(df, key):
+    """The cached profile of a source loaded whole, computing and caching it on a miss."""
+    if not COLUMN_PROFILES:
+        return None
+    profile = profiles.get(key)
+    if profile is None:
+        with metrics.stage("profile", rows=len(df)):
+            profile = await asyncio.to_thread(lambda: FrameProfile.from_frame(profiled_frame(df)))
+        profiles.set(key, profile)
+    return profile
+
+
+async def upload_key(file, fmt):
+    return "upload:" + await asyncio.to_thread(fingerprint_file, file, fmt)
+
+
+def upload_source(file):
+    return f"file:{file.filename}"
+
+
+def api_source(api_request):
+    return f"api:{api_request.api_url}"
+
+
+def db_key(query):
+    return "db:" + source_key(make_url(query.db_url).render_as_string(hide_password=True), query.query)
+
+
+def api_key(api_request):
+    return "api:" + source_key(api_request.model_dump(exclude={"concurrency"}))
+
+
+def collect_gauges():
+    """Cache hit rates, job counts and pool usage, read at scrape time."""
+    gauges = {}
+    if ai_agent is not None and ai_agent.cache is not None:
+        stats = ai_agent.cache.stats()
+        gauges.update(llm_cache_hit_rate=stats["hit_rate"], llm_cache_hits=stats["hits"], llm_cache_misses=stats["misses"])
+    gauges["http_cache_hits"] = api_cache.hits
+    gauges.update({f"profile_cache_{name}": value for name, value in profiles.stats().items()})
+    running = [job for job in jobs.list() if job.status not in FINISHED]
+    gauges["jobs_unfinished"] = len(running)
+    return gauges
+
+
+metrics.add_collector(collect_gauges)
+
+
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    """Times every request and, with SERVER_TIMING=1, reports the stages run before the headers were sent."""
+    token = metrics.start_request()
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        server_timing = metrics.end_request(token)
+    route = request.scope.get("route")
+    metrics.observe("http_request_seconds", time.perf_counter() - start, method=request.method,
+                    route=route.path if route is not None else "unmatched", status=response.status_code)
+    if SERVER_TIMING and server_timing:
+        response.headers["Server-Timing"] = server_timing
+    return response
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Pipeline metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/rules")
+async def data_rules():
+    """The data-quality rules applied by every cleaning endpoint, as an expectation suite."""
+    return rules.to_dict() if rules is not None else {"expectation_suite_name": None, "expectations": []}
 
 # ------------------------ CSV / Excel Cleaning Endpoint ------------------------
 
 @app.post("/clean-data")
-async def clean_data(file: UploadFile = File(...)):
-    """Receives file from UI, cleans it using rule-based & AI methods, and returns cleaned JSON."""
+async def clean_data(
+    request: Request,
+    file: UploadFile = File(...),
+    stream: str = Query(None, description="Clean the upload chunk by chunk, streaming it back in this format."),
+    chunksize: int = Query(DEFAULT_CHUNK_ROWS, gt=0, description="Rows per chunk when streaming."),
+):
+    """Receives file from UI, cleans it using rule-based & AI methods, and returns the cleaned data.
+
+    The response format follows the Accept header (JSON by default).
+    """
     try:
-        contents = await file.read()
-        file_extension = file.filename.split(".")[-1]
-
-        # Load file into Pandas DataFrame
-        if file_extension == "csv":
-            df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
-        elif file_extension == "xlsx":
-            df = pd.read_excel(io.BytesIO(contents))
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file format. Use CSV or Excel.")
+        fmt = file_format(file.filename)
+        if fmt is None:
+            raise HTTPException(status_code=400, detail="Unsupported file format. Use CSV, Excel, Parquet or Feather.")
 
-        # Step 1: Rule-Based Cleaning
-        df_cleaned = cleaner.clean_data(df)
+        # Stream large uploads chunk by chunk instead of materializing them
+        if stream is not None:
+            if stream not in STREAM_MEDIA_TYPES:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Streaming supports one of {sorted(STREAM_MEDIA_TYPES)}.",
+                )
+            spool = await spool_upload(file)
+            chunks, clean = profiled(aiter_chunks(file_reader.iter_chunks(spool, fmt, chunksize)),
+                                     await upload_key(spool, fmt), upload_source(file))
+            return cleaned_response(aclean_chunks(chunks, clean), stream, on_close=spool.close)
 
-        # Step 2: AI-Powered Cleaning
-        df_ai_cleaned = ai_agent.process_data(df_cleaned)
+        # Load file into Pandas DataFrame straight from the spooled upload, without copying it into memory
+        key = await upload_key(file.file, fmt)
+        with metrics.stage("parse"):
+            df = await asyncio.to_thread(file_reader.read, file.file, fmt)
 
-        # Ensure AI output is a DataFrame
-        if isinstance(df_ai_cleaned, str):
-            from io import StringIO
-            df_ai_cleaned = pd.read_csv(StringIO(df_ai_cleaned))
+        # Rule-based cleaning, then AI cleaning of the rows that still need it
+        df_ai_cleaned = await pipeline.arun(df, profile=await frame_profile(df, key), source=upload_source(file),
+                                            fingerprint=key)
 
-        return {"cleaned_data": df_ai_cleaned.to_dict(orient="records")}
+        return cleaned_response(aiter_record_batches(df_ai_cleaned), negotiate_format(request.headers.get("accept")))
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
 # ------------------------ Database Query Cleaning Endpoint ------------------------
 
+class IncrementalOptions(BaseModel):
+    key_columns: list[str] = Field(..., min_length=1, description="Columns identifying a row in source and target.")
+    target_table: str = Field(..., description="Table the cleaned rows are upserted into.")
+    target_db_url: str | None = Field(
+        None, description="Database of the target table (defaults to db_url; with SQLite use a separate file)."
+    )
+    watermark_column: str | None = Field(
+        None, description="Monotonic column such as updated_at or id; without one, changes are found by content hash."
+    )
+    strategy: str = Field("mean", description="Imputation statistic kept across runs: mean, median or mode.")
+
 class DBQuery(BaseModel):
     db_url: str
     query: str
+    chunksize: int = Field(DEFAULT_CHUNK_ROWS, gt=0, description="Rows fetched and cleaned per chunk.")
+    incremental: IncrementalOptions | None = Field(
+        None, description="Clean only rows that are new or changed since the last run and upsert them."
+    )
+
+async def incremental_frames(query, progress=None):
+    """Async iterator of the cleaned delta of an incremental query, upserting each chunk into the target table."""
+    options = query.incremental
+    target_url = options.target_db_url or query.db_url
+    name = f"{make_url(target_url).render_as_string(hide_password=True)}#{options.target_table}"
+    sync = IncrementalSync(name, options.key_columns, options.watermark_column, options.strategy, incremental_state)
+    # The sync's profile grows with every delta; work on a copy so a failed run leaves the cached one as it was.
+    key = f"sync:{name}"
+    profile = FrameProfile().merge(profiles.get(key) or FrameProfile()) if COLUMN_PROFILES else None
+    async for frame in sync.aclean(
+        pipeline, db_engines.get(query.db_url), query.query, db_engines.get(target_url), options.target_table,
+        query.chunksize, progress, profile,
+    ):
+        if profile is not None:
+            profiles.set(key, profile)
+        yield frame
 
 @app.post("/clean-db")
-async def clean_db(query: DBQuery):
-    """Fetches data from a database, cleans it using AI, and returns cleaned JSON."""
-    try:
-        engine = create_engine(query.db_url)
-        df = pd.read_sql(query.query, engine)
+async def clean_db(query: DBQuery, request: Request):
+    """Streams query results from a server-side cursor, cleans them chunk by chunk and streams them back.
 
-        # Step 1: Rule-Based Cleaning
-        df_cleaned = cleaner.clean_data(df)
+    The response format follows the Accept header (JSON by default).
+    """
+    try:
+        if query.incremental is not None:
+            frames = incremental_frames(query)
+            # Clean the first chunk before responding so connection and query errors still return a 500
+            first = await anext(frames, None)
+            return cleaned_response(
+                aprepend(first, frames) if first is not None else frames, negotiate_format(request.headers.get("accept"))
+            )
 
-        # Step 2: AI-Powered Cleaning
-        df_ai_cleaned = ai_agent.process_data(df_cleaned)
+        reader = read_sql_chunks(db_engines.get(query.db_url), query.query, query.chunksize)
 
-        # Convert AI cleaned data to DataFrame
-        if isinstance(df_ai_cleaned, str):
-            from io import StringIO
-            df_ai_cleaned = pd.read_csv(StringIO(df_ai_cleaned))
+        # Fetch the first chunk before responding so connection and query errors still return a 500
+        first = await asyncio.to_thread(next, reader)
+        chunks, clean = profiled(aiter_chunks(reader, first=first), db_key(query), db_key(query), expires=True)
 
-        return {"cleaned_data": df_ai_cleaned.to_dict(orient="records")}
+        # Rule-based cleaning, then AI cleaning of the rows that still need it
+        return cleaned_response(
+            aclean_chunks(chunks, clean), negotiate_format(request.headers.get("accept")), on_close=reader.close
+        )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching data from database: {str(e)}")
@@ -86,35 +443,140 @@ async def clean_db(query: DBQuery):
 
 class APIRequest(BaseModel):
     api_url: str
+    params: dict = Field(default_factory=dict, description="Query parameters sent with every page request.")
+    pagination: str = Field("none", description="none, offset, page, cursor or link.")
+    page_size: int = Field(100, gt=0, description="Records per page for offset and page pagination.")
+    cursor_path: str = Field("next_cursor", description="Dotted path of the next cursor (or next URL) in a page.")
+    cursor_param: str = Field("cursor", description="Query parameter that carries the cursor.")
+    records_path: str | None = Field(None, description="Dotted path of the record list in a page.")
+    max_pages: int | None = Field(None, gt=0)
+    concurrency: int = Field(DEFAULT_PAGE_CONCURRENCY, gt=0, description="Pages fetched at once (offset/page).")
 
-@app.post("/clean-api")
-async def clean_api(api_request: APIRequest):
-    """Fetches data from an API, cleans it using AI, and returns cleaned JSON."""
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(api_request.api_url) as response:
-                if response.status != 200:
-                    raise HTTPException(status_code=400, detail="Failed to fetch data from API.")
-                
-                data = await response.json()
-                df = pd.DataFrame(data)
+def api_paginator(api_request):
+    if api_request.pagination in ("offset", "page"):
+        return make_paginator(api_request.pagination, page_size=api_request.page_size)
+    if api_request.pagination == "cursor":
+        return make_paginator("cursor", cursor_path=api_request.cursor_path, cursor_param=api_request.cursor_param)
+    return make_paginator(api_request.pagination)
 
-                # Step 1: Rule-Based Cleaning
-                df_cleaned = cleaner.clean_data(df)
+def api_frames(client, api_request):
+    """Async iterator of one DataFrame per fetched API page."""
+    return client.iter_frames(
+        api_request.api_url,
+        api_request.params,
+        api_paginator(api_request),
+        api_request.records_path,
+        api_request.concurrency,
+        api_request.max_pages,
+    )
 
-                # Step 2: AI-Powered Cleaning
-                df_ai_cleaned = ai_agent.process_data(df_cleaned)
+@app.post("/clean-api")
+async def clean_api(api_request: APIRequest, request: Request):
+    """Fetches API pages over a shared session, cleans each page as it arrives and streams the cleaned data back.
 
-                # Convert AI cleaned data to DataFrame
-                if isinstance(df_ai_cleaned, str):
-                    from io import StringIO
-                    df_ai_cleaned = pd.read_csv(StringIO(df_ai_cleaned))
+    The response format follows the Accept header (JSON by default).
+    """
+    try:
+        pages = aclean_chunks(*profiled(
+            api_frames(api_client, api_request), api_key(api_request), api_source(api_request), expires=True
+        ))
 
-                return {"cleaned_data": df_ai_cleaned.to_dict(orient="records")}
+        # Clean the first page before responding so fetch errors still return a 500
+        first = await anext(pages, None)
+        frames = aprepend(first, pages) if first is not None else aiter_record_batches(pd.DataFrame())
+        return cleaned_response(frames, negotiate_format(request.headers.get("accept")))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing API data: {str(e)}")
 
+# ------------------------ Background Cleaning Jobs ------------------------
+
+async def clean_into_job(job, chunks, key, source, expires=False):
+    """Cleans each chunk from an async iterator, recording progress and the cleaned frames on the job."""
+    chunks, clean = profiled(chunks, key, source, expires)
+    async for chunk in chunks:
+        job.check()
+        job.add_frame(await clean(chunk, progress=job))
+
+@app.post("/jobs/clean-data", status_code=202)
+async def submit_clean_data_job(
+    file: UploadFile = File(...),
+    chunksize: int = Query(None, gt=0, description="Clean the upload in chunks of this many rows."),
+):
+    """Queues cleaning of an uploaded data file and returns the job; poll /jobs/{id} for progress."""
+    fmt = file_format(file.filename)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Unsupported file format. Use CSV, Excel, Parquet or Feather.")
+    spool = await spool_upload(file)
+
+    async def run(job):
+        key = await upload_key(spool, fmt)
+        if chunksize is not None:
+            reader = file_reader.iter_chunks(spool, fmt, chunksize)
+        else:
+            reader = iter([await asyncio.to_thread(file_reader.read, spool, fmt)])
+        await clean_into_job(job, aiter_chunks(reader), key, upload_source(file))
+
+    return jobs.submit("clean-data", run, on_close=spool.close).to_dict()
+
+@app.post("/jobs/clean-db", status_code=202)
+async def submit_clean_db_job(query: DBQuery):
+    """Queues chunked cleaning of a database query and returns the job."""
+    async def run(job):
+        if query.incremental is not None:
+            async for frame in incremental_frames(query, progress=job):
+                job.add_frame(frame)
+            return
+        reader = read_sql_chunks(db_engines.get(query.db_url), query.query, query.chunksize)
+        try:
+            await clean_into_job(job, aiter_chunks(reader), db_key(query), db_key(query), expires=True)
+        finally:
+            reader.close()
+
+    return jobs.submit("clean-db", run).to_dict()
+
+@app.post("/jobs/clean-api", status_code=202)
+async def submit_clean_api_job(api_request: APIRequest):
+    """Queues fetching and cleaning of API data and returns the job."""
+    async def run(job):
+        # The job runs on its own event loop, so it opens its own session and shares the HTTP cache.
+        async with ApiClient(timeout=API_TIMEOUT_SECONDS, cache=api_cache) as client:
+            await clean_into_job(
+                job, api_frames(client, api_request), api_key(api_request), api_source(api_request), expires=True
+            )
+
+    return jobs.submit("clean-api", run).to_dict()
+
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}.")
+    return job
+
+@app.get("/jobs")
+async def list_jobs():
+    """Lists queued, running and recently finished jobs."""
+    return [job.to_dict() for job in jobs.list()]
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Returns a job's status and progress (chunks, rows and LLM batches done)."""
+    return get_job(job_id).to_dict()
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancels a queued or running job; running jobs stop after the LLM batch or chunk in progress."""
+    get_job(job_id)
+    return jobs.cancel(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str, request: Request):
+    """Returns a finished job's cleaned data in the negotiated format."""
+    job = get_job(job_id)
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status}, not {SUCCEEDED}.")
+    return cleaned_response(aiter_frames(job.frames), negotiate_format(request.headers.get("accept")))
+
 # ------------------------ Run Server ------------------------
 
 if __name__ == "__main__":
@@ -0,0 +1,134 @@
+import csv
+import io
+
+import numpy as np
+
+from tokenizer import CHARS_PER_TOKEN, estimate_tokens, estimate_tokens_many
+
+# Prompt-side budget per batch; leaves room for a completion of similar size in a 4k context.
+DEFAULT_TOKEN_BUDGET = 1500
+
+
+def render_csv_rows(df):
+    """Renders a header line and one CSV record per row.
+
+    A record spans several lines when a quoted cell contains a newline, so records are only split
+    on newlines when that gives one per row; otherwise they are re-read and re-written one by one.
+    """
+    text = df.to_csv(index=False, lineterminator="\n")
+    lines = text.split("\n")[:-1]
+    if len(lines) == len(df) + 1:
+        return lines[0], lines[1:]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    records = []
+    for record in csv.reader(io.StringIO(text)):
+        writer.writerow(record)
+        records.append(buffer.getvalue()[:-1])
+        buffer.seek(0)
+        buffer.truncate()
+    return records[0], records[1:]
+
+
+class Batch:
+    """A contiguous slice of rows [start, stop) and its estimated prompt token cost."""
+
+    def __init__(self, start, stop, tokens, budget, truncated=False):
+        self.start = start
+        self.stop = stop
+        self.tokens = int(tokens)
+        self.budget = budget
+        self.truncated = truncated  # Whether some of its rows have text cells truncated for the prompt
+
+    @property
+    def rows(self):
+        return self.stop - self.start
+
+    @property
+    def fill(self):
+        """Fraction of the token budget used by this batch."""
+        return self.tokens / self.budget
+
+    @property
+    def overflow(self):
+        return self.tokens > self.budget
+
+    def __repr__(self):
+        return f"Batch(rows={self.start}:{self.stop}, tokens={self.tokens}, fill={self.fill:.0%})"
+
+
+class BatchPlanner:
+    """Packs consecutive rows into batches up to a prompt token budget."""
+
+    def __init__(self, token_budget=DEFAULT_TOKEN_BUDGET, overhead_tokens=0, max_rows=None,
+                 truncate_oversized=True, render_rows=render_csv_rows):
+        self.token_budget = token_budget
+        self.overhead_tokens = overhead_tokens
+        self.max_rows = max_rows
+        self.truncate_oversized = truncate_oversized
+        self.render_rows = render_rows
+
+    def row_costs(self, df):
+        """Returns the fixed per-batch cost (overhead + header) and the token cost of every row."""
+        header, rows = self.render_rows(df)
+        # +1 per row for the newline separating it from the next one.
+        return self.overhead_tokens + estimate_tokens(header), estimate_tokens_many(rows) + 1
+
+    def plan(self, df):
+        """Returns (prompt df, batches); with truncate_oversized, oversized text cells are cut in the prompt df.
+
+        Truncation is meant for rendering prompts only: batches with Batch.truncated set must be merged
+        back onto the original rows, since the LLM never saw the cut text.
+        """
+        if df.empty:
+            return df, []
+
+        fixed_cost, costs = self.row_costs(df)
+        available = self.token_budget - fixed_cost
+        oversized = np.flatnonzero(costs > available)
+        truncated = np.zeros(len(costs), dtype=bool)
+        if len(oversized) and self.truncate_oversized and available > 0:
+            df = self._truncate_rows(df, oversized, costs[oversized] - available)
+            fixed_cost, costs = self.row_costs(df)
+            truncated[oversized] = True
+
+        batches = []
+        start, tokens = 0, fixed_cost
+        for position, cost in enumerate(costs.tolist()):
+            full = tokens + cost > self.token_budget or (self.max_rows and position - start >= self.max_rows)
+            if full and position > start:
+                batches.append(Batch(start, position, tokens, self.token_budget, bool(truncated[start:position].any())))
+                start, tokens = position, fixed_cost
+            tokens += cost
+        batches.append(Batch(start, len(costs), tokens, self.token_budget, bool(truncated[start:].any())))
+        return df, batches
+
+    def _truncate_rows(self, df, positions, excess_tokens):
+        """Shortens the longest text cell of each oversized row until the row fits the budget."""
+        df = df.copy()
+        text_columns = [df.columns.get_loc(col) for col in df.select_dtypes(include="object").columns]
+        for position, excess in zip(positions, excess_tokens):
+            cells = [(len(df.iat[position, col]), col) for col in text_columns if isinstance(df.iat[position, col], str)]
+            remaining = int(excess) * CHARS_PER_TOKEN
+            for length, col in sorted(cells, reverse=True):
+                if remaining <= 0:
+                    break
+                keep = max(0, length - remaining - 3)
+                df.iat[position, col] = df.iat[position, col][:keep] + "..."
+                remaining -= length - keep - 3
+        return df
+
+    @staticmethod
+    def summarize(batches):
+        """Returns batch count, total tokens and fill statistics for a plan."""
+        if not batches:
+            return {"batches": 0, "rows": 0, "tokens": 0, "mean_fill": 0.0, "min_fill": 0.0, "overflowing": 0}
+        fills = [batch.fill for batch in batches]
+        return {
+            "batches": len(batches),
+            "rows": sum(batch.rows for batch in batches),
+            "tokens": sum(batch.tokens for batch in batches),
+            "mean_fill": sum(fills) / len(fills),
+            "min_fill": min(fills),
+            "overflowing": sum(batch.overflow for batch in batches),
+        }
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+
+class CleaningEngine:
+    """Planned, vectorized replacement for DataCleaning.clean_data.
+
+    Column types are inferred once from a sample, then every column is coerced and imputed in a
+    single pass (so mean/median imputation sees numeric-looking text columns), the frame is built
+    once and duplicates are dropped. `clean` also returns a per-column report of what was done.
+    Given a source profile (profiles.FrameProfile), fill values come from its whole-source statistics.
+    An optional imputer (imputation.ImputationEngine) fills what it can from the coerced columns first.
+    """
+
+    def __init__(self, strategy="mean", sample_size=10_000, numeric_threshold=1.0, remove_duplicates=True,
+                 random_state=0, preserve_integers=False, imputer=None):
+        self.strategy = strategy  # mean, median, mode or drop, as in DataCleaning.handle_missing_values
+        self.sample_size = sample_size
+        self.numeric_threshold = numeric_threshold  # Share of non-null values that must parse as numbers
+        self.remove_duplicates = remove_duplicates
+        self.random_state = random_state
+        # Round mean/median fills of all-whole columns, so an int column with gaps stays integral
+        self.preserve_integers = preserve_integers
+        self.imputer = imputer
+
+    def infer_types(self, df):
+        """Returns {column: "numeric" | "text" | "other"} from a row sample."""
+        sample = df.sample(n=self.sample_size, random_state=self.random_state) if len(df) > self.sample_size else df
+        types = {}
+        for col in df.columns:
+            values = sample[col]
+            if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                types[col] = "numeric"
+            elif values.dtype == object:
+                present = values.dropna()
+                types[col] = "numeric" if len(present) and self._parses_as_numbers(present) else "text"
+            else:
+                types[col] = "other"
+        return types
+
+    def _parses_as_numbers(self, values, probe=100):
+        # Probe a prefix first so obviously textual columns are rejected without parsing the whole sample.
+        for candidate in (values.iloc[:probe], values):
+            if pd.to_numeric(candidate, errors="coerce").notna().mean() < self.numeric_threshold:
+                return False
+        return True
+
+    def clean(self, df, profile=None, source=None):
+        """Returns (cleaned DataFrame, per-column report DataFrame)."""
+        types = self.infer_types(df)
+        columns = {}
+        nulls = {}
+        report = []
+        for col in df.columns:
+            values = df[col]
+            nulls[col] = int(values.isna().sum())
+            entry = {"column": col, "inferred_type": types[col], "dtype_before": str(values.dtype),
+                     "coerced": False, "coercion_failures": 0, "nulls_before": nulls[col], "imputed": 0, "filled": 0,
+                     "fill_value": None}
+
+            if types[col] == "numeric" and not pd.api.types.is_numeric_dtype(values):
+                coerced = pd.to_numeric(values, errors="coerce")
+                failures = int(coerced.isna().sum()) - nulls[col]
+                # The sample can miss rare unparseable values; keep the column as text if they exceed the threshold.
+                if failures <= (1 - self.numeric_threshold) * (len(values) - nulls[col]):
+                    values = coerced
+                    nulls[col] += failures
+                    entry.update(coerced=True, coercion_failures=failures)
+                else:
+                    entry["inferred_type"] = "text"
+            columns[col] = values
+            report.append(entry)
+
+        if self.imputer is not None and self.strategy != "drop" and any(nulls.values()):
+            imputed = self.imputer.impute(pd.DataFrame(columns, index=df.index, copy=False), profile, source)
+            for entry in report:
+                col = entry["column"]
+                if imputed[col] is not columns[col]:
+                    remaining = int(imputed[col].isna().sum())
+                    entry["imputed"] = nulls[col] - remaining
+                    columns[col], nulls[col] = imputed[col], remaining
+
+        for entry in report:
+            col = entry["column"]
+            values = columns[col]
+            column = profile.column(col) if profile is not None else None
+            fill_value = self._fill_value(values, entry["inferred_type"], nulls[col], column)
+            if fill_value is not None:
+                entry["filled"] = nulls[col]
+                entry["fill_value"] = fill_value.item() if isinstance(fill_value, np.generic) else fill_value
+                values = values.fillna(fill_value)
+
+            entry["dtype_after"] = str(values.dtype)
+            columns[col] = values
+
+        cleaned = pd.DataFrame(columns, index=df.index, copy=False)
+        if self.strategy == "drop":
+            cleaned = cleaned.dropna()
+        if self.remove_duplicates:
+            duplicated = cleaned.duplicated()
+            if duplicated.any():
+                cleaned = cleaned[~duplicated]
+        return cleaned, pd.DataFrame(report).set_index("column")
+
+    def _fill_value(self, values, inferred_type, nulls, column=None):
+        if self.strategy == "drop" or nulls == 0 or nulls == len(values):
+            return None
+        # A profile is used only if it sees the column as this chunk does, e.g. not text where it is numeric here.
+        if column is not None and column.inferred_type != inferred_type:
+            column = None
+        if column is not None and self.strategy == "mode":
+            return column.fill_value("mode")
+        if inferred_type == "numeric" and self.strategy in ("mean", "median"):
+            if column is not None:
+                fill_value = column.fill_value(self.strategy)
+            else:
+                fill_value = values.mean() if self.strategy == "mean" else values.median()
+            if self.preserve_integers and self._is_integral(values):
+                fill_value = float(np.floor(fill_value + 0.5))
+            return fill_value
+        if self.strategy == "mode":
+            return values.mode(dropna=True).iloc[0]
+        return None
+
+    @staticmethod
+    def _is_integral(values):
+        if pd.api.types.is_integer_dtype(values):
+            return True
+        present = values.dropna()
+        return len(present) > 0 and bool((present % 1 == 0).all())
+
+    def clean_data(self, df, profile=None, source=None):
+        """Drop-in replacement for DataCleaning.clean_data that returns only the cleaned frame."""
+        return self.clean(df, profile, source)[0]
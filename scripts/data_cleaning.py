@@ -2,9 +2,23 @@ import pandas as pd
 import numpy as np
 
 class DataCleaning:
-    def handle_missing_values(self, df, strategy="mean"):
-        """Handles missing values by filling with mean, median, mode, or dropping."""
-        if strategy == "mean":
+    def __init__(self, imputer=None):
+        self.imputer = imputer  # Optional imputation.ImputationEngine that fills what it can before the strategy
+
+    def handle_missing_values(self, df, strategy="mean", profile=None, source=None):
+        """Handles missing values by filling with mean, median, mode, or dropping.
+
+        With a source profile (profiles.FrameProfile) the fill values come from it instead of df.
+        With an imputer, the nulls it can fill locally (group-wise, KNN or model-based, fitted once
+        per `source`) are filled first, and the strategy fills the rest.
+        """
+        if self.imputer is not None and strategy != "drop":
+            df = self.imputer.impute(df, profile, source)
+        if profile is not None and strategy in ("mean", "median", "mode"):
+            fill_values = self.profile_fill_values(df, strategy, profile)
+            if fill_values:
+                df.fillna(fill_values, inplace=True)
+        elif strategy == "mean":
             df.fillna(df.mean(numeric_only=True), inplace=True)
         elif strategy == "median":
             df.fillna(df.median(numeric_only=True), inplace=True)
@@ -14,6 +28,13 @@ class DataCleaning:
             df.dropna(inplace=True)
         return df
 
+    @staticmethod
+    def profile_fill_values(df, strategy, profile):
+        """Profile fill values for the columns of df that the same strategy would fill from df itself."""
+        if strategy == "mode":
+            return profile.fill_values(strategy, df.columns)
+        return profile.fill_values(strategy, df.select_dtypes(include="number").columns, numeric_only=True)
+
     def remove_duplicates(self, df):
         """Removes duplicate rows."""
         return df.drop_duplicates()
@@ -27,9 +48,9 @@ class DataCleaning:
                 pass
         return df
 
-    def clean_data(self, df):
+    def clean_data(self, df, profile=None, source=None):
         """Applies all cleaning steps."""
-        df = self.handle_missing_values(df)
+        df = self.handle_missing_values(df, profile=profile, source=source)
         df = self.remove_duplicates(df)
         df = self.fix_data_types(df)
         return df
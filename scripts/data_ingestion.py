@@ -1,20 +1,36 @@
 import os
 import pandas as pd
 import requests
-from sqlalchemy import create_engine
+from requests.adapters import HTTPAdapter
+from database import engines, read_sql_chunks, DEFAULT_SQL_CHUNK_ROWS
+from file_readers import FileReader
+from api_ingestion import (
+    DEFAULT_TIMEOUT_SECONDS,
+    ApiError,
+    HttpCache,
+    Paginator,
+    extract_records,
+    records_to_frame,
+)
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../data")
 
 class DataIngestion:
-    def __init__(self, db_url=None):
+    def __init__(self, db_url=None, file_reader=None):
         """Initialize data ingestion with an optional database connection."""
-        self.engine = create_engine(db_url) if db_url else None
+        self.engine = engines.get(db_url) if db_url else None
+        self.file_reader = file_reader or FileReader()
+        # Keep-alive connections and gzip are reused across API calls; pages are revalidated with ETags.
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=10, max_retries=3))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=10, max_retries=3))
+        self.http_cache = HttpCache()
 
     def load_csv(self, file_name):
         """Loads a CSV file into a DataFrame."""
         file_path = os.path.join(DATA_DIR, file_name)
         try:
-            df = pd.read_csv(file_path)
+            df = self.file_reader.read_csv(file_path)
             print(f"✅ CSV Loaded Successfully: {file_path}")
             return df
         except Exception as e:
@@ -25,46 +41,90 @@ class DataIngestion:
         """Loads an Excel file into a DataFrame."""
         file_path = os.path.join(DATA_DIR, file_name)
         try:
-            df = pd.read_excel(file_path, sheet_name=sheet_name)
+            df = self.file_reader.read_excel(file_path, sheet_name=sheet_name)
             print(f"✅ Excel Loaded Successfully: {file_path}")
             return df
         except Exception as e:
             print(f"❌ Error loading Excel: {e}")
             return None
 
+    def load_parquet(self, file_name):
+        """Loads a Parquet file into a DataFrame."""
+        return self._load_columnar(file_name, "parquet")
+
+    def load_feather(self, file_name):
+        """Loads a Feather (Arrow IPC) file into a DataFrame."""
+        return self._load_columnar(file_name, "feather")
+
+    def _load_columnar(self, file_name, fmt):
+        file_path = os.path.join(DATA_DIR, file_name)
+        try:
+            df = self.file_reader.read_columnar(file_path, fmt)
+            print(f"✅ {fmt.title()} Loaded Successfully: {file_path}")
+            return df
+        except Exception as e:
+            print(f"❌ Error loading {fmt.title()}: {e}")
+            return None
+
     def connect_database(self, db_url):
         """Establishes a database connection."""
         try:
-            self.engine = create_engine(db_url)
+            self.engine = engines.get(db_url)
             print("✅ Database Connection Successful")
         except Exception as e:
             print(f"❌ Error connecting to database: {e}")
 
-    def load_from_database(self, query):
-        """Fetches data from a database using SQL."""
+    def load_from_database(self, query, sync=None):
+        """Fetches data from a database using SQL.
+
+        With an IncrementalSync only new or changed rows are returned; pass them through sync.apply()
+        and call sync.commit() once they are stored, so the next call starts after them.
+        """
         if not self.engine:
             print("❌ No database connection. Call connect_database() first.")
             return None
         try:
-            df = pd.read_sql(query, self.engine)
+            chunks = sync.read_delta(self.engine, query) if sync is not None else read_sql_chunks(self.engine, query)
+            df = pd.concat(chunks, ignore_index=True)
             print("✅ Data Loaded from Database Successfully")
             return df
         except Exception as e:
             print(f"❌ Error loading data from database: {e}")
             return None
 
-    def fetch_from_api(self, api_url, params=None):
-        """Fetches data from an API and returns it as a DataFrame."""
+    def stream_from_database(self, query, chunksize=DEFAULT_SQL_CHUNK_ROWS):
+        """Yields DataFrames of at most chunksize rows from a server-side cursor."""
+        if not self.engine:
+            raise RuntimeError("No database connection. Call connect_database() first.")
+        return read_sql_chunks(self.engine, query, chunksize)
+
+    def _fetch_page(self, url, params, timeout):
+        key = HttpCache.key(url, params)
+        response = self.session.get(url, params=params, headers=self.http_cache.validators(key), timeout=timeout)
+        if response.status_code == 304 and (cached := self.http_cache.get(key)) is not None:
+            return cached
+        if response.status_code != 200:
+            raise ApiError(url, response.status_code)
+        payload = response.json()
+        links = {rel: link["url"] for rel, link in response.links.items()}
+        self.http_cache.set(key, response.headers, payload, links)
+        return payload, links
+
+    def fetch_from_api(self, api_url, params=None, paginator=None, records_path=None, timeout=DEFAULT_TIMEOUT_SECONDS,
+                       max_pages=None):
+        """Fetches data from an API, following pagination, and returns it as a DataFrame."""
+        paginator = paginator or Paginator()
         try:
-            response = requests.get(api_url, params=params)
-            if response.status_code == 200:
-                data = response.json()
-                df = pd.DataFrame(data)
-                print("✅ Data Fetched from API Successfully")
-                return df
-            else:
-                print(f"❌ API Request Failed: {response.status_code}")
-                return None
+            request = paginator.first_request(api_url, params)
+            frames = []
+            while request is not None and (max_pages is None or len(frames) < max_pages):
+                payload, links = self._fetch_page(*request, timeout)
+                records = extract_records(payload, records_path)
+                frames.append(records_to_frame(records))
+                request = paginator.next_request(request, payload, records, links)
+            df = pd.concat(frames, ignore_index=True)
+            print(f"✅ Data Fetched from API Successfully ({len(frames)} pages)")
+            return df
         except Exception as e:
             print(f"❌ Error fetching data from API: {e}")
             return None
@@ -0,0 +1,113 @@
+import threading
+
+import pandas as pd
+from sqlalchemy import MetaData, Table, create_engine, inspect, text, tuple_
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 5
+DEFAULT_POOL_TIMEOUT = 30  # Seconds to wait for a free connection before failing the request
+DEFAULT_POOL_RECYCLE = 1800  # Seconds after which a pooled connection is replaced
+DEFAULT_SQL_CHUNK_ROWS = 50_000
+UPSERT_KEY_BATCH = 500  # Keys per DELETE statement when replacing rows
+
+
+class EngineRegistry:
+    """One pooled SQLAlchemy engine per database URL, shared by every request that targets it.
+
+    Pools are bounded (pool_size + max_overflow connections per URL), so a burst of requests waits for
+    a free connection instead of opening a new one each time.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, max_overflow=DEFAULT_MAX_OVERFLOW,
+                 pool_timeout=DEFAULT_POOL_TIMEOUT, pool_recycle=DEFAULT_POOL_RECYCLE):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.pool_recycle = pool_recycle
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def get(self, db_url):
+        """Returns the engine for db_url, creating it on first use."""
+        key = make_url(db_url).render_as_string(hide_password=False)
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = self._engines[key] = self._create(db_url)
+            return engine
+
+    def _create(self, db_url):
+        engine = create_engine(db_url, pool_pre_ping=True)
+        if not isinstance(engine.pool, QueuePool):
+            # In-memory SQLite and similar dialects use single-connection pools with no size to bound.
+            return engine
+        engine.dispose()
+        return create_engine(
+            db_url,
+            pool_pre_ping=True,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_timeout=self.pool_timeout,
+            pool_recycle=self.pool_recycle,
+        )
+
+    def status(self):
+        """Returns {url: pool status string} with passwords masked."""
+        with self._lock:
+            return {engine.url.render_as_string(hide_password=True): engine.pool.status()
+                    for engine in self._engines.values()}
+
+    def dispose(self):
+        """Closes every pooled connection and forgets all engines."""
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+
+
+engines = EngineRegistry()
+
+
+def read_sql_chunks(engine, query, chunksize=DEFAULT_SQL_CHUNK_ROWS):
+    """Yields DataFrames of at most chunksize rows from a server-side cursor.
+
+    The connection is held until the generator is exhausted or closed, and only one chunk of rows
+    is buffered on the client at a time.
+    """
+    with engine.connect() as connection:
+        connection = connection.execution_options(stream_results=True, max_row_buffer=chunksize)
+        result = connection.execute(text(query) if isinstance(query, str) else query)
+        try:
+            columns = list(result.keys())
+            empty = True
+            for rows in result.partitions(chunksize):
+                empty = False
+                yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+            if empty:
+                yield pd.DataFrame(columns=columns)
+        finally:
+            result.close()
+
+
+def upsert_frame(engine, table_name, df, key_columns):
+    """Replaces the rows of table_name whose keys appear in df and inserts df, in one transaction.
+
+    Works on any dialect and needs no unique constraint; the table is created on first use.
+    """
+    if df.empty:
+        return 0
+    with engine.begin() as connection:
+        if inspect(connection).has_table(table_name):
+            table = Table(table_name, MetaData(), autoload_with=connection)
+            keys = list(df[key_columns].drop_duplicates().astype(object).itertuples(index=False, name=None))
+            for start in range(0, len(keys), UPSERT_KEY_BATCH):
+                batch = keys[start:start + UPSERT_KEY_BATCH]
+                if len(key_columns) == 1:
+                    condition = table.c[key_columns[0]].in_([key[0] for key in batch])
+                else:
+                    condition = tuple_(*(table.c[col] for col in key_columns)).in_(batch)
+                connection.execute(table.delete().where(condition))
+        df.to_sql(table_name, connection, if_exists="append", index=False)
+    return len(df)
@@ -0,0 +1,92 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+ID_COLUMN_NAME = re.compile(r"(^|_)(id|uuid|guid)$", re.IGNORECASE)
+
+
+class DeduplicationPlan:
+    """Remembers which unique row each original row maps to, so cleaned results can be fanned out."""
+
+    def __init__(self, codes, key_columns, index):
+        self.codes = codes
+        self.key_columns = key_columns
+        self.index = index
+
+    @property
+    def unique_count(self):
+        return int(self.codes.max()) + 1 if len(self.codes) else 0
+
+
+class RowDeduplicator:
+    """Collapses repeated rows before LLM dispatch and maps the cleaned rows back to every original index."""
+
+    def __init__(self, key_columns=None, normalize_text=False):
+        self.key_columns = key_columns
+        self.normalize_text = normalize_text
+
+    def resolve_key_columns(self, df):
+        """Returns the columns rows are compared on; by default every column except row identifiers.
+
+        Only identifier-like columns (see is_identifier) are left out automatically. Other columns
+        unique on every row, such as free text, stay keys, since columns left out bypass the LLM;
+        pass key_columns to compare rows on fewer columns.
+        """
+        if self.key_columns is not None:
+            return list(self.key_columns)
+        if len(df) < 2:
+            return list(df.columns)
+        keys = [col for col in df.columns if not self.is_identifier(df[col])]
+        return keys or list(df.columns)
+
+    @staticmethod
+    def is_identifier(values):
+        """Whether a column looks like a row id: unique on every row, and integer, monotonic or named like an id.
+
+        An id would make every row distinct, so it is passed through instead of compared.
+        """
+        if values.nunique(dropna=False) < len(values):
+            return False
+        name = str(values.name)
+        if ID_COLUMN_NAME.search(name) or name.endswith("Id"):
+            return True
+        if pd.api.types.is_bool_dtype(values):
+            return False
+        if pd.api.types.is_integer_dtype(values):
+            return True
+        ordered = pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values)
+        return ordered and (values.is_monotonic_increasing or values.is_monotonic_decreasing)
+
+    def _hash_rows(self, keys):
+        if self.normalize_text:
+            keys = keys.copy()
+            for col in keys.select_dtypes(include="object").columns:
+                keys[col] = keys[col].str.strip().str.casefold().fillna(keys[col])
+        return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+    def deduplicate(self, df):
+        """Returns the unique rows over the key columns and the plan needed to expand them again."""
+        key_columns = self.resolve_key_columns(df)
+        codes, _ = pd.factorize(self._hash_rows(df[key_columns]))
+        # factorize numbers codes in order of first appearance, so the first row of each code is its representative.
+        _, first_positions = np.unique(codes, return_index=True)
+        unique = df.iloc[first_positions][key_columns].reset_index(drop=True)
+        return unique, DeduplicationPlan(codes, key_columns, df.index)
+
+    def collapse(self, flags, plan):
+        """Per unique row, the key columns of a boolean frame aligned with the original rows, OR-ed over its copies."""
+        return flags[plan.key_columns].groupby(plan.codes).any().reset_index(drop=True)
+
+    def expand(self, cleaned_unique, plan, df):
+        """Fans cleaned unique rows back out to every original row, keeping non-key columns from df."""
+        if len(cleaned_unique) != plan.unique_count:
+            raise ValueError(
+                f"Expected {plan.unique_count} cleaned rows to expand, got {len(cleaned_unique)}."
+            )
+        expanded = cleaned_unique.iloc[plan.codes].set_axis(plan.index, axis=0)
+        passthrough = [col for col in df.columns if col not in plan.key_columns]
+        expanded = expanded.drop(columns=[col for col in passthrough if col in expanded.columns])
+        result = pd.concat([df[passthrough], expanded], axis=1)
+        ordered = [col for col in df.columns if col in result.columns]
+        return result[ordered + [col for col in result.columns if col not in ordered]]
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+
+class DirtyRowDetector:
+    """Flags rows that still need semantic (LLM) cleaning after rule-based cleaning, using vectorized checks.
+
+    Given a source profile (profiles.FrameProfile), numeric shares, distinct counts and category
+    frequencies come from the whole source, so a small chunk is judged like the data around it.
+    """
+
+    CHECKS = ("missing_text", "coercion_failure", "inconsistent_format", "out_of_vocabulary")
+
+    def __init__(self, numeric_share=0.8, category_share=0.05, rare_share=0.01, vocabularies=None):
+        self.numeric_share = numeric_share  # A text column this numeric is a failed numeric coercion
+        self.category_share = category_share  # Columns with at most this share of distinct values are categorical
+        self.rare_share = rare_share  # Categories rarer than this are treated as out of vocabulary
+        self.vocabularies = vocabularies or {}  # Optional {column: allowed values}, overrides rarity
+
+    def _text_columns(self, df):
+        # An all-null column parses as float, but in a small chunk it is usually a text column with gaps.
+        return [col for col in df.columns if df[col].isna().all() or (
+            not pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_datetime64_any_dtype(df[col]))]
+
+    def _checks(self, df, profile=None):
+        """Yields (column, check, flags) for every check that applies to a text column; flags is a row mask."""
+        for col in self._text_columns(df):
+            values = df[col]
+            column = profile.column(col) if profile is not None else None
+            present = values.notna().to_numpy()
+            yield col, "missing_text", ~present
+            if not present.any():
+                continue
+
+            positions = np.flatnonzero(present)
+            text = values[present].astype(str)
+            numbers = pd.to_numeric(text, errors="coerce")
+            share = column.numeric_share if column is not None else numbers.notna().mean()
+            if share >= self.numeric_share:
+                yield col, "coercion_failure", self._spread(positions, numbers.isna(), len(df))
+                continue
+
+            yield col, "inconsistent_format", self._spread(positions, self._inconsistent(text), len(df))
+            out_of_vocabulary = self._out_of_vocabulary(col, text, len(df), column, profile and profile.rows)
+            yield col, "out_of_vocabulary", self._spread(positions, out_of_vocabulary, len(df))
+
+    @staticmethod
+    def _spread(positions, flags, rows):
+        full = np.zeros(rows, dtype=bool)
+        full[positions] = flags.to_numpy()
+        return full
+
+    def detect(self, df, profile=None):
+        """Returns a boolean frame with one column per check and one row per row of df."""
+        flags = {check: np.zeros(len(df), dtype=bool) for check in self.CHECKS}
+        for _, check, rows in self._checks(df, profile):
+            flags[check] |= rows
+        return pd.DataFrame(flags, index=df.index, columns=list(self.CHECKS))
+
+    def cells(self, df, profile=None):
+        """Returns a boolean frame shaped like df: True for every cell a check flags."""
+        flags = np.zeros(df.shape, dtype=bool)
+        positions = {col: position for position, col in enumerate(df.columns)}
+        for col, _, rows in self._checks(df, profile):
+            flags[:, positions[col]] |= rows
+        return pd.DataFrame(flags, index=df.index, columns=df.columns)
+
+    def mask(self, df, profile=None):
+        """Returns True for every row that should be sent to the LLM."""
+        return self.detect(df, profile).any(axis=1)
+
+    @staticmethod
+    def _inconsistent(text):
+        """Values with stray whitespace, or cased differently from the most common spelling of the same value."""
+        stripped = text.str.strip()
+        padded = (text != stripped) | stripped.str.contains(r"\s{2,}", regex=True)
+        key = stripped.str.casefold()
+        counts = pd.DataFrame({"key": key, "value": stripped}).value_counts()
+        canonical = counts.reset_index().drop_duplicates("key").set_index("key")["value"]
+        return padded | (stripped != key.map(canonical))
+
+    def _out_of_vocabulary(self, col, text, rows, column=None, source_rows=None):
+        if col in self.vocabularies:
+            return ~text.isin(self.vocabularies[col])
+        if column is not None and column.heavy_hitters.complete:
+            # Every distinct value of the source is counted, so its counts replace the chunk's.
+            counts = pd.Series({str(value): count for value, count in column.heavy_hitters.counts.items()},
+                               dtype="int64").groupby(level=0).sum()
+            rows = source_rows
+        else:
+            counts = text.value_counts()
+        if len(counts) > max(1, rows * self.category_share):
+            return pd.Series(False, index=text.index)
+        common = counts.index[counts >= np.ceil(rows * self.rare_share)]
+        return ~text.isin(common)
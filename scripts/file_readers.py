@@ -0,0 +1,250 @@
+import os
+
+import pandas as pd
+
+from streaming import DEFAULT_CHUNK_ROWS
+
+FILE_FORMATS = ("csv", "xlsx", "parquet", "feather")
+EXTENSIONS = {"csv": "csv", "xlsx": "xlsx", "parquet": "parquet", "pq": "parquet", "feather": "feather",
+              "arrow": "feather"}
+DEFAULT_CATEGORY_RATIO = 0.5  # Text columns with at most this share of distinct values become categoricals
+CATEGORY_SAMPLE_ROWS = 100_000  # Rows the pandas engine looks at to decide whether to dictionary-encode
+
+
+def file_format(file_name):
+    """Returns the file format for a file name from its extension, or None if it is not supported."""
+    return EXTENSIONS.get(os.path.splitext(file_name)[1].lstrip(".").lower())
+
+
+def encode_categories(df, ratio=DEFAULT_CATEGORY_RATIO):
+    """Converts low-cardinality text columns of df to categoricals in place and returns df."""
+    for col in df.columns:
+        values = df[col]
+        if not pd.api.types.is_string_dtype(values.dtype) or not len(values):
+            continue
+        sample = values.iloc[:CATEGORY_SAMPLE_ROWS]
+        if sample.nunique() <= ratio * len(sample):
+            df[col] = values.astype("category")
+    return df
+
+
+def _arrow_types(arrow_type):
+    import pyarrow as pa
+
+    # Dictionary columns keep the default conversion to pandas categoricals.
+    return None if pa.types.is_dictionary(arrow_type) else pd.ArrowDtype(arrow_type)
+
+
+def _infer_column(column):
+    """Casts a string column to int64, float64 or bool when every value parses, as pandas chunks would."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    for arrow_type in (pa.int64(), pa.float64(), pa.bool_()):
+        try:
+            return pc.cast(column, arrow_type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+    return column
+
+
+def _rebatch(batches, chunksize):
+    """Groups an iterator of record batches into tables of chunksize rows (the last may be shorter)."""
+    import pyarrow as pa
+
+    pending, rows = [], 0
+    for batch in batches:
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunksize:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunksize)
+            rest = table.slice(chunksize)
+            pending, rows = rest.to_batches(), rest.num_rows
+    if rows:
+        yield pa.Table.from_batches(pending)
+
+
+class FileReader:
+    """Reads CSV, Excel, Parquet and Feather files or uploads into DataFrames, whole or in chunks.
+
+    The arrow engine parses CSV with pyarrow's multi-threaded reader, streams Excel sheets row by
+    row through openpyxl's read-only mode and reads Parquet/Feather natively. Low-cardinality text
+    columns (city, status, ...) are dictionary-encoded into categoricals, and dtype_backend="pyarrow"
+    keeps the other columns Arrow-backed instead of converting them to NumPy/object columns.
+    Dates stay text, as with pandas' own readers. The pandas engine uses pandas' parsers instead.
+    """
+
+    def __init__(self, engine="arrow", dtype_backend="numpy", category_ratio=DEFAULT_CATEGORY_RATIO):
+        if engine not in ("arrow", "pandas"):
+            raise ValueError(f"Unknown file reader engine {engine!r}. Choose arrow or pandas.")
+        if dtype_backend not in ("numpy", "pyarrow"):
+            raise ValueError(f"Unknown dtype backend {dtype_backend!r}. Choose numpy or pyarrow.")
+        self.engine = engine
+        self.dtype_backend = dtype_backend
+        self.category_ratio = category_ratio  # None disables dictionary encoding
+
+    def read(self, source, fmt):
+        """Reads a whole file (a path or a binary file object) in the given format."""
+        if fmt == "csv":
+            return self.read_csv(source)
+        if fmt == "xlsx":
+            return self.read_excel(source)
+        if fmt in ("parquet", "feather"):
+            return self.read_columnar(source, fmt)
+        raise ValueError(f"Unsupported file format {fmt!r}. Use one of {', '.join(FILE_FORMATS)}.")
+
+    def iter_chunks(self, source, fmt, chunksize=DEFAULT_CHUNK_ROWS):
+        """Returns an iterator of DataFrames of at most chunksize rows, reading the file as it goes."""
+        if fmt == "csv":
+            return self.iter_csv_chunks(source, chunksize)
+        if fmt == "xlsx":
+            return self.iter_excel_chunks(source, chunksize=chunksize)
+        if fmt in ("parquet", "feather"):
+            return self.iter_columnar_chunks(source, fmt, chunksize)
+        raise ValueError(f"Unsupported file format {fmt!r}. Use one of {', '.join(FILE_FORMATS)}.")
+
+    # ------------------------ Conversion ------------------------
+
+    def to_frame(self, table, dates_as_text=False):
+        """Converts an Arrow table, dictionary-encoding low-cardinality string columns first."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        for i, field in enumerate(table.schema):
+            column = table.column(i)
+            if dates_as_text and pa.types.is_date(field.type):
+                column = pc.cast(column, pa.string())
+            if (self.category_ratio is not None and table.num_rows
+                    and (pa.types.is_string(column.type) or pa.types.is_large_string(column.type))
+                    and pc.count_distinct(column).as_py() <= self.category_ratio * table.num_rows):
+                column = pc.dictionary_encode(column)
+            if column is not table.column(i):
+                table = table.set_column(i, field.name, column)
+        # Release each Arrow column as soon as it is converted, so the table and frame never both fully exist.
+        options = {"split_blocks": True, "self_destruct": True}
+        if self.dtype_backend == "pyarrow":
+            return table.to_pandas(types_mapper=_arrow_types, **options)
+        return table.to_pandas(**options)
+
+    def _finish(self, df):
+        return encode_categories(df, self.category_ratio) if self.category_ratio is not None else df
+
+    # ------------------------ CSV ------------------------
+
+    def read_csv(self, source):
+        if self.engine == "pandas":
+            return self._finish(pd.read_csv(source, **self._pandas_options()))
+        import pyarrow.csv as pa_csv
+
+        table = pa_csv.read_csv(
+            source,
+            read_options=pa_csv.ReadOptions(use_threads=True),
+            # ISO dates are turned back into text below; other timestamps are never inferred.
+            convert_options=pa_csv.ConvertOptions(strings_can_be_null=True, timestamp_parsers=[]),
+        )
+        return self.to_frame(table, dates_as_text=True)
+
+    def iter_csv_chunks(self, source, chunksize=DEFAULT_CHUNK_ROWS):
+        if self.engine == "pandas":
+            for chunk in pd.read_csv(source, chunksize=chunksize, **self._pandas_options()):
+                yield self._finish(chunk)
+            return
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+
+        # The streaming reader fixes column types from the first block and fails on a later value that
+        # does not fit, so every column is read as text and typed chunk by chunk instead.
+        header = pa_csv.open_csv(source, read_options=pa_csv.ReadOptions(block_size=1 << 16)).schema.names
+        if hasattr(source, "seek"):
+            source.seek(0)
+        reader = pa_csv.open_csv(
+            source,
+            read_options=pa_csv.ReadOptions(use_threads=True),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={name: pa.string() for name in header}, strings_can_be_null=True
+            ),
+        )
+        for table in _rebatch(reader, chunksize):
+            columns = [_infer_column(table.column(i)) for i in range(table.num_columns)]
+            yield self.to_frame(pa.Table.from_arrays(columns, names=table.column_names))
+
+    def _pandas_options(self):
+        return {"dtype_backend": "pyarrow"} if self.dtype_backend == "pyarrow" else {}
+
+    # ------------------------ Excel ------------------------
+
+    def read_excel(self, source, sheet_name=0):
+        if self.engine == "pandas":
+            return self._finish(pd.read_excel(source, sheet_name=sheet_name, **self._pandas_options()))
+        chunks = list(self.iter_excel_chunks(source, sheet_name))
+        if len(chunks) == 1:
+            return chunks[0]
+        return self._finish(pd.concat(
+            [chunk.astype({col: object for col in chunk.select_dtypes("category")}) for chunk in chunks],
+            ignore_index=True,
+        ))
+
+    def iter_excel_chunks(self, source, sheet_name=0, chunksize=DEFAULT_CHUNK_ROWS):
+        """Streams a sheet row by row with openpyxl's read-only mode; the sheet is never held in memory."""
+        if self.engine == "pandas":
+            df = self.read_excel(source, sheet_name)
+            for start in range(0, max(len(df), 1), chunksize):
+                yield df.iloc[start:start + chunksize]
+            return
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name]
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                yield pd.DataFrame()
+                return
+            header = [f"Unnamed: {i}" if name is None else name for i, name in enumerate(header)]
+            chunk, emitted = [], False
+            for row in rows:
+                if all(value is None for value in row):
+                    continue  # Blank rows, which read-only sheets also report past the last used row
+                chunk.append(row)
+                if len(chunk) == chunksize:
+                    yield self._excel_frame(chunk, header)
+                    chunk, emitted = [], True
+            if chunk or not emitted:
+                yield self._excel_frame(chunk, header)
+        finally:
+            workbook.close()
+
+    def _excel_frame(self, rows, header):
+        df = pd.DataFrame.from_records(rows, columns=header, coerce_float=True).infer_objects()
+        if self.dtype_backend == "pyarrow":
+            df = df.convert_dtypes(dtype_backend="pyarrow", convert_integer=False)  # Whole floats stay floats
+            df = df.astype({col: "int64[pyarrow]" for col in df.select_dtypes("integer").columns})
+        return self._finish(df)
+
+    # ------------------------ Parquet / Feather ------------------------
+
+    def read_columnar(self, source, fmt):
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            table = pq.read_table(source)
+        else:
+            import pyarrow.feather as feather
+
+            table = feather.read_table(source, memory_map=isinstance(source, str))
+        return self.to_frame(table)
+
+    def iter_columnar_chunks(self, source, fmt, chunksize=DEFAULT_CHUNK_ROWS):
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            batches = pq.ParquetFile(source).iter_batches(batch_size=chunksize)
+        else:
+            import pyarrow as pa
+
+            reader = pa.ipc.open_file(pa.memory_map(source) if isinstance(source, str) else source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        for table in _rebatch(batches, chunksize):
+            yield self.to_frame(table)
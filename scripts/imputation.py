@@ -0,0 +1,389 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from metrics import NULL_METRICS
+
+DEFAULT_IMPUTER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../.cache/imputers.sqlite")
+IMPUTATION_STRATEGIES = ("auto", "mean", "median", "mode", "group", "knn", "iterative")
+DEFAULT_SAMPLE_ROWS = 20_000  # Rows strategies are chosen and models fitted on
+DEFAULT_MAX_GROUPS = 100  # Columns with more distinct values are not used to group by
+DEFAULT_MIN_GAIN = 0.2  # Share of the global fill's error a group or model must remove to be chosen
+DEFAULT_NEIGHBORS = 5
+DEFAULT_KNN_ROWS = 2_000  # Rows KNN imputation is fitted on; each imputed row is compared with all of them
+
+
+class ImputerStore:
+    """Fitted imputation models by key, pickled into SQLite with an in-memory copy."""
+
+    def __init__(self, path=DEFAULT_IMPUTER_PATH, ttl_seconds=None):
+        self.ttl_seconds = ttl_seconds  # Models older than this are refitted; None keeps them until replaced
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS imputers ("
+                "key TEXT PRIMARY KEY, model BLOB NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _fresh(self, updated_at):
+        return self.ttl_seconds is None or time.time() - updated_at <= self.ttl_seconds
+
+    def get(self, key):
+        """Returns the stored model for key, or None if there is none or it is too old."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute("SELECT model, updated_at FROM imputers WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = self._memory[key] = (pickle.loads(row[0]), row[1])
+            if entry is None or not self._fresh(entry[1]):
+                return None
+            return entry[0]
+
+    def set(self, key, model):
+        now = time.time()
+        with self._lock:
+            self._memory[key] = (model, now)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO imputers (key, model, updated_at) VALUES (?, ?, ?)",
+                        (key, pickle.dumps(model), now),
+                    )
+
+
+class ImputationModel:
+    """Fitted per-column imputation plans, applied to any frame with the same columns.
+
+    `plans` maps a column to {"strategy", "value"} for global fills, plus {"by", "values"} for
+    group-wise fills ("value" then fills unseen groups). Columns planned for "knn" or "iterative"
+    share one scikit-learn imputer per strategy over the numeric `features`, kept in `models`.
+    `columns` are the columns a plan was chosen for, including those no strategy could plan.
+    """
+
+    def __init__(self, plans=None, models=None, columns=None):
+        self.plans = plans or {}
+        self.models = models or {}  # {strategy: (features, targets, fitted imputer, feature means, feature scales)}
+        self.columns = set(columns or ()) | set(self.plans)
+
+    def unplanned(self, df):
+        """Columns of df with nulls that no plan was chosen for, e.g. because the fitted chunk had none."""
+        return [col for col in df.columns if col not in self.columns and df[col].isna().any()]
+
+    def transform(self, df):
+        """Returns (df with planned nulls filled, {strategy: values filled})."""
+        result = df.copy(deep=False)
+        filled = {}
+        for strategy, (features, targets, imputer, center, scale) in self.models.items():
+            targets = [col for col in targets if col in df.columns and df[col].isna().any()]
+            if not targets or not set(features) <= set(df.columns):
+                continue
+            rows = np.flatnonzero(df[targets].isna().any(axis=1).to_numpy())
+            matrix = df[features].iloc[rows].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+            predicted = imputer.transform((matrix - center) / scale) * scale + center
+            for col in targets:
+                missing = df[col].isna().to_numpy()[rows]
+                count = self._fill(result, col, rows[missing], predicted[missing, features.index(col)])
+                filled[strategy] = filled.get(strategy, 0) + count
+
+        for col, plan in self.plans.items():
+            if col not in df.columns or plan["strategy"] in self.models:
+                continue
+            positions = np.flatnonzero(result[col].isna().to_numpy())
+            if not len(positions):
+                continue
+            fills = pd.Series(plan["value"], index=positions, dtype=object)
+            if plan["strategy"] == "group":
+                grouped = df[plan["by"]].iloc[positions].astype(object).map(plan["values"])
+                fills = fills.where(grouped.isna().to_numpy(), grouped.to_numpy())
+            count = self._fill(result, col, positions, fills.to_numpy())
+            filled[plan["strategy"]] = filled.get(plan["strategy"], 0) + count
+        return result, filled
+
+    def _fill(self, result, col, positions, fills):
+        """Sets result[col] at positions to fills (skipping nulls), keeping categoricals and whole numbers intact."""
+        values = result[col]
+        fills = pd.Series(fills, dtype=object)
+        present = fills.notna().to_numpy()
+        positions, fills = positions[present], fills[present]
+        if not len(positions):
+            return 0
+        if pd.api.types.is_numeric_dtype(values):
+            fills = pd.to_numeric(fills, errors="coerce")
+            if self.plans.get(col, {}).get("integral") or pd.api.types.is_integer_dtype(values):
+                fills = fills.round()
+            if pd.api.types.is_float_dtype(values):
+                fills = fills.astype(values.dtype)
+            values = values.copy()
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            new = pd.Index(fills.unique()).difference(values.cat.categories)
+            values = values.cat.add_categories(new) if len(new) else values.copy()
+        else:
+            values = values.copy()
+        values.iloc[positions] = fills.to_numpy()
+        result[col] = values
+        return len(positions)
+
+
+class ImputationEngine:
+    """Fills nulls locally, choosing a strategy per column, so only what no local model can fill reaches the LLM.
+
+    "auto" tries, on a row sample, a group-wise fill by each low-cardinality column (mean or median
+    for numbers, the most common value for text) and, for numbers, a linear model on the other
+    numeric columns, and keeps the one that removes at least `min_gain` of the global fill's error;
+    "iterative" (scikit-learn IterativeImputer) stands in for the linear model when it wins. Numbers
+    otherwise get the global mean (median when skewed) and text is left alone. A source profile
+    (profiles.FrameProfile) supplies the global fills, the distinct counts and which columns have
+    nulls anywhere in the source. `strategies` forces a strategy per column; "knn" and "iterative"
+    apply to numeric columns only. Fitted models are stored per source and reused across chunks
+    and runs. With preserve_integers, fills of columns holding only whole numbers are rounded.
+    """
+
+    def __init__(self, strategy="auto", strategies=None, group_by=None, store=None, sample_rows=DEFAULT_SAMPLE_ROWS,
+                 max_groups=DEFAULT_MAX_GROUPS, min_gain=DEFAULT_MIN_GAIN, neighbors=DEFAULT_NEIGHBORS,
+                 knn_rows=DEFAULT_KNN_ROWS, random_state=0, metrics=None, preserve_integers=False):
+        for name in [strategy, *(strategies or {}).values()]:
+            if name not in IMPUTATION_STRATEGIES:
+                raise ValueError(
+                    f"Imputation strategy must be one of {', '.join(IMPUTATION_STRATEGIES)}, not {name!r}.")
+        self.strategy = strategy
+        self.strategies = strategies or {}  # Optional {column: strategy}, overriding `strategy`
+        self.group_by = group_by or {}  # Optional {column: column to group by} for "group"
+        self.store = store or ImputerStore(None)
+        self.sample_rows = sample_rows
+        self.max_groups = max_groups
+        self.min_gain = min_gain
+        self.neighbors = neighbors
+        self.knn_rows = knn_rows
+        self.random_state = random_state
+        self.metrics = metrics or NULL_METRICS
+        self.preserve_integers = preserve_integers
+        self._lock = threading.Lock()
+
+    def impute(self, df, profile=None, source=None):
+        """Returns df with the nulls local models can fill filled; the rest are left for later stages."""
+        if not len(df) or not df.isna().to_numpy().any():
+            return df
+        imputed, filled = self.model(df, profile, source).transform(df)
+        for strategy, count in filled.items():
+            self.metrics.inc("imputed_values_total", count, strategy=strategy)
+        if filled:
+            print(f"🧮 Imputed {sum(filled.values())} values locally "
+                  f"({', '.join(f'{count} {strategy}' for strategy, count in sorted(filled.items()))})")
+        return imputed
+
+    def model_key(self, df, source):
+        settings = [source, [str(col) for col in df.columns], self.strategy, self.strategies, self.group_by,
+                    self.preserve_integers]
+        return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def model(self, df, profile=None, source=None):
+        """The fitted model for a source (fitted on df on first use), or a fresh fit on df without a source.
+
+        A stored model that has no plan for a column df has nulls in (the chunk it was fitted on had
+        none there) is refitted on df for its columns plus the new ones, and replaces the stored one.
+        """
+        if source is None:
+            return self.fit(df, profile)
+        key = self.model_key(df, source)
+        model = self.store.get(key)
+        if model is None or model.unplanned(df):
+            with self._lock:
+                model = self.store.get(key)
+                if model is None:
+                    model = self.fit(df, profile)
+                    self.store.set(key, model)
+                elif unplanned := model.unplanned(df):
+                    model = self.fit(df, profile, columns=model.columns | set(unplanned))
+                    self.store.set(key, model)
+        return model
+
+    def fit(self, df, profile=None, columns=()):
+        """Chooses and fits a plan for every column of df that has (or, per the profile, may have) nulls.
+
+        `columns` are planned even when they have no nulls in df.
+        """
+        sample = df.sample(n=self.sample_rows, random_state=self.random_state) if len(df) > self.sample_rows else df
+        numeric = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])
+                   and not pd.api.types.is_bool_dtype(df[col])]
+        groups = [col for col in df.columns if self._groupable(df[col], sample[col], profile)]
+        # Row identifiers say nothing about other columns (and would dominate KNN distances)
+        features = [col for col in numeric if sample[col].nunique() < len(sample)] if len(sample) > 1 else numeric
+
+        plans, model_targets, examined = {}, {}, []
+        for col in df.columns:
+            column = profile.column(col) if profile is not None else None
+            if (column.nulls if column is not None else 0) == 0 and not df[col].isna().any() and col not in columns:
+                continue
+            examined.append(col)
+            is_numeric = col in numeric
+            if not is_numeric and df[col].dtype != object and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                continue
+            strategy = self.strategies.get(col, self.strategy)
+            if strategy in ("knn", "iterative") and not is_numeric:
+                strategy = "auto"
+            if strategy == "auto":
+                strategy, by = self._choose(sample, col, is_numeric, [g for g in groups if g != col],
+                                            [n for n in features if n != col], column)
+            elif strategy == "group":
+                by = self.group_by.get(col) or self._best_group(sample, col, is_numeric, groups)[0]
+                if by is None:
+                    strategy = "mean" if is_numeric else "mode"
+            else:
+                by = None
+            plan = self._plan(df, col, strategy, by, is_numeric, column)
+            if plan is not None:
+                plans[col] = plan
+                if strategy in ("knn", "iterative"):
+                    model_targets.setdefault(strategy, []).append(col)
+
+        models = {}
+        for strategy, targets in model_targets.items():
+            models[strategy] = self._fit_model(strategy, sample, features + [t for t in targets if t not in features],
+                                               targets)
+            fitted = models[strategy][1] if models[strategy] is not None else []
+            for col in targets:
+                if col not in fitted:  # Nothing to learn from; fall back to the global fill
+                    plans[col] = self._plan(df, col, "mean", None, True, None)
+        return ImputationModel(plans, {strategy: model for strategy, model in models.items() if model is not None},
+                               examined)
+
+    def _groupable(self, values, sample_values, profile):
+        if pd.api.types.is_float_dtype(values) or pd.api.types.is_bool_dtype(values):
+            return False
+        column = profile.column(values.name) if profile is not None else None
+        distinct = column.distinct.estimate() if column is not None else sample_values.nunique()
+        return 1 < distinct <= self.max_groups
+
+    def _choose(self, sample, col, is_numeric, groups, numeric, column):
+        """Returns (strategy, group column) for "auto"."""
+        by, gain = self._best_group(sample, col, is_numeric, groups)
+        if is_numeric and len(numeric) > 0:
+            if self._linear_gain(sample, col, numeric) > max(gain, self.min_gain):
+                return "iterative", None
+        if gain >= self.min_gain:
+            return "group", by
+        if not is_numeric:
+            return None, None
+        values = pd.to_numeric(sample[col], errors="coerce").dropna()
+        mean = column.mean if column is not None and column.numeric_count else values.mean()
+        median = column.median if column is not None and column.numeric_count else values.median()
+        skewed = len(values) > 1 and abs(mean - median) > 0.25 * values.std()
+        return ("median" if skewed else "mean"), None
+
+    def _best_group(self, sample, col, is_numeric, groups):
+        """The group column that removes the largest share of a global fill's error, with that share."""
+        best, best_gain = None, 0.0
+        target = sample[col]
+        for by in groups:
+            if by == col:
+                continue
+            known = target.notna() & sample[by].notna()
+            if known.sum() < 10:
+                continue
+            y, keys = target[known], sample[by][known].astype(object)
+            if is_numeric:
+                y = y.astype(float)
+                total = ((y - y.mean()) ** 2).sum()
+                within = ((y - y.groupby(keys).transform("mean")) ** 2).sum()
+                groups_seen = keys.nunique()
+                # Adjusted for the number of groups, so many tiny groups do not look predictive
+                gain = 1 - (within / max(len(y) - groups_seen, 1)) / (total / max(len(y) - 1, 1)) if total else 0.0
+            else:
+                pairs = pd.DataFrame({"by": keys, "y": y.astype(object)}).value_counts()
+                hits = pairs.groupby(level=0).max().sum()
+                baseline = y.value_counts().iloc[0]
+                gain = (hits - baseline) / (len(y) - baseline) if len(y) > baseline else 0.0
+            if gain > best_gain:
+                best, best_gain = by, gain
+        return best, best_gain
+
+    @staticmethod
+    def _linear_gain(sample, col, numeric):
+        """R² of a least-squares fit of col on the other numeric columns, over rows where all are present."""
+        frame = sample[[col, *numeric]].apply(pd.to_numeric, errors="coerce").dropna()
+        if len(frame) < 10 * (len(numeric) + 1):
+            return 0.0
+        y = frame[col].to_numpy(dtype=float)
+        x = np.column_stack([np.ones(len(frame)), frame[numeric].to_numpy(dtype=float)])
+        coefficients, *_ = np.linalg.lstsq(x, y, rcond=None)
+        total = ((y - y.mean()) ** 2).sum()
+        return 1 - ((y - x @ coefficients) ** 2).sum() / total if total else 0.0
+
+    def _plan(self, df, col, strategy, by, is_numeric, column):
+        if strategy is None:
+            return None
+        values = pd.to_numeric(df[col], errors="coerce") if is_numeric else df[col]
+        present = values.dropna()
+        if not len(present):
+            return None
+        if not is_numeric and strategy in ("mean", "median"):
+            strategy = "mode"
+        plan = {"strategy": strategy,
+                "integral": bool(self.preserve_integers and is_numeric and (present % 1 == 0).all())}
+        global_strategy = "mode" if not is_numeric or strategy == "mode" else (
+            "median" if strategy == "median" else "mean")
+        if column is not None and column.count > column.nulls:
+            plan["value"] = column.fill_value(global_strategy)
+        elif global_strategy == "mode":
+            plan["value"] = present.mode().iloc[0]
+        else:
+            plan["value"] = present.mean() if global_strategy == "mean" else present.median()
+        if isinstance(plan["value"], np.generic):
+            plan["value"] = plan["value"].item()
+        if strategy == "group":
+            plan["by"] = by
+            keys = df[by][values.notna()].astype(object)
+            if is_numeric:
+                fills = present.groupby(keys).median() if global_strategy == "median" else present.groupby(keys).mean()
+            else:
+                pairs = pd.DataFrame({"by": keys, "y": present.astype(object)}).value_counts()
+                fills = pairs.reset_index().drop_duplicates("by").set_index("by")["y"]
+            plan["values"] = {key: value.item() if isinstance(value, np.generic) else value
+                              for key, value in fills.items()}
+        return plan
+
+    def _fit_model(self, strategy, sample, features, targets):
+        """Fits one scikit-learn imputer over the feature columns, on standardized values.
+
+        Returns None when fewer than two features have values in the sample.
+        """
+        from sklearn.exceptions import ConvergenceWarning
+        from sklearn.experimental import enable_iterative_imputer  # noqa: F401
+        from sklearn.impute import IterativeImputer, KNNImputer
+
+        matrix = sample[features].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        observed = ~np.isnan(matrix).all(axis=0)
+        features = [col for col, seen in zip(features, observed) if seen]
+        targets = [col for col in targets if col in features]
+        if len(features) < 2 or not targets:
+            return None
+        matrix = matrix[:, observed]
+        if strategy == "knn" and len(matrix) > self.knn_rows:
+            # KNN compares every row to impute with every fitted row, so it is fitted on a smaller sample.
+            matrix = matrix[np.random.default_rng(self.random_state).choice(len(matrix), self.knn_rows, replace=False)]
+        center = np.nanmean(matrix, axis=0)
+        scale = np.nanstd(matrix, axis=0)
+        scale[~(scale > 0)] = 1.0
+        if strategy == "knn":
+            imputer = KNNImputer(n_neighbors=self.neighbors)
+        else:
+            imputer = IterativeImputer(max_iter=10, random_state=self.random_state)
+        with warnings.catch_warnings():
+            # Not converging within max_iter still leaves a usable model
+            warnings.simplefilter("ignore", category=ConvergenceWarning)
+            imputer.fit((matrix - center) / scale)
+        return features, targets, imputer, center, scale
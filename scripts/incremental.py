@@ -0,0 +1,339 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from data_cleaning import DataCleaning
+from database import DEFAULT_SQL_CHUNK_ROWS, read_sql_chunks, upsert_frame
+from streaming import aiter_chunks
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../.cache/incremental_state.sqlite")
+KEY_LOOKUP_BATCH = 500  # Keys per state lookup query, below SQLite's bound-parameter limit
+
+
+def _json_value(value):
+    """Plain, JSON-serializable form of a cell; nulls become None and whole floats become ints.
+
+    Used for keys, content hashes and stored row values, so a value hashes the same whether its
+    chunk happened to load the column as int, float or object.
+    """
+    if value is None or (np.ndim(value) == 0 and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _records(df):
+    return [[_json_value(value) for value in row] for row in df.itertuples(index=False, name=None)]
+
+
+class IncrementalState:
+    """SQLite store of per-sync watermarks, imputation statistics and per-row content hashes."""
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._running = set()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS syncs ("
+            "name TEXT PRIMARY KEY, watermark TEXT, stats TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            "name TEXT NOT NULL, key TEXT NOT NULL, hash TEXT NOT NULL, data TEXT NOT NULL, PRIMARY KEY (name, key))"
+        )
+        self._conn.commit()
+
+    def load(self, name):
+        """Returns (watermark, stats dict) for a sync, or (None, None) if it never ran."""
+        with self._lock:
+            row = self._conn.execute("SELECT watermark, stats FROM syncs WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None, None
+        return json.loads(row[0]), json.loads(row[1])
+
+    def rows(self, name, keys):
+        """Returns {key: (hash, values)} for the keys that were committed before."""
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            for start in range(0, len(keys), KEY_LOOKUP_BATCH):
+                batch = keys[start:start + KEY_LOOKUP_BATCH]
+                cursor = self._conn.execute(
+                    f"SELECT key, hash, data FROM rows WHERE name = ? AND key IN ({','.join('?' * len(batch))})",
+                    (name, *batch),
+                )
+                found.update((key, (row_hash, json.loads(data))) for key, row_hash, data in cursor)
+        return found
+
+    def save(self, name, watermark, stats, rows):
+        """Stores the sync's watermark and statistics and upserts (key, hash, values) rows, atomically."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO syncs (name, watermark, stats, updated_at) VALUES (?, ?, ?, ?)",
+                (name, json.dumps(watermark), json.dumps(stats), time.time()),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rows (name, key, hash, data) VALUES (?, ?, ?, ?)",
+                [(name, key, row_hash, json.dumps(values)) for key, row_hash, values in rows],
+            )
+
+    def reset(self, name):
+        """Forgets a sync, so its next run starts from scratch."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM syncs WHERE name = ?", (name,))
+            self._conn.execute("DELETE FROM rows WHERE name = ?", (name,))
+
+    def acquire(self, name):
+        """Marks a sync as running; returns False if it already is."""
+        with self._lock:
+            if name in self._running:
+                return False
+            self._running.add(name)
+            return True
+
+    def release(self, name):
+        with self._lock:
+            self._running.discard(name)
+
+
+class RunningStats:
+    """Imputation statistics that can take in new rows and retract rows that were replaced.
+
+    Means keep a count and sum per numeric column. Medians and modes keep exact value counts,
+    so their state grows with the number of distinct values.
+    """
+
+    def __init__(self, strategy="mean", counts=None, sums=None, values=None):
+        if strategy not in ("mean", "median", "mode"):
+            raise ValueError(f"Incremental imputation supports mean, median or mode, not {strategy!r}.")
+        self.strategy = strategy
+        self.counts = counts or {}
+        self.sums = sums or {}
+        self.values = values or {}  # {column: {value: count}} for median and mode
+
+    def _columns(self, df):
+        if self.strategy == "mode":
+            return list(df.columns)
+        return [col for col in df.columns
+                if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])]
+
+    def update(self, df, sign=1):
+        """Adds the non-null values of df (sign=1) or removes them again (sign=-1)."""
+        for col in self._columns(df):
+            present = df[col].dropna()
+            if self.strategy == "mean":
+                self.counts[col] = self.counts.get(col, 0) + sign * len(present)
+                self.sums[col] = self.sums.get(col, 0.0) + sign * float(present.sum())
+                continue
+            counts = self.values.setdefault(col, {})
+            for value, count in present.value_counts().items():
+                value = _json_value(value)
+                counts[value] = counts.get(value, 0) + sign * int(count)
+                if counts[value] <= 0:
+                    del counts[value]
+
+    def fill_values(self):
+        """Returns {column: fill value} for every column with at least one value."""
+        if self.strategy == "mean":
+            return {col: self.sums[col] / count for col, count in self.counts.items() if count > 0}
+        fill = {}
+        for col, counts in self.values.items():
+            if not counts:
+                continue
+            if self.strategy == "median":
+                values = pd.Series(counts).sort_index()
+                cumulative = values.cumsum().to_numpy()
+                total = int(cumulative[-1])
+                lower = values.index[np.searchsorted(cumulative, (total - 1) // 2 + 1)]
+                upper = values.index[np.searchsorted(cumulative, total // 2 + 1)]
+                fill[col] = (lower + upper) / 2
+            else:
+                top = max(counts.values())
+                tied = [value for value, count in counts.items() if count == top]
+                try:
+                    fill[col] = min(tied)
+                except TypeError:
+                    fill[col] = tied[0]
+        return fill
+
+    def to_dict(self):
+        return {
+            "strategy": self.strategy,
+            "counts": self.counts,
+            "sums": self.sums,
+            # JSON object keys are strings, so value counts are stored as [value, count] pairs.
+            "values": {col: list(counts.items()) for col, counts in self.values.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        values = {col: {value: count for value, count in pairs} for col, pairs in data["values"].items()}
+        return cls(data["strategy"], data["counts"], data["sums"], values)
+
+
+class IncrementalSync:
+    """Fetches only new or changed rows of a query and keeps what is needed to clean them on their own.
+
+    With a watermark column (an updated_at timestamp or a monotonic id) only rows at or above the last
+    committed watermark are fetched, so a run costs O(delta); rows tied on the watermark that were
+    already committed unchanged are skipped by their content hash, so ties split across chunks or
+    runs are neither lost nor cleaned twice. Without a watermark column every row is read but
+    only rows whose content hash changed are passed on, so cleaning is O(delta) while extraction
+    stays O(table). Each key's last values are kept so that an updated row retracts its earlier
+    contribution to the imputation statistics. Rows are deduplicated by key rather than by content.
+    Watermark and key columns are passed through untyped, so their values match the source's.
+    """
+
+    def __init__(self, name, key_columns, watermark_column=None, strategy="mean", state=None):
+        self.name = name
+        self.key_columns = list(key_columns)
+        self.watermark_column = watermark_column
+        self.state = state or IncrementalState()
+        self.watermark, stats = self.state.load(name)
+        self.stats = RunningStats.from_dict(stats) if stats else RunningStats(strategy)
+        self._pending_rows = {}
+        self._pending_watermark = self.watermark
+
+    def delta_query(self, engine, query):
+        """Wraps query so that only rows from the committed watermark on are selected, in watermark order."""
+        query = query.strip().rstrip(";")
+        if self.watermark_column is None:
+            return text(query)
+        column = engine.dialect.identifier_preparer.quote(self.watermark_column)
+        if self.watermark is None:
+            return text(f"SELECT * FROM ({query}) AS delta_source ORDER BY {column}")
+        return text(
+            f"SELECT * FROM ({query}) AS delta_source WHERE {column} >= :watermark ORDER BY {column}"
+        ).bindparams(watermark=self.watermark)
+
+    def read_delta(self, engine, query, chunksize=DEFAULT_SQL_CHUNK_ROWS):
+        """Yields chunks holding only the new or changed rows; state is not advanced until commit()."""
+        boundary = None
+        for chunk in read_sql_chunks(engine, self.delta_query(engine, query), chunksize):
+            if self.watermark_column is None:
+                yield self._changed(chunk)
+                continue
+            if self.watermark is not None and len(chunk):
+                # Rows come in watermark order, so those tied on the lowest value (the committed
+                # watermark, if any row still has it) lead the stream; only they can be repeats.
+                if boundary is None:
+                    boundary = chunk[self.watermark_column].iloc[0]
+                tied = (chunk[self.watermark_column] == boundary).to_numpy()
+                if tied.any():
+                    chunk = pd.concat([self._changed(chunk[tied]), chunk[~tied]])
+            yield chunk
+
+    def _keys(self, df):
+        return [json.dumps(key) for key in _records(df[self.key_columns])]
+
+    @staticmethod
+    def _hashes(records):
+        return [hashlib.blake2b(json.dumps(record).encode(), digest_size=16).hexdigest() for record in records]
+
+    def _changed(self, chunk):
+        keys = self._keys(chunk)
+        hashes = self._hashes(_records(chunk))
+        stored = self.state.rows(self.name, keys)
+        stored.update(self._pending_rows)
+        changed = [key not in stored or stored[key][0] != row_hash for key, row_hash in zip(keys, hashes)]
+        return chunk[np.array(changed, dtype=bool)]
+
+    def apply(self, chunk, rules=None, impute=None):
+        """Folds a delta chunk into the statistics and returns it deduplicated by key, typed and imputed.
+
+        A rule set (rules.RuleSet), if given, nulls violating values and drops violating rows before typing,
+        so neither reaches the statistics; dropped rows are still remembered by hash, so they are not fetched
+        again until they change. `impute`, if given, fills what it can of the typed rows (the pipeline's local
+        imputer, say) before the running statistics fill the rest.
+        """
+        chunk = chunk.drop_duplicates(self.key_columns, keep="last").reset_index(drop=True)
+        keys = self._keys(chunk)
+        hashes = self._hashes(_records(chunk))  # Of the source values, so unchanged rows compare equal next run
+        if rules is not None:
+            enforced = rules.enforce(chunk)
+            kept = chunk.index.isin(enforced.index)
+            chunk = enforced
+        else:
+            kept = np.ones(len(chunk), dtype=bool)
+        typed = DataCleaning().fix_data_types(chunk.copy())
+        # Keys and watermarks keep their source values: a datetime watermark must not become nanoseconds
+        for col in dict.fromkeys([*self.key_columns, *([self.watermark_column] if self.watermark_column else [])]):
+            typed[col] = chunk[col]
+
+        previous = self.state.rows(self.name, keys)
+        previous.update({key: self._pending_rows[key] for key in keys if key in self._pending_rows})
+        replaced = [dict(zip(previous[key][1]["columns"], previous[key][1]["values"]))
+                    for key in keys if key in previous]
+        if replaced:
+            self.stats.update(pd.DataFrame.from_records(replaced), sign=-1)
+        self.stats.update(typed)
+
+        columns = [str(col) for col in typed.columns]
+        values = iter(_records(typed))
+        for key, row_hash, keep in zip(keys, hashes, kept):
+            # A dropped row contributes nothing, so replacing it later retracts nothing
+            row = {"columns": columns, "values": next(values)} if keep else {"columns": [], "values": []}
+            self._pending_rows[key] = (row_hash, row)
+        if self.watermark_column is not None and chunk[self.watermark_column].notna().any():
+            self._pending_watermark = _json_value(chunk[self.watermark_column].max())
+        return self.fill(impute(typed) if impute is not None else typed)
+
+    def fill(self, df):
+        """Fills nulls with the running statistics instead of the chunk's own."""
+        fill = {col: value for col, value in self.stats.fill_values().items() if col in df.columns}
+        return df.fillna(fill) if fill else df
+
+    def commit(self):
+        """Persists the statistics, row hashes and watermark of everything applied since the last commit."""
+        rows = [(key, row_hash, values) for key, (row_hash, values) in self._pending_rows.items()]
+        self.state.save(self.name, self._pending_watermark, self.stats.to_dict(), rows)
+        self.watermark = self._pending_watermark
+        self._pending_rows = {}
+
+    async def aclean(self, pipeline, source_engine, query, target_engine, target_table,
+                     chunksize=DEFAULT_SQL_CHUNK_ROWS, progress=None, profile=None):
+        """Cleans the delta chunk by chunk, upserting each into target_table and yielding it.
+
+        State is committed after every upserted chunk, so an interrupted run resumes where it stopped.
+        The pipeline's rule set and local imputer, if it has them, run on every delta chunk before AI
+        cleaning, as they would in a full run. A column profile (profiles.FrameProfile), if given, takes in
+        every delta chunk and is passed to AI cleaning. Unlike the imputation statistics it cannot retract
+        replaced rows.
+        """
+        if not self.state.acquire(self.name):
+            raise RuntimeError(f"Incremental sync {self.name!r} is already running.")
+        imputer = getattr(pipeline.cleaner, "imputer", None)
+        impute = partial(imputer.impute, profile=profile, source=self.name) if imputer is not None else None
+        apply = partial(self.apply, rules=pipeline.rules, impute=impute)
+        reader = self.read_delta(source_engine, query, chunksize)
+        try:
+            async for chunk in aiter_chunks(reader):
+                if chunk.empty:
+                    continue
+                if profile is not None:
+                    await asyncio.to_thread(profile.update, chunk)
+                filled = await asyncio.to_thread(apply, chunk)
+                cleaned = await pipeline.aclean_with_ai(filled, progress, profile, self.name)
+                await asyncio.to_thread(upsert_frame, target_engine, target_table, cleaned, self.key_columns)
+                await asyncio.to_thread(self.commit)
+                print(f"🔁 Upserted {len(cleaned)} changed rows into {target_table}")
+                yield cleaned
+        finally:
+            reader.close()
+            self.state.release(self.name)
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_JOB_TTL_SECONDS = 3600  # Finished jobs and their results are kept this long
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once it has been cancelled."""
+
+
+class Job:
+    """A cleaning run executed off the request path, with progress counters and its cleaned frames."""
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.chunks_done = 0
+        self.rows_done = 0
+        self.batches_total = 0
+        self.batches_done = 0
+        self.frames = []
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self.future = None
+        self.on_close = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        """Raises JobCancelled if the job was cancelled; called between units of work."""
+        if self._cancelled.is_set():
+            raise JobCancelled(self.id)
+
+    def add_total(self, batches):
+        """Progress hook: `batches` more LLM batches were planned."""
+        self.check()
+        with self._lock:
+            self.batches_total += batches
+
+    def advance(self, batches=1):
+        """Progress hook: `batches` LLM batches finished."""
+        with self._lock:
+            self.batches_done += batches
+        self.check()
+
+    def add_frame(self, frame):
+        """Stores a cleaned chunk of the result."""
+        with self._lock:
+            self.frames.append(frame)
+            self.chunks_done += 1
+            self.rows_done += len(frame)
+        self.check()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "cancel_requested": self.cancelled,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "progress": {
+                    "chunks_done": self.chunks_done,
+                    "rows_done": self.rows_done,
+                    "batches_done": self.batches_done,
+                    "batches_total": self.batches_total,
+                },
+            }
+
+
+class JobManager:
+    """Runs cleaning jobs on a pool of worker threads, each with its own event loop.
+
+    Pandas work and LLM calls happen on the workers, so the server's event loop only handles
+    submissions and status polls, and concurrent uploads do not block each other.
+    """
+
+    def __init__(self, max_workers=DEFAULT_JOB_WORKERS, ttl_seconds=DEFAULT_JOB_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cleaning-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, run, on_close=None):
+        """Queues `async run(job)`, which should store cleaned frames with job.add_frame; returns the job.
+
+        `on_close` is called once the job has finished, whatever the outcome.
+        """
+        self.purge()
+        job = Job(kind)
+        job.on_close = on_close
+        with self._lock:
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._execute, job, run)
+        return job
+
+    def _execute(self, job, run):
+        try:
+            if job.cancelled:
+                job.status = CANCELLED
+                return
+            job.status, job.started_at = RUNNING, time.time()
+            asyncio.run(run(job))
+            job.status = CANCELLED if job.cancelled else SUCCEEDED
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.status, job.error = FAILED, str(e)
+        finally:
+            if job.status != SUCCEEDED:
+                job.frames = []
+            job.finished_at = time.time()
+            if job.on_close is not None:
+                job.on_close()
+
+    def get(self, job_id):
+        """Returns the job with this id, or None."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """Requests cancellation; queued jobs never start and running jobs stop at the next batch or chunk."""
+        job = self.get(job_id)
+        if job is not None and job.status not in FINISHED:
+            job._cancelled.set()
+            if job.future.cancel():
+                job.status, job.finished_at = CANCELLED, time.time()
+                if job.on_close is not None:
+                    job.on_close()
+        return job
+
+    def purge(self):
+        """Forgets finished jobs older than the TTL, releasing their results."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job.status in FINISHED and job.finished_at and job.finished_at < cutoff]:
+                del self._jobs[job_id]
+
+    def shutdown(self):
+        """Cancels every unfinished job and waits for running ones to stop."""
+        for job in self.list():
+            self.cancel(job.id)
+        self._executor.shutdown(wait=True)
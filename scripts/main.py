@@ -1,6 +1,7 @@
 from data_ingestion import DataIngestion
 from data_cleaning import DataCleaning
 from ai_agent import AIAgent
+from batching import DEFAULT_TOKEN_BUDGET
 
 
 # ✅ Database Configuration
@@ -54,15 +55,9 @@ df_api = ingestion.fetch_from_api(API_URL)
 if df_api is not None:
     print("\n🔹 Cleaning API Data...")
 
-    # ✅ Keep only first N rows to avoid token overflow
-    df_api = df_api.head(30)  # ✅ Adjust this value based on your dataset size
-
-    # ✅ Reduce long text fields before sending to OpenAI
-    if "body" in df_api.columns:
-        df_api["body"] = df_api["body"].apply(lambda x: x[:100] + "..." if isinstance(x, str) else x)  # ✅ Limit text length
-
+    # ✅ Batches are packed by token budget, so long text fields no longer overflow the context
     df_api = cleaner.clean_data(df_api)
-    df_api = ai_agent.process_data(df_api)
+    df_api = ai_agent.process_data(df_api, token_budget=DEFAULT_TOKEN_BUDGET)
 
     print("\n✅ AI-Cleaned API Data:\n", df_api)
 
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_CATEGORY_RATIO = 0.5  # Text columns with at most this share of distinct values become categoricals
+INTEGER_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def _smallest_int(low, high):
+    return next(int_type for int_type in INTEGER_TYPES if np.iinfo(int_type).min <= low and high <= np.iinfo(int_type).max)
+
+
+def _is_masked(dtype):
+    return isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind in "iuf" and not isinstance(
+        dtype, pd.ArrowDtype)
+
+
+def fit_dtype(values, new_values):
+    """Returns values, cast if needed so that new_values can be assigned into it without loss or errors.
+
+    Categoricals get the missing categories, narrow integers and floats are widened (to nullable types
+    if new_values has nulls) and numbers that no numeric type holds turn the column into objects.
+    """
+    dtype = values.dtype
+    new_values = pd.Series(np.asarray(new_values, dtype=object) if not isinstance(new_values, pd.Series)
+                           else new_values.to_numpy(dtype=object))
+    if isinstance(dtype, pd.CategoricalDtype):
+        missing = pd.Index(pd.unique(new_values.dropna())).difference(dtype.categories)
+        return values.cat.add_categories(missing) if len(missing) else values
+    if isinstance(dtype, pd.ArrowDtype) or not pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(
+            dtype):
+        return values
+
+    present = new_values.dropna()
+    numbers = pd.to_numeric(present, errors="coerce").astype(float)
+    if numbers.isna().any():
+        return values.astype(object)
+    has_nulls = len(present) < len(new_values)
+    masked = _is_masked(dtype)
+    if pd.api.types.is_integer_dtype(dtype):
+        whole = bool((numbers % 1 == 0).all())
+        low, high = (numbers.min(), numbers.max()) if len(numbers) else (0, 0)
+        info = np.iinfo(dtype.numpy_dtype if masked else dtype)
+        if whole and info.min <= low and high <= info.max:
+            return values.astype(f"Int{info.bits}") if has_nulls and not masked else values
+        if whole and high <= np.iinfo(np.int64).max and low >= np.iinfo(np.int64).min:
+            return values.astype("Int64" if masked or has_nulls else np.int64)
+        return values.astype("Float64" if masked else np.float64)
+    target = dtype.numpy_dtype if masked else dtype
+    if len(numbers) and not np.array_equal(numbers.to_numpy().astype(target), numbers.to_numpy()):
+        return values.astype("Float64" if masked else np.float64)
+    return values
+
+
+class MemoryOptimizer:
+    """Shrinks a cleaned frame's memory without changing its values, and reports bytes saved per column.
+
+    Integers are downcast to the smallest type that holds their range. Floats that are all whole
+    numbers (ints promoted to float by nulls or imputation) become nullable integers; other floats
+    become float32 only where every value survives the round trip. Text columns with few distinct
+    values become categoricals.
+    """
+
+    def __init__(self, category_ratio=DEFAULT_CATEGORY_RATIO, downcast_floats=True, nullable_ints=True):
+        self.category_ratio = category_ratio  # None keeps text columns as they are
+        self.downcast_floats = downcast_floats
+        self.nullable_ints = nullable_ints
+
+    def optimize(self, df):
+        """Returns (optimized DataFrame, per-column report DataFrame)."""
+        columns = {}
+        report = []
+        for col in df.columns:
+            values = df[col]
+            optimized = self._optimize_column(values)
+            before = int(values.memory_usage(index=False, deep=True))
+            after = int(optimized.memory_usage(index=False, deep=True))
+            if after >= before:
+                optimized, after = values, before
+            columns[col] = optimized
+            report.append({"column": col, "dtype_before": str(values.dtype), "dtype_after": str(optimized.dtype),
+                           "bytes_before": before, "bytes_after": after, "bytes_saved": before - after})
+        optimized = pd.DataFrame(columns, index=df.index, copy=False)
+        return optimized, pd.DataFrame(report, columns=[
+            "column", "dtype_before", "dtype_after", "bytes_before", "bytes_after", "bytes_saved",
+        ]).set_index("column")
+
+    def optimize_data(self, df):
+        """Returns only the optimized frame, printing the total saving."""
+        optimized, report = self.optimize(df)
+        before, after = report["bytes_before"].sum(), report["bytes_after"].sum()
+        if before:
+            print(f"🗜️ Frame memory {before / 1e6:.1f} MB → {after / 1e6:.1f} MB ({1 - after / before:.0%} saved)")
+        return optimized
+
+    def _optimize_column(self, values):
+        dtype = values.dtype
+        if isinstance(dtype, (pd.CategoricalDtype, pd.ArrowDtype)) or pd.api.types.is_bool_dtype(dtype):
+            return values
+        if pd.api.types.is_integer_dtype(dtype):
+            return self._downcast_ints(values)
+        if pd.api.types.is_float_dtype(dtype):
+            return self._downcast_floats(values)
+        if dtype == object and self.category_ratio is not None and len(values):
+            present = values.dropna()
+            if len(present) and present.map(type).eq(str).all() and (
+                    present.nunique() <= self.category_ratio * len(values)):
+                return values.astype("category")
+        return values
+
+    @staticmethod
+    def _downcast_ints(values):
+        present = values.dropna()
+        if not len(present):
+            return values
+        int_type = _smallest_int(int(present.min()), int(present.max()))
+        if _is_masked(values.dtype):
+            return values.astype(f"Int{np.iinfo(int_type).bits}")
+        return values.astype(int_type)
+
+    def _downcast_floats(self, values):
+        present = values.dropna().to_numpy(dtype=np.float64)
+        if not len(present) or not np.isfinite(present).all():
+            return values
+        if self.nullable_ints and (present % 1 == 0).all() and (
+                np.iinfo(np.int64).min <= present.min() and present.max() <= np.iinfo(np.int64).max):
+            int_type = _smallest_int(int(present.min()), int(present.max()))
+            return values.astype(f"Int{np.iinfo(int_type).bits}")
+        if self.downcast_floats and np.array_equal(present.astype(np.float32).astype(np.float64), present):
+            return values.astype("Float32" if _is_masked(values.dtype) else np.float32)
+        return values
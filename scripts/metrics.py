@@ -0,0 +1,186 @@
+import bisect
+import contextvars
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; spans a fast pandas step on a small chunk up to a slow LLM batch.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Stage timings of the request being served, for the Server-Timing header. asyncio tasks and
+# asyncio.to_thread copy the context, so they all append to the same list.
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in sorted(labels.items())) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_rss_bytes():
+    """Current resident set size, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """In-process counters, gauges and latency histograms, rendered in the Prometheus text format.
+
+    Recording is a perf_counter call, a lock and a bisect, so it is cheap enough to leave on.
+    A disabled instance records nothing and is what components use when no registry is passed.
+    """
+
+    def __init__(self, enabled=True, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._help = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def describe(self, name, text):
+        """Sets the # HELP text of a metric."""
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Times a pipeline stage; with rows, also counts them and records the stage's rows/sec."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe("cleaning_stage_seconds", elapsed, stage=name)
+            if rows is not None:
+                self.inc("cleaning_stage_rows_total", rows, stage=name)
+                if elapsed > 0:
+                    self.set("cleaning_stage_rows_per_second", rows / elapsed, stage=name)
+            timings = _request_timings.get()
+            if timings is not None:
+                timings.append((name, elapsed))
+
+    def add_collector(self, collect):
+        """Registers a callable returning {metric name: value} gauges, evaluated at every scrape."""
+        self._collectors.append(collect)
+
+    @staticmethod
+    def start_request():
+        """Starts collecting stage timings for the current request; returns the token for end_request."""
+        return _request_timings.set([])
+
+    @staticmethod
+    def end_request(token):
+        """Stops collecting and returns a Server-Timing header value summing each stage's time."""
+        timings = _request_timings.get() or []
+        _request_timings.reset(token)
+        totals = {}
+        for name, elapsed in timings:
+            totals[name] = totals.get(name, 0.0) + elapsed
+        return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in totals.items())
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        gauges = {"process_peak_rss_bytes": peak_rss_bytes()}
+        rss = current_rss_bytes()
+        if rss is not None:
+            gauges["process_rss_bytes"] = rss
+        for collect in self._collectors:
+            gauges.update(collect())
+
+        with self._lock:
+            counters = dict(self._counters)
+            labelled_gauges = dict(self._gauges)
+            histograms = {key: (list(h.counts), h.sum, h.count, h.buckets) for key, h in self._histograms.items()}
+
+        lines = []
+        declared = set()
+
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            declare(name, "counter")
+            lines.append(f"{name}{_labels(dict(labels))} {value}")
+        for (name, labels), value in sorted(labelled_gauges.items()):
+            declare(name, "gauge")
+            lines.append(f"{name}{_labels(dict(labels))} {value}")
+        for name, value in sorted(gauges.items()):
+            if value is not None:
+                declare(name, "gauge")
+                lines.append(f"{name} {value}")
+        for (name, labels), (counts, total, count, buckets) in sorted(histograms.items()):
+            declare(name, "histogram")
+            labels = dict(labels)
+            cumulative = 0
+            for bound, bucket_count in zip((*buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+NULL_METRICS = Metrics(enabled=False)
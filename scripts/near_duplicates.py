@@ -0,0 +1,238 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+DEFAULT_THRESHOLD = 0.8  # Minimum weighted similarity of two rows to be the same record
+DEFAULT_WINDOW = 5  # Rows each row is compared with after sorting (sorted neighborhood) or within an LSH bucket
+DEFAULT_SIGNATURE_SIZE = 32  # MinHash values per distinct value; similarity error is about 1/sqrt(size)
+DEFAULT_BAND_SIZE = 4  # MinHash values per LSH band
+DEFAULT_MAX_CHARS = 64  # Only the start of long values is shingled
+BLOCKING_METHODS = ("sorted", "minhash")
+MERGE_POLICIES = ("first", "most_complete", "coalesce")
+_EMPTY = np.uint32(0xFFFFFFFF)
+_CHUNK = 65_536
+
+
+def normalize_text(values):
+    """Key form of a column: text casefolded, punctuation dropped and whitespace collapsed.
+
+    Returns (codes, uniques): the normalized value of row i is uniques[codes[i]], -1 for nulls.
+    Each distinct raw value is normalized once.
+    """
+    codes, uniques = pd.factorize(values)
+    text = pd.Series(np.asarray(uniques, dtype=object)).astype(str)
+    text = text.str.casefold().str.replace(r"[\W_]+", " ", regex=True).str.strip()
+    normalized_codes, normalized = pd.factorize(text)
+    codes = np.where(codes >= 0, normalized_codes[np.maximum(codes, 0)], -1).astype(np.int32)
+    return codes, normalized.to_numpy(dtype=object)
+
+
+def _mix(h):
+    """splitmix64 finalizer: spreads shingle codes over all 64 bits."""
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def minhash_signatures(strings, size=DEFAULT_SIGNATURE_SIZE, max_chars=DEFAULT_MAX_CHARS):
+    """One-permutation MinHash of the character 3-grams of each string, as a (len(strings), size) uint32 array.
+
+    Each 3-gram hash picks a bin from its top bits and competes for that bin's minimum, so one
+    hash per 3-gram stands in for `size` permutations. Bins no 3-gram fell into hold _EMPTY.
+    """
+    bits = int(size).bit_length() - 1
+    if 1 << bits != size:
+        raise ValueError(f"Signature size must be a power of two, not {size}.")
+    signatures = np.full((len(strings), size), _EMPTY, dtype=np.uint32)
+    series = pd.Series(strings, dtype=object)
+    with np.errstate(over="ignore"):
+        for start in range(0, len(series), _CHUNK):
+            block = (" " + series.iloc[start:start + _CHUNK].str.slice(0, max_chars) + " ").to_numpy(dtype=str)
+            chars = block.view(np.uint32).reshape(len(block), -1).astype(np.uint64)
+            if chars.shape[1] < 3:
+                continue
+            grams = _mix((chars[:, :-2] << np.uint64(42)) | (chars[:, 1:-1] << np.uint64(21)) | chars[:, 2:])
+            lengths = np.char.str_len(block)
+            valid = np.arange(chars.shape[1] - 2) < (lengths - 2)[:, None]
+            rows = np.broadcast_to(np.arange(len(block))[:, None], grams.shape)
+            slots = rows * size + (grams >> np.uint64(64 - bits)).astype(np.int64) if bits else rows
+            target = signatures[start:start + len(block)].reshape(-1)
+            np.minimum.at(target, slots[valid], (grams & np.uint64(0xFFFFFFFE)).astype(np.uint32)[valid])
+            signatures[start:start + len(block)] = target.reshape(len(block), size)
+    return signatures
+
+
+def signature_similarity(left, right):
+    """Estimated Jaccard similarity of the 3-gram sets behind two aligned signature arrays."""
+    filled = (left != _EMPTY) | (right != _EMPTY)
+    equal = (left == right) & (left != _EMPTY)
+    return equal.sum(axis=1) / np.maximum(filled.sum(axis=1), 1)
+
+
+class NearDuplicateDetector:
+    """Finds rows that are the same record spelled differently, without comparing every pair of rows.
+
+    Key columns are normalized (case, punctuation, whitespace) and rows with identical keys are
+    grouped at once. Only candidate pairs from a blocking index are then scored: "sorted" compares
+    each row with its `window` neighbours under several sort orders of the keys (sorted
+    neighbourhood); "minhash" compares rows that share a band of their MinHash signatures (LSH).
+    Pairs are scored per column by estimated 3-gram Jaccard similarity of MinHash signatures, which
+    are computed once per distinct value, and pairs above `threshold` are joined into clusters.
+    """
+
+    def __init__(self, columns=None, method="sorted", threshold=DEFAULT_THRESHOLD, window=DEFAULT_WINDOW,
+                 weights=None, policy="coalesce", signature_size=DEFAULT_SIGNATURE_SIZE,
+                 band_size=DEFAULT_BAND_SIZE, max_chars=DEFAULT_MAX_CHARS):
+        if method not in BLOCKING_METHODS:
+            raise ValueError(f"Blocking method must be one of {', '.join(BLOCKING_METHODS)}, not {method!r}.")
+        if policy not in MERGE_POLICIES:
+            raise ValueError(f"Merge policy must be one of {', '.join(MERGE_POLICIES)}, not {policy!r}.")
+        self.columns = columns  # Columns compared; by default every column except row identifiers
+        self.method = method
+        self.threshold = threshold
+        self.window = window
+        self.weights = weights or {}  # Optional {column: weight}; other columns weigh 1
+        self.policy = policy
+        self.signature_size = signature_size
+        self.band_size = band_size
+        self.max_chars = max_chars
+
+    def resolve_columns(self, df):
+        if self.columns is not None:
+            return [col for col in self.columns if col in df.columns]
+        if len(df) < 2:
+            return list(df.columns)
+        # A column unique on every row (an id) tells nothing about whether two rows are the same record.
+        keys = [col for col in df.columns if df[col].nunique() < len(df)]
+        return keys or list(df.columns)
+
+    def find(self, df):
+        """Returns (cluster ids, matched pairs).
+
+        Cluster ids are a Series aligned with df, numbered in order of first appearance; rows with
+        no near duplicate get a cluster of their own. Matched pairs is a DataFrame of the index
+        labels of the first row of two matched key groups and their similarity.
+        """
+        columns = self.resolve_columns(df)
+        pairs_columns = ["left", "right", "score"]
+        if not len(df) or not columns:
+            return pd.Series(np.arange(len(df)), index=df.index, name="cluster_id"), pd.DataFrame(columns=pairs_columns)
+
+        keys = [normalize_text(df[col]) for col in columns]
+        # Rows with identical normalized keys are one group; only the groups' first rows are compared.
+        groups = pd.DataFrame({i: codes for i, (codes, _) in enumerate(keys)}).groupby(
+            list(range(len(keys))), sort=False).ngroup().to_numpy()
+        _, first_rows = np.unique(groups, return_index=True)
+        group_codes = [codes[first_rows] for codes, _ in keys]
+        signatures = [minhash_signatures(uniques, self.signature_size, self.max_chars) for _, uniques in keys]
+
+        left, right = self._candidates(group_codes, [uniques for _, uniques in keys], signatures)
+        scores = self._score(left, right, group_codes, signatures, [self.weights.get(col, 1.0) for col in columns])
+        matched = scores >= self.threshold
+        left, right, scores = left[matched], right[matched], scores[matched]
+
+        count = len(first_rows)
+        graph = coo_matrix((np.ones(len(left), dtype=np.int8), (left, right)), shape=(count, count))
+        _, labels = connected_components(graph, directed=False)
+        cluster_ids, _ = pd.factorize(labels[groups])
+        pairs = pd.DataFrame({"left": df.index[first_rows[left]], "right": df.index[first_rows[right]],
+                              "score": scores}, columns=pairs_columns)
+        return pd.Series(cluster_ids, index=df.index, name="cluster_id"), pairs
+
+    def _candidates(self, group_codes, uniques, signatures):
+        """Candidate (left, right) group pairs from the blocking index, each pair once with left < right."""
+        count = len(group_codes[0])
+        found = []
+        for order, blocks in self._orders(group_codes, uniques, signatures):
+            for offset in range(1, min(self.window, count)):
+                left, right = order[:-offset], order[offset:]
+                if blocks is not None:
+                    same = blocks[left] == blocks[right]
+                    left, right = left[same], right[same]
+                found.append(np.minimum(left, right).astype(np.int64) * count + np.maximum(left, right))
+        if not found:
+            return np.array([], dtype=np.int32), np.array([], dtype=np.int32)
+        encoded = np.unique(np.concatenate(found))
+        return (encoded // count).astype(np.int32), (encoded % count).astype(np.int32)
+
+    def _orders(self, group_codes, uniques, signatures):
+        """Yields (order, block keys or None): one sort order per pass of the blocking method."""
+        if self.method == "sorted":
+            # Sort by every column in turn, so a typo in one column still leaves the rows adjacent in another pass.
+            ranks = []
+            for codes, values in zip(group_codes, uniques):
+                rank = np.empty(len(values), dtype=np.int64)
+                rank[np.argsort(values.astype(str), kind="stable")] = np.arange(len(values))
+                ranks.append(np.where(codes >= 0, rank[np.maximum(codes, 0)], -1))
+            for first in range(len(ranks)):
+                rotated = ranks[first:] + ranks[:first]
+                yield np.lexsort(rotated[::-1]), None
+            return
+
+        # MinHash LSH over whole rows: the element-wise minimum of the columns' signatures is the
+        # signature of all of a row's 3-grams, so rows differing in one column (or a null) still share bands.
+        count = len(group_codes[0])
+        with np.errstate(over="ignore"):
+            for start in range(0, self.signature_size, self.band_size):
+                band = np.full((count, min(self.band_size, self.signature_size - start)), _EMPTY, dtype=np.uint32)
+                for codes, signature in zip(group_codes, signatures):
+                    present = codes >= 0
+                    band[present] = np.minimum(band[present], signature[codes[present], start:start + band.shape[1]])
+                keys = np.zeros(count, dtype=np.uint64)
+                for position in range(band.shape[1]):
+                    keys = _mix(keys ^ band[:, position].astype(np.uint64))
+                # An empty band carries no text to block on; give each such row its own bucket.
+                unusable = (band == _EMPTY).all(axis=1)
+                keys[unusable] = np.flatnonzero(unusable).astype(np.uint64) | np.uint64(1 << 63)
+                yield np.argsort(keys, kind="stable"), keys
+
+    def _score(self, left, right, group_codes, signatures, weights):
+        """Weighted mean per-column similarity of candidate pairs; columns null on either side are left out.
+
+        Columns are scored most distinct first, and after each one pairs that could no longer reach
+        the threshold even if every remaining column matched are dropped from further scoring.
+        """
+        total = np.zeros(len(left))
+        weight = np.zeros(len(left))
+        alive = np.arange(len(left))
+        order = sorted(range(len(group_codes)), key=lambda i: -len(signatures[i]))
+        remaining = sum(weights)
+        for position in order:
+            codes, signature, column_weight = group_codes[position], signatures[position], weights[position]
+            remaining -= column_weight
+            a, b = codes[left[alive]], codes[right[alive]]
+            present = (a >= 0) & (b >= 0)
+            similarity = (a == b).astype(float)
+            differ = np.flatnonzero(present & (a != b))
+            for start in range(0, len(differ), _CHUNK):
+                rows = differ[start:start + _CHUNK]
+                similarity[rows] = signature_similarity(signature[a[rows]], signature[b[rows]])
+            total[alive] += column_weight * similarity * present
+            weight[alive] += column_weight * present
+            reachable = (total[alive] + remaining) >= self.threshold * (weight[alive] + remaining)
+            total[alive[~reachable]] = 0
+            alive = alive[reachable]
+        return np.divide(total, weight, out=np.zeros(len(left)), where=weight > 0)
+
+    def merge(self, df, cluster_ids):
+        """Returns one row per cluster according to the merge policy.
+
+        "first" keeps each cluster's first row, "most_complete" the row with the fewest nulls and
+        "coalesce" the first row with its nulls filled from the cluster's later rows.
+        """
+        if self.policy == "coalesce":
+            merged = df.groupby(cluster_ids.to_numpy(), sort=False).first()
+            merged.index = df.index[~cluster_ids.duplicated().to_numpy()]
+            return merged.astype(df.dtypes.to_dict(), errors="ignore")
+        if self.policy == "most_complete":
+            filled = df.notna().sum(axis=1).to_numpy()
+            order = np.lexsort((np.arange(len(df)), -filled, cluster_ids.to_numpy()))
+            keep = np.sort(order[~pd.Series(cluster_ids.to_numpy()[order]).duplicated().to_numpy()])
+            return df.iloc[keep]
+        return df[~cluster_ids.duplicated()]
+
+    def deduplicate(self, df):
+        """Returns (merged DataFrame, cluster ids of df's rows)."""
+        cluster_ids, _ = self.find(df)
+        return self.merge(df, cluster_ids), cluster_ids
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from memory_optimizer import DEFAULT_CATEGORY_RATIO
+from metrics import NULL_METRICS
+
+DEFAULT_NORMALIZATION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../.cache/normalization.sqlite")
+DEFAULT_MAX_DISTINCT = 1000  # Columns with more distinct values are free text, not categories to normalize
+DEFAULT_SOURCE = "default"
+
+
+def remap(values, mapping):
+    """Replaces values through mapping by renaming categories, so each distinct value is mapped once.
+
+    Categoricals stay categorical (categories that map to the same value are merged); other columns
+    are encoded, remapped and decoded back to their dtype. Values missing from mapping are kept.
+    """
+    categorical = isinstance(values.dtype, pd.CategoricalDtype)
+    encoded = values if categorical else values.astype("category")
+    categories = encoded.cat.categories
+    renamed = pd.Index([mapping.get(value, value) for value in categories], dtype=object)
+    if renamed.equals(pd.Index(categories, dtype=object)):
+        return values
+    uniques = renamed.unique()
+    codes = encoded.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, uniques.get_indexer(renamed)[codes], -1)
+    result = pd.Series(pd.Categorical.from_codes(new_codes, uniques), index=values.index, name=values.name)
+    return result if categorical else result.astype(values.dtype)
+
+
+class NormalizationStore:
+    """Learned {value: canonical value} dictionaries per source and column, in SQLite with an in-memory copy."""
+
+    def __init__(self, path=DEFAULT_NORMALIZATION_PATH):
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS mappings ("
+                "source TEXT NOT NULL, col TEXT NOT NULL, value TEXT NOT NULL, canonical TEXT NOT NULL, "
+                "updated_at REAL NOT NULL, PRIMARY KEY (source, col, value))"
+            )
+            self._conn.commit()
+
+    def get(self, source, column):
+        """Returns the {value: canonical} dictionary of a column (empty if nothing was learned yet)."""
+        key = (source, str(column))
+        with self._lock:
+            if key not in self._memory:
+                rows = [] if self._conn is None else self._conn.execute(
+                    "SELECT value, canonical FROM mappings WHERE source = ? AND col = ?", key
+                ).fetchall()
+                self._memory[key] = {json.loads(value): json.loads(canonical) for value, canonical in rows}
+            return self._memory[key]
+
+    def update(self, source, column, mapping):
+        """Adds or replaces entries of a column's dictionary."""
+        key = (source, str(column))
+        self.get(source, column)
+        now = time.time()
+        with self._lock:
+            self._memory[key].update(mapping)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO mappings (source, col, value, canonical, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        [(*key, json.dumps(value), json.dumps(canonical), now) for value, canonical in mapping.items()],
+                    )
+
+    def mappings(self, source):
+        """Returns {column: {value: canonical}} for every column of a source, leaving out unchanged values."""
+        if self._conn is None:
+            with self._lock:
+                items = [(col, mapping) for (name, col), mapping in self._memory.items() if name == source]
+            changed = {col: {v: c for v, c in mapping.items() if v != c} for col, mapping in items}
+            return {col: mapping for col, mapping in changed.items() if mapping}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT col, value, canonical FROM mappings "
+                "WHERE source = ? AND value != canonical ORDER BY col, value",
+                (source,),
+            ).fetchall()
+        result = {}
+        for col, value, canonical in rows:
+            result.setdefault(col, {})[json.loads(value)] = json.loads(canonical)
+        return result
+
+
+class ValueNormalizer:
+    """Normalizes categorical text columns by asking the LLM about each distinct value once.
+
+    The distinct values of a low-cardinality text column that the source's dictionary does not know
+    yet are sent as a one-column frame through the agent's batching, cache and rate limits. The
+    answers are stored, and the dictionary is applied to the whole column with a categorical remap.
+    LLM cost therefore grows with the number of distinct values, not with the number of rows.
+    """
+
+    def __init__(self, store=None, max_distinct=DEFAULT_MAX_DISTINCT, category_ratio=DEFAULT_CATEGORY_RATIO,
+                 metrics=None):
+        self.store = store or NormalizationStore(None)
+        self.max_distinct = max_distinct
+        self.category_ratio = category_ratio  # Columns with at most this share of distinct values are categorical
+        self.metrics = metrics or NULL_METRICS
+
+    def columns(self, df, profile=None):
+        """Text columns with few enough distinct values, judged over the whole source when a profile is given."""
+        selected = []
+        for col in df.columns:
+            values = df[col]
+            if not isinstance(values.dtype, pd.CategoricalDtype) and values.dtype != object:
+                continue
+            column = profile.column(col) if profile is not None else None
+            if column is not None:
+                distinct, rows = column.distinct.estimate(), profile.rows
+            else:
+                distinct, rows = values.nunique(), len(values)
+            if 0 < distinct <= self.max_distinct and distinct <= self.category_ratio * rows:
+                selected.append(col)
+        return selected
+
+    @staticmethod
+    def distinct_text(values):
+        present = values.dropna()
+        return [value for value in present.unique() if isinstance(value, str)]
+
+    async def anormalize(self, df, dispatch, source=None, profile=None):
+        """Returns df with its categorical text columns normalized.
+
+        `dispatch` is an async callable that cleans a frame with the LLM and returns it aligned
+        (CleaningPipeline passes its batched, rate-limited dispatch).
+        """
+        source = source or DEFAULT_SOURCE
+        columns = await asyncio.to_thread(self.columns, df, profile)
+        if not columns:
+            return df
+        result = df.copy()
+        for col in columns:
+            mapping = self.store.get(source, col)
+            distinct = await asyncio.to_thread(self.distinct_text, df[col])
+            unknown = sorted(value for value in distinct if value not in mapping)
+            self.metrics.inc("normalization_values_total", len(distinct) - len(unknown), source="dictionary")
+            if unknown:
+                learned = await self._alearn(col, unknown, dispatch)
+                self.store.update(source, col, learned)
+                self.metrics.inc("normalization_values_total", len(unknown), source="llm")
+                mapping = self.store.get(source, col)
+            changes = {value: mapping[value] for value in distinct if mapping.get(value, value) != value}
+            if changes:
+                result[col] = await asyncio.to_thread(remap, df[col], changes)
+                print(f"🔤 Normalized {len(changes)} of {len(distinct)} distinct values in {col} "
+                      f"({len(unknown)} new)")
+        return result
+
+    async def _alearn(self, col, values, dispatch):
+        cleaned = await dispatch(pd.DataFrame({col: values}))
+        answers = cleaned[col].tolist() if col in cleaned.columns else values
+        # Keep a value as it is when the answer is missing or not text
+        return {value: answer.strip() if isinstance(answer, str) and answer.strip() else value
+                for value, answer in zip(values, answers)}
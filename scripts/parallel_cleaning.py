@@ -0,0 +1,256 @@
+import math
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_cleaning import DataCleaning
+
+# The frame shared with pool workers: its columns are written once to an Arrow IPC file that every worker
+# memory-maps, so the pool starts without copying the frame into each worker and a task only materializes
+# the rows it works on. Workers come from a fork server (or are spawned), never forked from the calling
+# process: the backend cleans from worker threads, and a process forked from a multithreaded one can
+# inherit locks that other threads held. Columns Arrow cannot hold as they are (object columns mixing
+# types, nested values) are sent to every worker instead.
+_TABLE = None
+_SPILLED = None
+_COLUMNS = None
+
+
+def _init_worker(path, columns, spilled):
+    import pyarrow as pa
+    import pyarrow.ipc
+
+    global _TABLE, _SPILLED, _COLUMNS
+    _TABLE = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    _SPILLED = spilled
+    _COLUMNS = columns
+
+
+def _write_shared(df, path):
+    """Writes the columns of df Arrow can hold to an IPC file at path; returns the frame of the others.
+
+    Columns are stored under their positions, so names need not be unique strings.
+    """
+    import pyarrow as pa
+    import pyarrow.ipc
+
+    frame = df.set_axis([str(i) for i in range(df.shape[1])], axis=1).reset_index(drop=True)
+    try:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        spilled = [field.name for field in table.schema if pa.types.is_nested(field.type)]
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        table, spilled = None, []
+        for name in frame.columns:
+            try:
+                if pa.types.is_nested(pa.array(frame[name], from_pandas=True).type):
+                    spilled.append(name)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                spilled.append(name)
+    if table is None or spilled:
+        table = pa.Table.from_pandas(frame.drop(columns=spilled), preserve_index=False)
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return frame[spilled] if spilled else None
+
+
+def _rows(positions):
+    """Rows of the shared frame at a slice or array of positions, indexed by position."""
+    if isinstance(positions, slice):
+        table = _TABLE.slice(positions.start, positions.stop - positions.start)
+        index = pd.RangeIndex(positions.start, positions.stop)
+    else:
+        table = _TABLE.take(positions)
+        index = pd.Index(positions)
+    pieces = [table.to_pandas()] if _TABLE.num_columns else []
+    if _SPILLED is not None:
+        pieces.append(_SPILLED.iloc[positions].reset_index(drop=True))
+    part = pd.concat(pieces, axis=1)[[str(i) for i in range(len(_COLUMNS))]]
+    part.columns = _COLUMNS
+    part.index = index
+    return part
+
+
+def _partition_stats(start, stop, strategy):
+    """Mergeable per-column statistics for one partition."""
+    part = _rows(slice(start, stop))
+    if strategy == "mean":
+        numeric = part.select_dtypes(include="number")
+        return {col: (float(values.sum()), len(values)) for col, values in
+                ((col, numeric[col].dropna()) for col in numeric.columns)}
+    if strategy == "median":
+        numeric = part.select_dtypes(include="number")
+        return {col: numeric[col].value_counts() for col in numeric.columns}
+    if strategy == "mode":
+        return {col: part[col].value_counts() for col in part.columns}
+    return {}
+
+
+def _filled(part, fill_values, strategy):
+    if strategy == "drop":
+        return part.dropna()
+    return part.fillna(fill_values) if len(fill_values) else part
+
+
+def _partition_hashes(start, stop, fill_values, strategy):
+    """Positions (relative to the frame) and row hashes of a filled partition."""
+    part = _rows(slice(start, stop))
+    kept = part.notna().all(axis=1).to_numpy() if strategy == "drop" else np.ones(len(part), dtype=bool)
+    part = _filled(part, fill_values, strategy)
+    # duplicated() treats -0.0 and 0.0 as equal but their hashes differ; adding 0.0 turns -0.0 into 0.0.
+    floats = part.select_dtypes(include="floating").columns
+    if len(floats):
+        part = part.assign(**{col: part[col] + 0.0 for col in floats})
+    return start + np.flatnonzero(kept), pd.util.hash_pandas_object(part, index=False).to_numpy()
+
+
+def _bucket_duplicates(positions, fill_values, strategy):
+    """Exact duplicate check for rows that share a hash bucket; returns positions to drop."""
+    rows = _filled(_rows(positions), fill_values, strategy)
+    return positions[rows.duplicated().to_numpy()]
+
+
+def _partition_types(start, stop, drop_positions, fill_values, strategy):
+    """Filled, deduplicated partition (indexed by position) with numeric conversion attempted per column."""
+    part = _rows(slice(start, stop))
+    if len(drop_positions):
+        keep = np.ones(stop - start, dtype=bool)
+        keep[drop_positions - start] = False
+        part = part[keep]
+    part = _filled(part, fill_values, strategy)
+    converted = {}
+    for col in part.columns:
+        if pd.api.types.is_numeric_dtype(part[col]):
+            continue
+        try:
+            converted[col] = pd.to_numeric(part[col])
+        except ValueError:
+            converted[col] = None
+    return part, converted
+
+
+class ParallelCleaning(DataCleaning):
+    """Multi-process version of DataCleaning.clean_data with the same result.
+
+    Rows are split into contiguous partitions. Statistics (sums and counts for means, value counts
+    for medians and modes) are computed per partition and merged into exact global fill values.
+    Duplicates are found via row hashes and confirmed exactly within hash buckets, so duplicates
+    spanning partitions are removed, and numeric conversion is applied only to columns that convert
+    in every partition. Means add numpy's pairwise partition sums with a correctly rounded fsum, so
+    they can differ from the serial pandas mean in the last bit. Given a source profile, its fill
+    values are used and the statistics pass is skipped.
+    An imputer, if given, fills what it can in the parent process before the partitions are cleaned.
+    Workers read the frame from a memory-mapped Arrow IPC file (see _write_shared) and are sent only
+    partition bounds, so memory stays close to one copy of the frame however many workers run.
+    """
+
+    def __init__(self, workers=None, strategy="mean", min_rows_per_worker=100_000, imputer=None):
+        super().__init__(imputer)
+        self.workers = workers or os.cpu_count() or 1
+        self.strategy = strategy
+        self.min_rows_per_worker = min_rows_per_worker
+
+    def _bounds(self, rows, workers):
+        edges = np.linspace(0, rows, workers + 1).astype(int)
+        return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+    def clean_data(self, df, profile=None, source=None):
+        """Applies all cleaning steps, in parallel when the frame is large enough."""
+        workers = min(self.workers, len(df) // self.min_rows_per_worker)
+        if workers < 2:
+            df = self.handle_missing_values(df.copy(), self.strategy, profile, source)
+            return self.fix_data_types(self.remove_duplicates(df))
+        if self.imputer is not None and self.strategy != "drop":
+            df = self.imputer.impute(df, profile, source)
+
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "frame.arrow")
+            spilled = _write_shared(df, path)
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(method),
+                                     initializer=_init_worker, initargs=(path, list(df.columns), spilled)) as pool:
+                parts = self._clean_partitions(pool, df, workers, profile)
+
+        convertible = {col for col in parts[0][1] if all(converted[col] is not None for _, converted in parts)}
+        frames = [part.assign(**{col: converted[col] for col in convertible}).set_axis(df.index[part.index])
+                  for part, converted in parts]
+        return pd.concat(frames)
+
+    def _clean_partitions(self, pool, df, workers, profile):
+        """Runs the cleaning passes on the pool; returns (partition, converted columns) pairs."""
+        bounds = self._bounds(len(df), workers)
+        starts, stops = [b[0] for b in bounds], [b[1] for b in bounds]
+
+        # 1. Partition statistics, merged into global fill values (unless the profile has them)
+        if profile is not None and self.strategy in ("mean", "median", "mode"):
+            fill_values = self.profile_fill_values(df, self.strategy, profile)
+        else:
+            stats = list(pool.map(_partition_stats, starts, stops, [self.strategy] * workers))
+            fill_values = self._merge_stats(df, stats)
+
+        # 2. Row hashes of the filled partitions
+        hashed = list(pool.map(_partition_hashes, starts, stops, [fill_values] * workers,
+                               [self.strategy] * workers))
+        positions = np.concatenate([h[0] for h in hashed])
+        hashes = np.concatenate([h[1] for h in hashed])
+
+        # 3. Hash-partitioned exact duplicate detection, only for rows whose hash is not unique
+        candidates = pd.Series(hashes).duplicated(keep=False).to_numpy()
+        buckets = [positions[candidates & (hashes % workers == bucket)] for bucket in range(workers)]
+        buckets = [bucket for bucket in buckets if len(bucket)]
+        drops = list(pool.map(_bucket_duplicates, buckets, [fill_values] * len(buckets),
+                              [self.strategy] * len(buckets)))
+        drop_positions = np.sort(np.concatenate(drops)) if drops else np.array([], dtype=int)
+
+        # 4. Fill, drop duplicates and attempt numeric conversion per partition
+        per_part_drops = [drop_positions[(drop_positions >= start) & (drop_positions < stop)]
+                          for start, stop in bounds]
+        return list(pool.map(_partition_types, starts, stops, per_part_drops, [fill_values] * workers,
+                             [self.strategy] * workers))
+
+    def _merge_stats(self, df, stats):
+        """Combines partition statistics into the fill values the serial path would compute."""
+        if self.strategy == "mean":
+            fill = {}
+            for col in stats[0]:
+                total = math.fsum(part[col][0] for part in stats)
+                count = sum(part[col][1] for part in stats)
+                fill[col] = total / count if count else np.nan
+            return pd.Series(fill, dtype=float)
+
+        if self.strategy == "median":
+            fill = {}
+            for col in stats[0]:
+                counts = pd.concat([part[col] for part in stats]).groupby(level=0).sum().sort_index()
+                fill[col] = self._median_from_counts(counts)
+            return pd.Series(fill, dtype=float)
+
+        if self.strategy == "mode":
+            fill = {}
+            for col in df.columns:
+                counts = pd.concat([part[col] for part in stats]).groupby(level=0, sort=False).sum()
+                if counts.empty:
+                    fill[col] = np.nan
+                    continue
+                tied = counts.index[counts == counts.max()]
+                try:
+                    fill[col] = sorted(tied)[0]
+                except TypeError:
+                    fill[col] = tied[0]
+            return pd.Series(fill, dtype=object).infer_objects()
+
+        return pd.Series(dtype=object)
+
+    @staticmethod
+    def _median_from_counts(counts):
+        total = int(counts.sum())
+        if total == 0:
+            return np.nan
+        cumulative = counts.cumsum().to_numpy()
+        values = counts.index.to_numpy(dtype=float)
+        lower = values[np.searchsorted(cumulative, (total - 1) // 2 + 1)]
+        upper = values[np.searchsorted(cumulative, total // 2 + 1)]
+        return np.mean([lower, upper])
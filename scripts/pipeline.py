@@ -0,0 +1,161 @@
+import asyncio
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from metrics import NULL_METRICS
+from memory_optimizer import fit_dtype
+
+
+class CleaningPipeline:
+    """Runs rule-based cleaning followed by AI cleaning of the rows that still need it.
+
+    An optional dirty-row detector keeps clean rows off the LLM path, an optional deduplicator
+    sends each distinct remaining row only once, and an optional memory optimizer shrinks the
+    rule-cleaned frame before it is held through AI cleaning and serialization. An optional value
+    normalizer maps the distinct values of categorical text columns through learned dictionaries
+    before rows are checked, so consistent spellings never reach row cleaning. An optional
+    near-duplicate detector merges rows that are the same record spelled differently before
+    anything else, so imputation statistics count each record once and merged rows fill each
+    other's gaps with real values rather than imputed ones. An optional rule set (rules.RuleSet)
+    nulls or drops violating values before rule-based cleaning, sends the rows that break its
+    flagged rules to the LLM along with the dirty ones, and describes those rules in the prompt
+    context. A column profile of the source (profiles.FrameProfile), when given, supplies
+    imputation values, dirty-row statistics and whole-dataset prompt statistics, so none of them
+    depends on the chunk at hand. Without an AI agent only rule-based cleaning runs.
+    """
+
+    def __init__(self, cleaner, ai_agent, deduplicator=None, dirty_detector=None, concurrency=4,
+                 requests_per_minute=None, tokens_per_minute=None, token_budget=None, metrics=None, optimizer=None,
+                 normalizer=None, near_duplicates=None, rules=None):
+        self.cleaner = cleaner
+        self.ai_agent = ai_agent
+        self.optimizer = optimizer
+        self.normalizer = normalizer
+        self.near_duplicates = near_duplicates
+        self.rules = rules
+        self.deduplicator = deduplicator
+        self.dirty_detector = dirty_detector
+        self.concurrency = concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.token_budget = token_budget
+        self.metrics = metrics or NULL_METRICS
+
+    async def arun(self, df, progress=None, profile=None, source=None, fingerprint=None):
+        """Applies rule-based then AI cleaning and returns the cleaned DataFrame.
+
+        `progress` is an optional object with add_total(batches) and advance(batches) hooks (see jobs.Job).
+        `source` names the data source whose normalization dictionaries and fitted imputers are used and extended.
+        `fingerprint` identifies the source's content (see profiles.fingerprint_file): fitted imputers are
+        only reused for the same content, so a changed file uploaded under the same name is refitted.
+        """
+        if self.near_duplicates is not None:
+            df = await asyncio.to_thread(self._merge_near_duplicates, df)
+        if self.rules is not None:
+            df = await asyncio.to_thread(self._timed, "enforce_rules", self.rules.enforce, df)
+
+        # Step 1: Rule-Based Cleaning, in a worker thread so the event loop stays responsive
+        imputer_source = source if fingerprint is None else f"{source}@{fingerprint}"
+        clean_data = partial(self.cleaner.clean_data, profile=profile, source=imputer_source)
+        df_cleaned = await asyncio.to_thread(self._timed, "clean_data", clean_data, df)
+        if self.optimizer is not None:
+            df_cleaned = await asyncio.to_thread(self._optimize, df_cleaned)
+
+        # Step 2: AI-Powered Cleaning
+        with self.metrics.stage("ai_clean", rows=len(df_cleaned)):
+            return await self.aclean_with_ai(df_cleaned, progress, profile, source)
+
+    def _timed(self, stage, function, df):
+        with self.metrics.stage(stage, rows=len(df)):
+            return function(df)
+
+    def _merge_near_duplicates(self, df):
+        with self.metrics.stage("near_duplicates", rows=len(df)):
+            merged, _ = self.near_duplicates.deduplicate(df)
+        if len(merged) < len(df):
+            print(f"🔗 Merged {len(df) - len(merged)} near-duplicate rows into {len(merged)} records")
+        self.metrics.inc("near_duplicates_merged_total", len(df) - len(merged))
+        return merged
+
+    def _optimize(self, df):
+        with self.metrics.stage("optimize_memory", rows=len(df)):
+            optimized, report = self.optimizer.optimize(df)
+        self.metrics.inc("memory_bytes_saved_total", int(report["bytes_saved"].sum()))
+        return optimized
+
+    async def aclean_with_ai(self, df, progress=None, profile=None, source=None):
+        """Sends the rows of df that need it through the AI agent and returns a DataFrame aligned with df."""
+        if self.ai_agent is None:
+            return df
+        context = self.rules.describe() if self.rules is not None else ""
+        statistics = profile.describe(df.columns) if profile is not None else ""
+        if self.normalizer is not None:
+            with self.metrics.stage("normalize_values", rows=len(df)):
+                dispatch = partial(self._adispatch, progress=progress, context=context, statistics=statistics)
+                df = await self.normalizer.anormalize(df, dispatch, source, profile)
+        if self.dirty_detector is None:
+            return await self._aclean_rows(df, progress, context, statistics)
+
+        detect = partial(self._problem_cells, profile=profile)
+        problems = await asyncio.to_thread(self._timed, "dirty_rows", detect, df)
+        positions = np.flatnonzero(problems.any(axis=1).to_numpy())
+        print(f"🧹 {len(positions)} of {len(df)} rows need AI cleaning")
+        if not len(positions):
+            return df.copy()
+
+        cleaned = await self._aclean_rows(df.iloc[positions], progress, context, statistics, problems.iloc[positions])
+        result = df.copy()
+        for col in cleaned.columns.intersection(result.columns):
+            result[col] = fit_dtype(result[col], cleaned[col])
+            values = self._values_for(result[col], cleaned[col])
+            if values is None:  # e.g. text returned for a bool or datetime column
+                result[col] = result[col].astype(object)
+                values = cleaned[col].to_numpy(dtype=object)
+            result.iloc[positions, result.columns.get_loc(col)] = values
+        return result
+
+    @staticmethod
+    def _values_for(column, values):
+        """values cast to the dtype of column (as widened by fit_dtype), or None if that dtype cannot hold them."""
+        dtype = column.dtype
+        if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            # fit_dtype made room for the cleaned numbers, so the cast loses nothing
+            return pd.to_numeric(values, errors="coerce").astype(dtype).to_numpy()
+        if isinstance(dtype, pd.CategoricalDtype):
+            return values.astype(dtype).to_numpy()
+        if dtype == object:
+            return values.to_numpy(dtype=object)
+        return values.to_numpy() if values.dtype == dtype else None
+
+    def _problem_cells(self, df, profile=None):
+        """Cells the dirty-row detector or a flagged rule marks; rows with any go to the LLM."""
+        cells = self.dirty_detector.cells(df, profile)
+        if self.rules is not None:
+            cells |= self.rules.select(("flag",)).cells(df)
+        return cells
+
+    async def _aclean_rows(self, df, progress=None, context="", statistics="", problems=None):
+        if self.deduplicator is None:
+            return await self._adispatch(df, progress, context, statistics, problems)
+
+        with self.metrics.stage("deduplicate", rows=len(df)):
+            unique, plan = self.deduplicator.deduplicate(df)
+            if problems is not None:
+                problems = self.deduplicator.collapse(problems, plan)
+        cleaned = await self._adispatch(unique, progress, context, statistics, problems)
+        return self.deduplicator.expand(cleaned, plan, df)
+
+    async def _adispatch(self, df, progress=None, context="", statistics="", problems=None):
+        return await self.ai_agent.aprocess_frame(
+            df,
+            concurrency=self.concurrency,
+            requests_per_minute=self.requests_per_minute,
+            tokens_per_minute=self.tokens_per_minute,
+            token_budget=self.token_budget,
+            progress=progress,
+            context=context,
+            statistics=statistics,
+            problems=problems,
+        )
@@ -0,0 +1,477 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../.cache/profiles.sqlite")
+DEFAULT_COMPRESSION = 100  # t-digest centroids scale with this; quantile error is roughly 1/compression
+DEFAULT_HEAVY_HITTERS = 100  # Most frequent values kept per column
+DEFAULT_HLL_PRECISION = 12  # 4096 registers, about 1.6% distinct-count error
+FINGERPRINT_READ_BYTES = 1024 * 1024
+
+
+def _plain(value):
+    """JSON-friendly form of a cell value (numpy scalars become Python numbers)."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _to_json(value):
+    """Stored form of a counted value: dates as {"datetime": ISO text}, other non-JSON types (Decimal) as text."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, date):  # Includes datetime and pd.Timestamp
+        return {"datetime": value.isoformat()}
+    return str(value)
+
+
+def _from_json(value):
+    return pd.Timestamp(value["datetime"]) if isinstance(value, dict) else value
+
+
+class TDigest:
+    """Mergeable quantile sketch: weighted centroids, small at the tails and larger near the median.
+
+    Merging sorts the centroids and cuts them where the k1 scale function crosses an integer,
+    so it is vectorized and needs no per-value Python loop. While there are fewer values than
+    about `compression`, every value is its own centroid and quantiles are exact.
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION, means=None, weights=None):
+        self.compression = compression
+        self.means = np.asarray(means if means is not None else [], dtype=float)
+        self.weights = np.asarray(weights if weights is not None else [], dtype=float)
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self._compress(np.concatenate([self.means, values]),
+                           np.concatenate([self.weights, np.ones(len(values))]))
+
+    def merge(self, other):
+        self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        if len(means) <= self.compression:
+            self.means, self.weights = means, weights
+            return
+        # Cluster boundaries at whole steps of k1(q) = compression / (2 pi) * asin(2q - 1).
+        left = (np.cumsum(weights) - weights) / total
+        scale = self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * left - 1, -1, 1))
+        groups = np.floor(scale - scale[0]).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q):
+        """Estimated q-quantile; for the median of exact (singleton) centroids this matches pandas."""
+        if not len(self.means):
+            return np.nan
+        if len(self.means) == 1:
+            return float(self.means[0])
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.count, centers, self.means))
+
+    def to_dict(self):
+        return {"compression": self.compression, "means": self.means.tolist(), "weights": self.weights.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["compression"], data["means"], data["weights"])
+
+
+class HeavyHitters:
+    """Counts of the most frequent values; exact while a column has at most `capacity` distinct values."""
+
+    def __init__(self, capacity=DEFAULT_HEAVY_HITTERS, counts=None, complete=True):
+        self.capacity = capacity
+        self.counts = counts or {}
+        self.complete = complete  # False once a value was dropped, so absent values may still occur
+
+    def update(self, values=None, counts=None):
+        """Adds values, or their precomputed value_counts()."""
+        counts = pd.Series(values).value_counts(sort=False) if counts is None else counts
+        if len(counts) > self.capacity:
+            # Values outside a chunk's top counts are dropped before merging, so counts become approximate.
+            counts = counts.nlargest(self.capacity)
+            self.complete = False
+        self._add(counts.items())
+
+    def merge(self, other):
+        self.complete = self.complete and other.complete
+        self._add(other.counts.items())
+
+    def _add(self, items):
+        for value, count in items:
+            value = _plain(value)
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+        if len(self.counts) > self.capacity:
+            kept = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:self.capacity]
+            self.counts = dict(kept)
+            self.complete = False
+
+    def top(self, n=None):
+        """[(value, count)] by descending count; ties go to the smallest value, as with DataFrame.mode."""
+        def order(item):
+            return -item[1], (0, item[0]) if isinstance(item[0], (int, float)) else (1, str(item[0]))
+        return sorted(self.counts.items(), key=order)[:n]
+
+    def to_dict(self):
+        # JSON object keys are strings, so counts are stored as [value, count] pairs.
+        return {"capacity": self.capacity, "counts": [[_to_json(value), count] for value, count in self.counts.items()],
+                "complete": self.complete}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["capacity"], {_from_json(value): count for value, count in data["counts"]}, data["complete"])
+
+
+class HyperLogLog:
+    """Mergeable distinct-count estimate over 64-bit value hashes."""
+
+    def __init__(self, precision=DEFAULT_HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = (np.zeros(1 << precision, dtype=np.uint8) if registers is None
+                          else np.asarray(registers, dtype=np.uint8))
+
+    def update(self, values):
+        if not len(values):
+            return
+        hashes = pd.util.hash_array(np.asarray(values, dtype=object))
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        # Leading zeros of the remaining bits, plus one; frexp's exponent is the bit length.
+        ranks = (64 - self.precision) - np.frexp(rest.astype(np.float64))[1] + 1
+        np.maximum.at(self.registers, index, ranks.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(np.exp2(-self.registers.astype(float)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # Linear counting for small cardinalities
+        return int(round(estimate))
+
+    def to_dict(self):
+        return {"precision": self.precision, "registers": self.registers.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["precision"], data["registers"])
+
+
+class ColumnProfile:
+    """Mergeable statistics of one column: counts, sum, range, quantiles, frequent values and distinct count.
+
+    Text columns are also parsed as numbers, so a column of numbers stored as text gets numeric
+    statistics and is inferred as numeric when every present value parses, as CleaningEngine does.
+    Text chunks whose first values are not numbers are not parsed further.
+    """
+
+    def __init__(self, count=0, nulls=0, numeric_count=0, total=0.0, minimum=None, maximum=None, digest=None,
+                 heavy_hitters=None, distinct=None, dtype=None):
+        self.count = count  # Non-null values
+        self.nulls = nulls
+        self.numeric_count = numeric_count  # Non-null values that are or parse as numbers
+        self.total = total
+        self.minimum = minimum
+        self.maximum = maximum
+        self.digest = digest or TDigest()
+        self.heavy_hitters = heavy_hitters or HeavyHitters()
+        self.distinct = distinct or HyperLogLog()
+        self.dtype = dtype
+
+    def update(self, values):
+        present = values.dropna()
+        self.count += len(present)
+        self.nulls += len(values) - len(present)
+        self.dtype = self.dtype or str(values.dtype)
+        if pd.api.types.is_bool_dtype(values):
+            numbers = pd.Series([], dtype=float)
+        elif pd.api.types.is_numeric_dtype(values):
+            numbers = present.astype(float)
+        else:
+            numbers = self._parse_numbers(present if present.dtype == object else present.astype(str))
+        if len(numbers):
+            self.numeric_count += len(numbers)
+            self.total = math.fsum([self.total, math.fsum(numbers.to_numpy())])
+            low, high = float(numbers.min()), float(numbers.max())
+            self.minimum = low if self.minimum is None else min(self.minimum, low)
+            self.maximum = high if self.maximum is None else max(self.maximum, high)
+            self.digest.update(numbers.to_numpy())
+        # Distinct values are hashed once each; the distinct-count sketch ignores repeats anyway.
+        counts = present.value_counts(sort=False)
+        self.heavy_hitters.update(counts=counts)
+        self.distinct.update(counts.index.to_numpy())
+
+    @staticmethod
+    def _parse_numbers(text, probe=100):
+        # Probe a prefix first so that plainly textual columns are not parsed in full, as CleaningEngine does.
+        if not len(text) or pd.to_numeric(text.iloc[:probe], errors="coerce").isna().all():
+            return pd.Series([], dtype=float)
+        return pd.to_numeric(text, errors="coerce").dropna().astype(float)
+
+    def merge(self, other):
+        self.count += other.count
+        self.nulls += other.nulls
+        self.numeric_count += other.numeric_count
+        self.total = math.fsum([self.total, other.total])
+        for name, pick in (("minimum", min), ("maximum", max)):
+            mine, theirs = getattr(self, name), getattr(other, name)
+            setattr(self, name, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+        self.digest.merge(other.digest)
+        self.heavy_hitters.merge(other.heavy_hitters)
+        self.distinct.merge(other.distinct)
+        self.dtype = self.dtype or other.dtype
+
+    @property
+    def inferred_type(self):
+        if self.count == 0:
+            return "empty"
+        return "numeric" if self.numeric_count == self.count else "text"
+
+    @property
+    def numeric_share(self):
+        return self.numeric_count / self.count if self.count else 0.0
+
+    @property
+    def mean(self):
+        return self.total / self.numeric_count if self.numeric_count else np.nan
+
+    @property
+    def median(self):
+        """Exact while every distinct value is counted (typical of whole-number columns), else from the t-digest."""
+        if self.inferred_type != "numeric" or not self.heavy_hitters.complete:
+            return self.digest.quantile(0.5)
+        counts = pd.Series(self.heavy_hitters.counts)
+        counts.index = pd.to_numeric(counts.index)
+        counts = counts.groupby(level=0).sum().sort_index()
+        cumulative = counts.cumsum().to_numpy()
+        total = int(cumulative[-1])
+        lower = counts.index[np.searchsorted(cumulative, (total - 1) // 2 + 1)]
+        upper = counts.index[np.searchsorted(cumulative, total // 2 + 1)]
+        return float((lower + upper) / 2)
+
+    @property
+    def mode(self):
+        top = self.heavy_hitters.top(1)
+        return top[0][0] if top else None
+
+    def fill_value(self, strategy):
+        """The value mean, median or mode imputation would use, or None."""
+        if strategy in ("mean", "median"):
+            if self.inferred_type != "numeric":
+                return None
+            return self.mean if strategy == "mean" else self.median
+        if strategy != "mode":
+            return None
+        # Numbers stored as text are counted as text; the fill for a numeric column must be a number.
+        mode = self.mode
+        return float(mode) if isinstance(mode, str) and self.inferred_type == "numeric" else mode
+
+    def describe(self, rows, max_values=5):
+        """One line summarizing the column for an LLM prompt."""
+        parts = [self.inferred_type]
+        if self.nulls:
+            parts.append(f"{self.nulls / rows:.0%} missing")
+        if self.inferred_type == "numeric":
+            parts.append(f"mean {self.mean:.4g}, median {self.median:.4g}, "
+                         f"range {self.minimum:.4g} to {self.maximum:.4g}")
+        else:
+            parts.append(f"~{self.distinct.estimate()} distinct")
+            common = ", ".join(f"{value} ({count / self.count:.0%})"
+                               for value, count in self.heavy_hitters.top(max_values) if count >= 0.01 * self.count)
+            if common:
+                parts.append(f"most common: {common}")
+        return "; ".join(parts)
+
+    def to_dict(self):
+        return {
+            "count": self.count, "nulls": self.nulls, "numeric_count": self.numeric_count, "total": self.total,
+            "minimum": self.minimum, "maximum": self.maximum, "dtype": self.dtype,
+            "digest": self.digest.to_dict(), "heavy_hitters": self.heavy_hitters.to_dict(),
+            "distinct": self.distinct.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["count"], data["nulls"], data["numeric_count"], data["total"], data["minimum"],
+                   data["maximum"], TDigest.from_dict(data["digest"]), HeavyHitters.from_dict(data["heavy_hitters"]),
+                   HyperLogLog.from_dict(data["distinct"]), data["dtype"])
+
+
+class FrameProfile:
+    """Column profiles of a whole source, built once and then reused by every chunk and request.
+
+    Profiles only grow: update() folds in new rows and merge() combines profiles of partitions.
+    """
+
+    def __init__(self, rows=0, columns=None):
+        self.rows = rows
+        self.columns = columns or {}
+
+    @classmethod
+    def from_frame(cls, df):
+        profile = cls()
+        profile.update(df)
+        return profile
+
+    def update(self, df):
+        self.rows += len(df)
+        for col in df.columns:
+            self.columns.setdefault(str(col), ColumnProfile()).update(df[col])
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        for col, column in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(column)
+            else:
+                self.columns[col] = ColumnProfile.from_dict(column.to_dict())
+        return self
+
+    def column(self, col):
+        return self.columns.get(str(col))
+
+    def fill_values(self, strategy, columns=None, numeric_only=False):
+        """{column: fill value} for strategy over the given columns (every profiled column by default)."""
+        fill = {}
+        for col in columns if columns is not None else self.columns:
+            column = self.column(col)
+            if column is None or (numeric_only and column.inferred_type != "numeric"):
+                continue
+            value = column.fill_value(strategy)
+            if value is not None and not (isinstance(value, float) and math.isnan(value)):
+                fill[col] = value
+        return fill
+
+    def describe(self, columns=None, max_values=5):
+        """Per-column summary lines to give the LLM whole-dataset context for a batch."""
+        lines = [f"{col}: {self.column(col).describe(self.rows, max_values)}"
+                 for col in (columns if columns is not None else self.columns) if self.column(col) is not None]
+        if not lines:
+            return ""
+        return f"Column statistics over all {self.rows} rows:\n" + "\n".join(lines)
+
+    def to_dict(self):
+        return {"rows": self.rows, "columns": {col: column.to_dict() for col, column in self.columns.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["rows"], {col: ColumnProfile.from_dict(column) for col, column in data["columns"].items()})
+
+
+def fingerprint_file(file, *parts):
+    """Content hash of a binary file object (read in blocks, then rewound), combined with any extra parts."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+    file.seek(0)
+    while block := file.read(FINGERPRINT_READ_BYTES):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def source_key(*parts):
+    """Key for a source that cannot be hashed by content (a query, an API URL)."""
+    return hashlib.blake2b(json.dumps(parts, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+
+class ProfileCache:
+    """Profiles by source fingerprint, in an in-memory LRU backed by SQLite.
+
+    Entries keyed by content never go stale. Entries for queries and APIs are refreshed after
+    ttl_seconds, since the data behind the same key can change.
+    """
+
+    def __init__(self, path=DEFAULT_PROFILE_PATH, max_memory_entries=64, ttl_seconds=3600):
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS profiles ("
+                "key TEXT PRIMARY KEY, profile TEXT NOT NULL, updated_at REAL NOT NULL, expires INTEGER NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _fresh(self, updated_at, expires):
+        return not expires or self.ttl_seconds is None or time.time() - updated_at <= self.ttl_seconds
+
+    def get(self, key):
+        """Returns the cached FrameProfile for key, or None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT profile, updated_at, expires FROM profiles WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (FrameProfile.from_dict(json.loads(row[0])), row[1], bool(row[2]))
+                    self._remember(key, entry)
+            if entry is None or not self._fresh(entry[1], entry[2]):
+                self.misses += 1
+                return None
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, profile, expires=False):
+        """Stores a profile; expires=True for keys whose data can change (queries, APIs)."""
+        entry = (profile, time.time(), expires)
+        with self._lock:
+            self._remember(key, entry)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO profiles (key, profile, updated_at, expires) VALUES (?, ?, ?, ?)",
+                        (key, json.dumps(profile.to_dict()), entry[1], int(expires)),
+                    )
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+
+async def aprofile_chunks(chunks, profile, on_done, prepare=None):
+    """Passes chunks through while folding each into profile; calls on_done(profile) after the last one.
+
+    `prepare`, if given, maps a chunk to what the profile should describe (the chunk itself is passed on).
+    """
+    async for chunk in chunks:
+        await asyncio.to_thread(profile.update, chunk if prepare is None else await asyncio.to_thread(prepare, chunk))
+        yield chunk
+    on_done(profile)
@@ -0,0 +1,51 @@
+import asyncio
+import random
+import time
+
+
+class TokenBucket:
+    """Async token bucket that refills continuously at a fixed rate."""
+
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    async def acquire(self, amount=1):
+        """Waits until `amount` tokens are available and takes them."""
+        # A request larger than the bucket could never be served, so it waits for a full bucket instead.
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.refill_per_second)
+
+
+class RateLimiter:
+    """Combines requests-per-minute and tokens-per-minute buckets; either limit may be None."""
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.request_bucket = TokenBucket(requests_per_minute, requests_per_minute / 60) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60) if tokens_per_minute else None
+
+    async def acquire(self, tokens=0):
+        """Waits for one request slot and `tokens` tokens of budget."""
+        if self.request_bucket is not None:
+            await self.request_bucket.acquire(1)
+        if self.token_bucket is not None and tokens:
+            await self.token_bucket.acquire(tokens)
+
+
+def backoff_delay(attempt, base=1.0, maximum=30.0):
+    """Returns an exponential backoff delay with full jitter for a 0-based retry attempt."""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
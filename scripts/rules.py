@@ -0,0 +1,357 @@
+import json
+from numbers import Number
+
+import numpy as np
+import pandas as pd
+
+from metrics import NULL_METRICS
+
+RULE_ACTIONS = ("flag", "null", "drop")  # Send the row to the LLM, null the value before imputation, or drop the row
+
+
+class ColumnView:
+    """Lazily computed forms of one column, shared by every rule on it so each is built once per frame.
+
+    Text checks run on the column's distinct values and are mapped back to rows through their codes.
+    """
+
+    def __init__(self, values):
+        self.values = values
+        self._cache = {}
+
+    def _get(self, name, build):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    @property
+    def present(self):
+        return self._get("present", lambda: self.values.notna().to_numpy())
+
+    @property
+    def numbers(self):
+        def build():
+            if pd.api.types.is_numeric_dtype(self.values) and not pd.api.types.is_bool_dtype(self.values):
+                return self.values.to_numpy(dtype=float, na_value=np.nan)
+            # Parse each distinct value once
+            distinct = pd.Series(self._factorized()[1], dtype=object)
+            numbers = pd.to_numeric(distinct, errors="coerce").to_numpy(dtype=float)
+            return np.where(self.codes >= 0, numbers[np.maximum(self.codes, 0)], np.nan) if len(numbers) else (
+                np.full(len(self.values), np.nan))
+        return self._get("numbers", build)
+
+    @property
+    def codes(self):
+        return self._factorized()[0]
+
+    @property
+    def uniques(self):
+        """The distinct non-null values as strings, in code order."""
+        return self._get("uniques", lambda: pd.Series(self._factorized()[1], dtype=object).astype(str))
+
+    @property
+    def text(self):
+        """The values as strings (None for nulls), as an object array."""
+        def build():
+            if not len(self.uniques):
+                return np.full(len(self.values), None)
+            return np.where(self.codes >= 0, self.uniques.to_numpy()[np.maximum(self.codes, 0)], None)
+        return self._get("text", build)
+
+    def _factorized(self):
+        def build():
+            codes, uniques = pd.factorize(self.values)
+            return codes, np.asarray(uniques, dtype=object)
+        return self._get("factorized", build)
+
+    def per_value(self, flags):
+        """Row mask from a mask over the distinct values; nulls are never flagged."""
+        flags = np.asarray(flags, dtype=bool)
+        if not len(flags):
+            return np.zeros(len(self.values), dtype=bool)
+        return np.where(self.codes >= 0, flags[np.maximum(self.codes, 0)], False)
+
+
+def _between(view, min_value=None, max_value=None, strict_min=False, strict_max=False):
+    numbers = view.numbers
+    ok = ~np.isnan(numbers)
+    with np.errstate(invalid="ignore"):
+        if min_value is not None:
+            ok &= numbers > min_value if strict_min else numbers >= min_value
+        if max_value is not None:
+            ok &= numbers < max_value if strict_max else numbers <= max_value
+    return view.present & ~ok
+
+
+def _lengths_between(view, min_value=None, max_value=None):
+    lengths = view.uniques.str.len()
+    ok = np.ones(len(lengths), dtype=bool)
+    if min_value is not None:
+        ok &= (lengths >= min_value).to_numpy()
+    if max_value is not None:
+        ok &= (lengths <= max_value).to_numpy()
+    return view.per_value(~ok)
+
+
+def _numeric_set(view, value_set):
+    """The set as floats when both it and the column are numeric (None otherwise), so 1 matches 1.0."""
+    values = view.values
+    if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+        return None
+    if not all(isinstance(value, Number) and not isinstance(value, bool) for value in value_set):
+        return None
+    return np.asarray(list(value_set), dtype=float)
+
+
+def _in_set(view, value_set):
+    allowed = _numeric_set(view, value_set)
+    if allowed is not None:
+        return view.present & ~np.isin(view.numbers, allowed)
+    allowed = pd.Index([str(value) for value in value_set])
+    return view.per_value(~view.uniques.isin(allowed).to_numpy())
+
+
+def _not_in_set(view, value_set):
+    denied = _numeric_set(view, value_set)
+    if denied is not None:
+        return view.present & np.isin(view.numbers, denied)
+    return view.per_value(view.uniques.isin(pd.Index([str(value) for value in value_set])).to_numpy())
+
+
+def _match_regex(view, regex):
+    return view.per_value(~view.uniques.str.contains(regex, regex=True).to_numpy())
+
+
+def _not_match_regex(view, regex):
+    return view.per_value(view.uniques.str.contains(regex, regex=True).to_numpy())
+
+
+def _not_null(view):
+    return ~view.present
+
+
+def _unique(view):
+    return view.present & pd.Series(view.codes).duplicated(keep=False).to_numpy()
+
+
+def _compound_unique(views):
+    codes = pd.DataFrame({i: view.codes for i, view in enumerate(views)})
+    present = np.logical_and.reduce([view.present for view in views])
+    return present & codes.duplicated(keep=False).to_numpy()
+
+
+def _a_greater_than_b(views, or_equal=False):
+    a, b = views[0].numbers, views[1].numbers
+    with np.errstate(invalid="ignore"):
+        ok = a >= b if or_equal else a > b
+    return views[0].present & views[1].present & ~ok
+
+
+def _pair_equal(views):
+    a, b = views
+    return a.present & b.present & (a.text != b.text)
+
+
+def _range(kwargs):
+    low, high = kwargs.get("min_value"), kwargs.get("max_value")
+    if low is not None and high is not None:
+        return f"between {low} and {high}"
+    return f"of at least {low}" if low is not None else f"of at most {high}"
+
+
+# expectation_type: (check, short name, describe(kwargs)); single-column checks take a ColumnView,
+# multi-column ones a list of them, and every check returns a boolean violation mask over rows.
+EXPECTATIONS = {
+    "expect_column_values_to_not_be_null": (_not_null, "not_null", lambda kw: "is never null"),
+    "expect_column_values_to_be_between": (_between, "between", lambda kw: f"is a number {_range(kw)}"),
+    "expect_column_value_lengths_to_be_between": (_lengths_between, "length",
+                                                  lambda kw: f"has a length {_range(kw)}"),
+    "expect_column_values_to_be_in_set": (_in_set, "in_set", lambda kw: f"is one of {list(kw['value_set'])}"),
+    "expect_column_values_to_not_be_in_set": (_not_in_set, "not_in_set",
+                                              lambda kw: f"is none of {list(kw['value_set'])}"),
+    "expect_column_values_to_match_regex": (_match_regex, "regex", lambda kw: f"matches /{kw['regex']}/"),
+    "expect_column_values_to_not_match_regex": (_not_match_regex, "not_regex",
+                                                lambda kw: f"does not match /{kw['regex']}/"),
+    "expect_column_values_to_be_unique": (_unique, "unique", lambda kw: "is unique"),
+    "expect_compound_columns_to_be_unique": (_compound_unique, "unique", lambda kw: "are unique together"),
+    "expect_column_pair_values_a_to_be_greater_than_b": (
+        _a_greater_than_b, "greater", lambda kw: f"{kw['column_A']} is greater than "
+                                                 f"{'or equal to ' if kw.get('or_equal') else ''}{kw['column_B']}"),
+    "expect_column_pair_values_to_be_equal": (_pair_equal, "equal", lambda kw: "are equal"),
+}
+_UNIQUENESS = ("expect_column_values_to_be_unique", "expect_compound_columns_to_be_unique")
+_OPTIONS = {"mostly", "result_format", "include_config", "catch_exceptions", "meta"}
+
+
+class Rule:
+    """One expectation: a Great Expectations expectation type with its kwargs, and an action on violations."""
+
+    def __init__(self, expectation_type, kwargs=None, action="flag", name=None):
+        if expectation_type not in EXPECTATIONS:
+            raise ValueError(f"Unsupported expectation {expectation_type!r}. Use one of {', '.join(EXPECTATIONS)}.")
+        if action not in RULE_ACTIONS:
+            raise ValueError(f"Rule action must be one of {', '.join(RULE_ACTIONS)}, not {action!r}.")
+        kwargs = dict(kwargs or {})
+        self.expectation_type = expectation_type
+        self.mostly = kwargs.pop("mostly", 1.0)  # Share of non-null values that must pass for the rule to succeed
+        self.kwargs = {key: value for key, value in kwargs.items() if key not in _OPTIONS}
+        if "column" in self.kwargs:
+            self.columns = [self.kwargs.pop("column")]
+        elif "column_list" in self.kwargs:
+            self.columns = list(self.kwargs.pop("column_list"))
+        else:
+            self.columns = [self.kwargs.pop("column_A"), self.kwargs.pop("column_B")]
+        self.action = action
+        self.name = name or f"{'+'.join(map(str, self.columns))}:{EXPECTATIONS[expectation_type][1]}"
+
+    @property
+    def single_column(self):
+        return self.expectation_type.startswith("expect_column_value") and "pair" not in self.expectation_type
+
+    def evaluate(self, views):
+        check = EXPECTATIONS[self.expectation_type][0]
+        if self.single_column:
+            return check(views[self.columns[0]], **self.kwargs)
+        return check([views[col] for col in self.columns], **self.kwargs)
+
+    def describe(self):
+        kwargs = dict(self.kwargs)
+        if not self.single_column and len(self.columns) == 2:
+            kwargs.update(column_A=self.columns[0], column_B=self.columns[1])
+        text = EXPECTATIONS[self.expectation_type][2](kwargs)
+        if self.expectation_type == "expect_column_pair_values_a_to_be_greater_than_b":
+            return text
+        return f"{', '.join(map(str, self.columns))} {text}"
+
+    def to_dict(self):
+        kwargs = dict(self.kwargs)
+        if self.single_column:
+            kwargs["column"] = self.columns[0]
+        elif self.expectation_type == "expect_compound_columns_to_be_unique":
+            kwargs["column_list"] = self.columns
+        else:
+            kwargs.update(column_A=self.columns[0], column_B=self.columns[1])
+        if self.mostly != 1.0:
+            kwargs["mostly"] = self.mostly
+        return {"expectation_type": self.expectation_type, "kwargs": kwargs, "meta": {"action": self.action}}
+
+
+class RuleSet:
+    """Declarative data-quality rules, evaluated together in one vectorized pass per frame or chunk.
+
+    Rules are read from an expectation suite in Great Expectations' JSON layout
+    ({"expectations": [{"expectation_type", "kwargs", "meta"}]}); `meta.action` says what happens to
+    violations: "flag" sends the row to the LLM, "null" clears the value before imputation and "drop"
+    removes the row. Every column is converted (to numbers, to distinct text values) at most once,
+    however many rules use it, and text checks run once per distinct value. Uniqueness is checked
+    within the frame given, not across the chunks of a source. Nulls pass every rule but not_null.
+    """
+
+    def __init__(self, rules=None, name="default", metrics=None):
+        self.rules = list(rules or [])
+        self.name = name
+        self.metrics = metrics or NULL_METRICS
+        names = [rule.name for rule in self.rules]
+        for position, rule in enumerate(self.rules):
+            if names.count(rule.name) > 1:
+                rule.name = f"{rule.name}#{names[:position + 1].count(rule.name)}"
+
+    @classmethod
+    def from_dict(cls, suite, metrics=None):
+        rules = [Rule(item["expectation_type"], item.get("kwargs"), (item.get("meta") or {}).get("action", "flag"))
+                 for item in suite.get("expectations", [])]
+        return cls(rules, suite.get("expectation_suite_name", "default"), metrics)
+
+    @classmethod
+    def load(cls, path, metrics=None):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f), metrics)
+
+    def to_dict(self):
+        return {"expectation_suite_name": self.name, "expectations": [rule.to_dict() for rule in self.rules]}
+
+    def select(self, actions):
+        """The rules with one of the given actions, as a RuleSet sharing the metrics."""
+        return RuleSet([rule for rule in self.rules if rule.action in actions], self.name, self.metrics)
+
+    def evaluate(self, df):
+        """Returns a boolean frame with one column per applicable rule: True where a row violates it.
+
+        Rules on columns df does not have are skipped.
+        """
+        rules = [rule for rule in self.rules if all(col in df.columns for col in rule.columns)]
+        views = {col: ColumnView(df[col]) for col in dict.fromkeys(col for rule in rules for col in rule.columns)}
+        return pd.DataFrame({rule.name: rule.evaluate(views) for rule in rules}, index=df.index,
+                            columns=[rule.name for rule in rules], dtype=bool)
+
+    def report(self, df, violations=None):
+        """Per-rule violation counts and whether each rule holds for at least `mostly` of the non-null values."""
+        violations = self.evaluate(df) if violations is None else violations
+        rows = []
+        for rule in self.rules:
+            if rule.name not in violations.columns:
+                continue
+            count = int(violations[rule.name].sum())
+            checked = int(df[rule.columns].notna().all(axis=1).sum()) if rule.single_column else len(df)
+            if rule.expectation_type == "expect_column_values_to_not_be_null":
+                checked = len(df)
+            rows.append({"rule": rule.name, "action": rule.action, "violations": count,
+                         "success": count <= (1 - rule.mostly) * checked})
+        return pd.DataFrame(rows, columns=["rule", "action", "violations", "success"])
+
+    def mask(self, df):
+        """True for every row that violates a rule (counted per rule in rule_violations_total)."""
+        return self.cells(df).any(axis=1)
+
+    def cells(self, df):
+        """A boolean frame shaped like df: True for the values of every rule a row violates (counted like mask)."""
+        violations = self.evaluate(df)
+        flags = np.zeros(df.shape, dtype=bool)
+        positions = {col: position for position, col in enumerate(df.columns)}
+        for rule in self.rules:
+            if rule.name in violations.columns:
+                rows = violations[rule.name].to_numpy()
+                for col in rule.columns:
+                    flags[:, positions[col]] |= rows
+                self.metrics.inc("rule_violations_total", int(rows.sum()), rule=rule.name, action=rule.action)
+        return pd.DataFrame(flags, index=df.index, columns=df.columns)
+
+    def enforce(self, df, record=True):
+        """Applies the "null" and "drop" rules: violating values become null and violating rows are removed.
+
+        With record=False nothing is counted or printed (used when profiling what the pipeline will see).
+        """
+        enforced = self.select(("null", "drop"))
+        if not enforced.rules:
+            return df
+        violations = enforced.evaluate(df)
+        result = df.copy(deep=False)
+        for rule in enforced.rules:
+            if rule.name not in violations.columns or rule.action != "null":
+                continue
+            flags = violations[rule.name].to_numpy()
+            if flags.any():
+                for col in rule.columns:
+                    result[col] = result[col].mask(flags)
+            if record:
+                self.metrics.inc("rule_violations_total", int(flags.sum()), rule=rule.name, action=rule.action)
+        dropped = np.zeros(len(df), dtype=bool)
+        for rule in enforced.rules:
+            if rule.name in violations.columns and rule.action == "drop":
+                flags = violations[rule.name].to_numpy()
+                if rule.expectation_type in _UNIQUENESS:
+                    flags = flags & df[rule.columns].duplicated().to_numpy()  # Keep the first of each duplicate
+                dropped |= flags
+                if record:
+                    self.metrics.inc("rule_violations_total", int(flags.sum()), rule=rule.name,
+                                     action=rule.action)
+        nulled = int(sum(violations[rule.name].sum() for rule in enforced.rules
+                         if rule.action == "null" and rule.name in violations.columns))
+        if record and (nulled or dropped.any()):
+            print(f"📏 Rules nulled {nulled} values and dropped {int(dropped.sum())} rows")
+        return result[~dropped] if dropped.any() else result
+
+    def describe(self):
+        """The flagged rules as a prompt line, so the LLM knows what the values must satisfy."""
+        flagged = [rule.describe() for rule in self.rules if rule.action == "flag"]
+        return "Data rules: " + "; ".join(flagged) + "." if flagged else ""
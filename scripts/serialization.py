@@ -0,0 +1,300 @@
+import io
+import json
+import string
+from datetime import datetime
+from typing import Annotated, Literal, Optional, Union
+
+import numpy as np
+import pandas as pd
+from pydantic import Field, ValidationError, create_model
+
+from batching import render_csv_rows
+from memory_optimizer import fit_dtype
+
+ROW_ID = "_row"
+
+
+class SerializationError(ValueError):
+    """Raised when an LLM response does not match the format it was asked for."""
+
+
+def _strip_code_fence(text):
+    """Removes a surrounding ``` fence, which models add even when told not to."""
+    lines = text.strip().splitlines()
+    if lines and lines[0].startswith("```"):
+        lines = lines[1:]
+        if lines and lines[-1].strip() == "```":
+            lines = lines[:-1]
+    return "\n".join(lines)
+
+
+def _restore_types(parsed, df_batch):
+    """Converts parsed columns back to numbers where the input column was numeric."""
+    for col in parsed.columns:
+        if pd.api.types.is_numeric_dtype(df_batch[col]):
+            converted = pd.to_numeric(parsed[col], errors="coerce")
+            if converted.notna().sum() == parsed[col].notna().sum():
+                parsed[col] = converted
+    return parsed.set_axis(df_batch.index, axis=0)
+
+
+class PromptFormat:
+    """How a batch is rendered into a prompt and how the matching response is parsed back.
+
+    `problems`, where accepted, is an optional boolean frame aligned with the batch marking the cells
+    that still need cleaning (see CleaningPipeline); formats that send only part of a batch use it.
+    """
+
+    name = None
+    instructions = None
+
+    def render_rows(self, df, problems=None):
+        """Returns the per-batch header and one rendered line per row, used for token budgeting."""
+        raise NotImplementedError
+
+    def serialize(self, df, problems=None):
+        """Renders a whole batch for the prompt."""
+        header, rows = self.render_rows(df, problems)
+        return "\n".join([header, *rows])
+
+    def parse(self, text, df_batch, problems=None):
+        """Parses the response for df_batch into a DataFrame indexed like df_batch."""
+        raise NotImplementedError
+
+    def needs_llm(self, df_batch, problems=None):
+        """Whether the batch has anything to send; batches that don't are returned unchanged."""
+        return True
+
+
+class CsvFormat(PromptFormat):
+    """Header-once CSV without the index."""
+
+    name = "csv"
+    instructions = (
+        "Return only the cleaned rows as CSV with exactly the same header line, "
+        "one line per input row in the same order, and nothing else."
+    )
+
+    def render_rows(self, df, problems=None):
+        return render_csv_rows(df)
+
+    def parse(self, text, df_batch, problems=None):
+        columns = [str(col) for col in df_batch.columns]
+        try:
+            parsed = pd.read_csv(io.StringIO(_strip_code_fence(text)), dtype=str, keep_default_na=False)
+        except Exception as e:
+            raise SerializationError(f"Response is not valid CSV: {e}") from e
+        if list(parsed.columns) != columns:
+            raise SerializationError(f"Expected header {columns}, got {list(parsed.columns)}.")
+        if len(parsed) != len(df_batch):
+            raise SerializationError(f"Expected {len(df_batch)} rows, got {len(parsed)}.")
+        parsed = parsed.replace("", None)
+        return _restore_types(parsed.set_axis(df_batch.columns, axis=1), df_batch)
+
+
+class JsonLinesFormat(PromptFormat):
+    """One JSON object per row with single-letter keys, declared once in a legend line."""
+
+    name = "jsonl"
+    instructions = (
+        "The first line maps short keys to column names. Return only the cleaned rows as JSON lines "
+        "using the same short keys, one object per input row in the same order, and nothing else."
+    )
+
+    @staticmethod
+    def short_keys(columns):
+        letters = string.ascii_lowercase
+        return [letters[i] if i < len(letters) else f"k{i}" for i in range(len(columns))]
+
+    def render_rows(self, df, problems=None):
+        keys = self.short_keys(df.columns)
+        legend = json.dumps(dict(zip(keys, map(str, df.columns))), separators=(",", ":"))
+        records = df.set_axis(keys, axis=1).to_json(orient="records", lines=True, date_format="iso")
+        return legend, records.split("\n")[:-1]
+
+    def parse(self, text, df_batch, problems=None):
+        keys = self.short_keys(df_batch.columns)
+        rows = []
+        for line in _strip_code_fence(text).splitlines():
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise SerializationError(f"Invalid JSON line {line!r}: {e}") from e
+            if not isinstance(row, dict) or set(row) != set(keys):
+                # A missing key would silently become a null, so partial rows count as malformed too
+                raise SerializationError(f"Expected keys {keys} in {line!r}.")
+            rows.append(row)
+        if len(rows) == len(df_batch) + 1 and rows[0] == dict(zip(keys, map(str, df_batch.columns))):
+            # Models sometimes echo the legend line back.
+            rows = rows[1:]
+        if len(rows) != len(df_batch):
+            raise SerializationError(f"Expected {len(df_batch)} rows, got {len(rows)}.")
+        parsed = pd.DataFrame.from_records(rows, columns=keys).set_axis(df_batch.columns, axis=1)
+        return _restore_types(parsed, df_batch)
+
+
+class DirtyColumnsFormat(PromptFormat):
+    """Sends only a row id plus the columns that still have problems, in header-once CSV."""
+
+    name = "dirty"
+    instructions = (
+        "Return only the cleaned rows as CSV with exactly the same header line, keeping the _row "
+        "column unchanged, one line per input row, and nothing else."
+    )
+
+    def __init__(self):
+        self.csv = CsvFormat()
+
+    @staticmethod
+    def problem_columns(df, problems=None):
+        """Columns with nulls or flagged cells in problems.
+
+        Without problems, text columns with padded whitespace or numeric-looking strings count too;
+        casing and vocabulary problems need the whole frame to spot, so pass the detector's flags.
+        """
+        columns = []
+        for col in df.columns:
+            values = df[col]
+            if values.isna().any() or (problems is not None and problems[col].any()):
+                columns.append(col)
+            elif problems is None and values.dtype == object:
+                text = values.astype(str)
+                if (text != text.str.strip()).any() or pd.to_numeric(text, errors="coerce").notna().any():
+                    columns.append(col)
+        return columns
+
+    def _payload(self, df, problems=None):
+        payload = df[self.problem_columns(df, problems)].reset_index(drop=True)
+        payload.insert(0, ROW_ID, range(len(payload)))
+        return payload
+
+    def render_rows(self, df, problems=None):
+        return self.csv.render_rows(self._payload(df, problems))
+
+    def needs_llm(self, df_batch, problems=None):
+        return bool(self.problem_columns(df_batch, problems))
+
+    def parse(self, text, df_batch, problems=None):
+        payload = self._payload(df_batch, problems)
+        if payload.shape[1] == 1:
+            return df_batch.copy()
+        parsed = self.csv.parse(text, payload)
+        positions = pd.to_numeric(parsed[ROW_ID], errors="coerce")
+        if positions.isna().any() or sorted(positions.astype(int)) != list(range(len(df_batch))):
+            raise SerializationError(f"Response {ROW_ID} values do not match the batch rows.")
+        parsed = parsed.set_axis(positions.astype(int), axis=0).sort_index()
+        result = df_batch.copy()
+        for col in parsed.columns.drop(ROW_ID):
+            result[col] = parsed[col].to_numpy()
+        return result
+
+
+def _value_type(dtype):
+    """Python type a patched value must validate as for a column of this dtype."""
+    if pd.api.types.is_bool_dtype(dtype):
+        return bool
+    if pd.api.types.is_integer_dtype(dtype):
+        return int
+    if pd.api.types.is_float_dtype(dtype):
+        return float
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return datetime
+    return str
+
+
+def _type_name(dtype):
+    return {bool: "boolean", int: "integer", float: "number", datetime: "datetime"}.get(_value_type(dtype), "string")
+
+
+def patch_schema(df_batch):
+    """Builds a Pydantic model for {"patches": [{"row", "column", "value"}]} from the batch's dtypes.
+
+    Each patch is discriminated on its column, so its value is validated (and coerced) as that column's
+    type, and row must be one of the batch's _row ids.
+    """
+    patches = []
+    for position, col in enumerate(df_batch.columns):
+        patches.append(create_model(
+            f"Patch{position}",
+            row=(int, Field(ge=0, lt=len(df_batch))),
+            column=(Literal[str(col)], ...),
+            value=(Optional[_value_type(df_batch[col].dtype)], None),
+        ))
+    patch = patches[0] if len(patches) == 1 else Annotated[Union[tuple(patches)], Field(discriminator="column")]
+    return create_model("PatchSet", patches=(list[patch], ...))
+
+
+class PatchFormat(PromptFormat):
+    """Sends rows as CSV with a _row id and asks for JSON patches of only the cells that change.
+
+    Unchanged cells are never echoed back, so completions shrink to the edits themselves. Patches are
+    validated against a schema built from the batch's dtypes and applied one column at a time.
+    """
+
+    name = "patch"
+    instructions = (
+        'Return only a JSON object {"patches": [{"row": <_row>, "column": "<column>", "value": <new value>}]} '
+        "with one patch per cell you change, using the column types given above, and nothing else. "
+        'Leave correct cells out; return {"patches": []} if nothing needs changing.'
+    )
+
+    def __init__(self):
+        self.csv = CsvFormat()
+
+    def render_rows(self, df, problems=None):
+        types = json.dumps({str(col): _type_name(df[col].dtype) for col in df.columns}, separators=(",", ":"))
+        payload = df.reset_index(drop=True)
+        payload.insert(0, ROW_ID, range(len(payload)))
+        header, rows = self.csv.render_rows(payload)
+        return f"Column types: {types}\n{header}", rows
+
+    def needs_llm(self, df_batch, problems=None):
+        return bool(DirtyColumnsFormat.problem_columns(df_batch, problems))
+
+    def parse(self, text, df_batch, problems=None):
+        try:
+            payload = json.loads(_strip_code_fence(text))
+        except json.JSONDecodeError as e:
+            raise SerializationError(f"Response is not valid JSON: {e}") from e
+        if isinstance(payload, list):
+            payload = {"patches": payload}  # A bare list of patches is unambiguous
+        try:
+            patches = patch_schema(df_batch).model_validate(payload).patches
+        except ValidationError as e:
+            raise SerializationError(f"Invalid patches: {e}") from e
+        return self.apply(df_batch, [(patch.row, patch.column, patch.value) for patch in patches])
+
+    @staticmethod
+    def apply(df_batch, patches):
+        """Returns a copy of df_batch with (row position, column, value) patches applied; later patches win."""
+        result = df_batch.copy()
+        if not patches:
+            return result
+        edits = pd.DataFrame(patches, columns=["row", "column", "value"])
+        edits = edits.drop_duplicates(["row", "column"], keep="last")
+        names = {str(col): col for col in result.columns}
+        for column, group in edits.groupby("column", sort=False):
+            col = names[column]
+            hit = np.zeros(len(result), dtype=bool)
+            hit[group["row"].to_numpy()] = True
+            values = pd.Series(group["value"].tolist(), index=group["row"].to_numpy())
+            values = values.reindex(range(len(result)))
+            if pd.api.types.is_numeric_dtype(result[col]) and not pd.api.types.is_bool_dtype(result[col]):
+                values = pd.to_numeric(values, errors="coerce")
+            result[col] = fit_dtype(result[col], values[hit]).mask(hit, values.to_numpy())
+        return result
+
+
+FORMATS = {
+    fmt.name: fmt for fmt in (CsvFormat(), JsonLinesFormat(), DirtyColumnsFormat(), PatchFormat())
+}
+
+
+def get_format(name):
+    """Returns the registered prompt format called name."""
+    try:
+        return FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Unknown prompt format {name!r}. Choose from {sorted(FORMATS)}.") from None
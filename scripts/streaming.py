@@ -0,0 +1,222 @@
+import asyncio
+import tempfile
+
+from metrics import NULL_METRICS
+
+DEFAULT_CHUNK_ROWS = 50_000
+RECORD_BATCH_ROWS = 10_000  # Rows serialized per write when streaming a response
+FLOAT_EXACT_INTEGER = 2 ** 53  # Integers up to this size survive a round trip through float64
+SPOOL_MAX_BYTES = 8 * 1024 * 1024  # Uploads larger than this spill from memory to disk
+UPLOAD_READ_BYTES = 1024 * 1024
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+STREAM_MEDIA_TYPES = {fmt: media_type for fmt, media_type in MEDIA_TYPES.items() if fmt != "json"}
+
+
+async def spool_upload(upload, max_size=SPOOL_MAX_BYTES):
+    """Copies an UploadFile into a SpooledTemporaryFile owned by the caller, one block at a time.
+
+    FastAPI closes the upload when the handler returns, so a streamed response needs its own copy.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+    while block := await upload.read(UPLOAD_READ_BYTES):
+        spool.write(block)
+    spool.seek(0)
+    return spool
+
+
+async def aiter_chunks(reader, first=None):
+    """Pulls chunks from a blocking reader in a worker thread so the event loop stays responsive.
+
+    `first` is a chunk the caller already pulled from the reader, yielded before the rest.
+    """
+    if first is not None:
+        yield first
+    while True:
+        chunk = await asyncio.to_thread(next, reader, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+async def aiter_record_batches(df, rows=RECORD_BATCH_ROWS):
+    """Yields consecutive row slices of df."""
+    for start in range(0, len(df), rows):
+        yield df.iloc[start:start + rows]
+
+
+async def aiter_frames(frames, rows=RECORD_BATCH_ROWS):
+    """Yields consecutive row slices of every frame in a list."""
+    for frame in frames:
+        async for batch in aiter_record_batches(frame, rows):
+            yield batch
+
+
+async def aprepend(first, frames):
+    """Yields first, then everything from the async iterator frames."""
+    yield first
+    async for frame in frames:
+        yield frame
+
+
+async def aclean_chunks(chunks, clean):
+    """Cleans each chunk with the async `clean` callable as it arrives.
+
+    Rule-based imputation statistics are computed per chunk, unless `clean` is bound to a source profile.
+    """
+    async for chunk in chunks:
+        yield await clean(chunk)
+
+
+def negotiate_format(accept):
+    """Picks the best response format for an Accept header, defaulting to JSON."""
+    if not accept:
+        return "json"
+    by_media_type = {media_type: fmt for fmt, media_type in MEDIA_TYPES.items()}
+    candidates = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type in by_media_type and quality > 0:
+            candidates.append((-quality, position, by_media_type[media_type]))
+    return min(candidates)[2] if candidates else "json"
+
+
+class _ByteSink:
+    """Write-only file object for pyarrow writers whose contents are drained after every record batch."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+async def encode_frames(frames, fmt="ndjson", on_close=None, metrics=None):
+    """Serializes an async iterator of DataFrames as it is consumed, yielding bytes for a StreamingResponse.
+
+    Only one frame is held at a time, so memory and time-to-first-byte do not grow with the total row count.
+    With metrics, the time spent serializing each frame is recorded as the "serialize" stage.
+    """
+    metrics = metrics or NULL_METRICS
+    try:
+        if fmt in ("arrow", "parquet"):
+            async for data in _encode_arrow(frames, fmt, metrics):
+                yield data
+            return
+
+        first = True
+        if fmt == "json":
+            yield b'{"cleaned_data": ['
+        async for frame in frames:
+            if frame.empty and not (fmt == "csv" and first):
+                continue
+            with metrics.stage("serialize", rows=len(frame)):
+                if fmt == "csv":
+                    data = frame.to_csv(index=False, header=first).encode()
+                elif fmt == "json":
+                    records = frame.to_json(orient="records", date_format="iso")[1:-1]
+                    data = (records if first else "," + records).encode()
+                else:
+                    data = frame.to_json(orient="records", lines=True, date_format="iso").encode()
+            yield data
+            first = False
+        if fmt == "json":
+            yield b"]}"
+    finally:
+        if on_close is not None:
+            on_close()
+
+
+def _widen_schema(table):
+    """The stream schema fixed from the first chunk, wide enough for the chunks that follow.
+
+    Chunks are typed and downcast on their own (int8 in one, int16 or floats with fractions in the
+    next), and a stream cannot change its schema after the first chunk. Integers become float64, which
+    holds them exactly and leaves room for fractions in later chunks (a mean-filled gap, say), unless
+    the first chunk already has values beyond float64's exact range (2**53): such ids and hashes stay
+    int64 (or uint64) so they round-trip exactly. Floats become float64. Text fields with no values yet
+    (null-typed, or categoricals all null in the first chunk) become strings, and dictionary indices
+    become int32. The first chunk's pandas metadata is dropped, since its dtypes need not hold for
+    later chunks.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    def exact_as_float(column):
+        extremes = pc.min_max(column).values()
+        return all(value.as_py() is None or abs(value.as_py()) <= FLOAT_EXACT_INTEGER for value in extremes)
+
+    def dictionary_values(column):
+        return pa.chunked_array([chunk.dictionary for chunk in column.chunks], column.type.value_type)
+
+    def widen(arrow_type, column, empty=False):
+        if pa.types.is_integer(arrow_type) and not exact_as_float(column):
+            return pa.uint64() if pa.types.is_unsigned_integer(arrow_type) else pa.int64()
+        if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type):
+            return pa.float64()
+        if pa.types.is_null(arrow_type):
+            return pa.string()
+        if pa.types.is_dictionary(arrow_type):
+            return pa.dictionary(pa.int32(), pa.string() if empty else widen(arrow_type.value_type, dictionary_values(column)))
+        return arrow_type
+
+    return pa.schema([field.with_type(widen(field.type, column, column.null_count == len(column)))
+                      for field, column in zip(table.schema, table.columns)])
+
+
+async def _encode_arrow(frames, fmt, metrics):
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+
+    sink = _ByteSink()
+    writer = None
+    schema = None
+    async for frame in frames:
+        with metrics.stage("serialize", rows=len(frame)):
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                schema = _widen_schema(table)
+                writer = pa.ipc.new_stream(sink, schema) if fmt == "arrow" else pq.ParquetWriter(sink, schema)
+            # Later chunks are cast to the stream schema (e.g. int8 to float64, null to timestamp, text to dictionary)
+            writer.write_table(table.cast(schema))
+        yield sink.drain()
+    if writer is None:
+        # No frames at all: still send a valid, empty stream.
+        schema = pa.schema([])
+        writer = pa.ipc.new_stream(sink, schema) if fmt == "arrow" else pq.ParquetWriter(sink, schema)
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,42 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+# Rough characters-per-token ratio for English/tabular text on OpenAI models.
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=8)
+def _load_encoding(model):
+    """Loads a tiktoken encoding if tiktoken is installed, otherwise returns None."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # tiktoken downloads its BPE files on first use; offline hosts fall back to the estimate.
+        return None
+
+
+def estimate_tokens(text, model="gpt-3.5-turbo-instruct"):
+    """Returns the token count of text, exact with tiktoken or estimated from its length."""
+    if not text:
+        return 0
+    encoding = _load_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_tokens_many(texts, model="gpt-3.5-turbo-instruct"):
+    """Returns an array of token counts for a sequence of strings."""
+    encoding = _load_encoding(model)
+    if encoding is not None:
+        return np.fromiter((len(tokens) for tokens in encoding.encode_batch(list(texts))), dtype=np.int64)
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64)
+    return -(-lengths // CHARS_PER_TOKEN)
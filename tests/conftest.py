@@ -0,0 +1,37 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules in scripts/ import each other by bare name, as they do when run from there
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+sys.path.insert(0, ROOT)
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def backend(tmp_path_factory):
+    """The FastAPI backend with the offline stub LLM and every store in memory or a temporary directory."""
+    state = tmp_path_factory.mktemp("state")
+    settings = {
+        "LLM_BACKEND": "stub",
+        "LLM_CACHE_PATH": "",
+        "IMPUTATION_PATH": "",
+        "NORMALIZATION_PATH": "",
+        "PROFILE_CACHE_PATH": "",
+        "INCREMENTAL_STATE_PATH": str(state / "incremental.db"),
+    }
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in settings.items():
+            patch.setenv(name, value)
+        from scripts import backend
+    return backend
+
+
+@pytest.fixture(scope="session")
+def client(backend):
+    """One TestClient for the whole run: leaving it runs the backend's shutdown, which closes its shared pools."""
+    from fastapi.testclient import TestClient
+
+    with TestClient(backend.app) as client:
+        yield client
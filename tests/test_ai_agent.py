@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+import pandas as pd
+
+from ai_agent import AIAgent
+from llm_backends import StubLLM
+from llm_cache import LLMCache
+
+
+def test_lazy_graph_builds_with_lazy_llm():
+    agent = AIAgent(llm_backend="stub")
+    # Run in a thread so a deadlock fails the test instead of hanging the run.
+    thread = threading.Thread(target=lambda: agent.graph, daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive()
+    assert agent.process_data(pd.DataFrame({"a": [1.0, None]})) == 'a\n1.0\n""'
+
+
+class CountingLLM(StubLLM):
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return super().invoke(prompt)
+
+
+def test_changed_statistics_reuse_cached_responses():
+    llm = CountingLLM()
+    agent = AIAgent(llm=llm, cache=LLMCache(path=None))
+    df = pd.DataFrame({"a": [1.0, None], "b": ["x", "y"]})
+
+    for statistics in ("Column statistics over all 10 rows:", "Column statistics over all 12 rows:"):
+        frame = asyncio.run(agent.aprocess_frame(df, context="Rule: a >= 0", statistics=statistics))
+        pd.testing.assert_frame_equal(frame, df)
+    assert len(llm.prompts) == 1
+    assert "over all 10 rows" in llm.prompts[0] and "Rule: a >= 0" in llm.prompts[0]
+
+    asyncio.run(agent.aprocess_frame(df, context="Rule: a > 0"))
+    assert len(llm.prompts) == 2
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import threading
+
+import pandas as pd
+import pytest
+from aiohttp import web
+
+from api_ingestion import ApiClient, ApiError, HttpCache, extract_records, make_paginator
+
+RECORDS = [{"id": i, "name": f"user{i}", "address": {"city": "Austin" if i % 2 else "Boston"}} for i in range(23)]
+
+
+class PagedApi:
+    """Serves RECORDS on a free local port with every pagination style, counting requests per path."""
+
+    def __init__(self):
+        self.requests = {}
+        self.failures = 0
+        self.url = None
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+
+    def _count(self, request):
+        self.requests[request.path] = self.requests.get(request.path, 0) + 1
+
+    async def offset(self, request):
+        self._count(request)
+        limit, offset = int(request.query["limit"]), int(request.query["offset"])
+        return web.json_response({"data": RECORDS[offset:offset + limit]})
+
+    async def page(self, request):
+        self._count(request)
+        size, page = int(request.query["per_page"]), int(request.query["page"])
+        return web.json_response({"results": RECORDS[(page - 1) * size:page * size]})
+
+    async def cursor(self, request):
+        self._count(request)
+        start = int(request.query.get("cursor", 0))
+        cursor = str(start + 10) if start + 10 < len(RECORDS) else None
+        return web.json_response({"items": RECORDS[start:start + 10], "meta": {"next": cursor}})
+
+    async def link(self, request):
+        self._count(request)
+        start = int(request.query.get("start", 0))
+        headers = {}
+        if start + 10 < len(RECORDS):
+            headers["Link"] = f'<{self.url}/link?start={start + 10}>; rel="next"'
+        return web.json_response(RECORDS[start:start + 10], headers=headers)
+
+    async def flaky(self, request):
+        self._count(request)
+        if self.failures:
+            self.failures -= 1
+            return web.Response(status=503, headers={"Retry-After": "0"})
+        return web.json_response(RECORDS[:3])
+
+    async def etag(self, request):
+        self._count(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.json_response(RECORDS[:3], headers={"ETag": '"v1"'})
+
+    async def _start(self):
+        app = web.Application()
+        for name in ("offset", "page", "cursor", "link", "flaky", "etag"):
+            app.router.add_get(f"/{name}", getattr(self, name))
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        self.url = f"http://127.0.0.1:{self._runner.addresses[0][1]}"
+
+    def start(self):
+        started = threading.Event()
+
+        def serve():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start())
+            started.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=serve, daemon=True).start()
+        started.wait()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+@pytest.fixture(scope="module")
+def api():
+    api = PagedApi().start()
+    yield api
+    api.stop()
+
+
+def fetch(url, paginator, cache=None, **options):
+    async def collect():
+        async with ApiClient(cache=cache, backoff_base=0.001) as client:
+            return [frame async for frame in client.iter_frames(url, paginator=paginator, **options)]
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("path, paginator", [
+    ("offset", make_paginator("offset", page_size=5)),
+    ("page", make_paginator("page", page_size=5)),
+    ("cursor", make_paginator("cursor", cursor_path="meta.next")),
+    ("link", make_paginator("link")),
+])
+def test_every_pagination_yields_all_records_in_order(api, path, paginator):
+    frames = fetch(f"{api.url}/{path}", paginator, concurrency=3)
+    df = pd.concat(frames, ignore_index=True)
+    assert df["id"].tolist() == list(range(len(RECORDS)))
+    assert df["address.city"].tolist() == [record["address"]["city"] for record in RECORDS]
+
+
+def test_concurrent_offset_pages_stop_at_the_short_page(api):
+    before = api.requests.get("/offset", 0)
+    frames = fetch(f"{api.url}/offset", make_paginator("offset", page_size=5), concurrency=2)
+    assert [len(frame) for frame in frames] == [5, 5, 5, 5, 3]
+    # The short fifth page ends the sequence; at most one page beyond it was already in flight.
+    assert api.requests["/offset"] - before <= 6
+
+
+def test_max_pages_limits_fetches(api):
+    for kind, options in (("offset", {"page_size": 5}), ("cursor", {"cursor_path": "meta.next"})):
+        before = api.requests.get(f"/{kind}", 0)
+        frames = fetch(f"{api.url}/{kind}", make_paginator(kind, **options), max_pages=2)
+        assert len(frames) == 2
+        assert api.requests[f"/{kind}"] - before == 2
+
+
+def test_transient_errors_are_retried(api):
+    api.failures = 2
+    frames = fetch(f"{api.url}/flaky", make_paginator("none"))
+    assert len(frames[0]) == 3 and api.failures == 0
+
+
+def test_persistent_errors_raise(api):
+    api.failures = 10
+    with pytest.raises(ApiError):
+        fetch(f"{api.url}/flaky", make_paginator("none"))
+    api.failures = 0
+
+
+def test_unchanged_pages_are_served_from_the_http_cache(api):
+    cache = HttpCache()
+    first = fetch(f"{api.url}/etag", make_paginator("none"), cache=cache)
+    second = fetch(f"{api.url}/etag", make_paginator("none"), cache=cache)
+    assert cache.hits == 1
+    pd.testing.assert_frame_equal(first[0], second[0])
+
+
+def test_extract_records_finds_the_record_list():
+    assert extract_records({"data": [1, 2]}) == [1, 2]
+    assert extract_records({"a": [1, 2], "b": [3, 4]}) == [{"a": 1, "b": 3}, {"a": 2, "b": 4}]
+    assert extract_records({"page": {"rows": [1]}}, "page.rows") == [1]
+    assert extract_records({"id": 1}) == [{"id": 1}]
+
+
+def test_unknown_pagination_is_rejected():
+    with pytest.raises(ValueError):
+        make_paginator("scroll")
+
+
+def test_clean_api_streams_every_page(client, api):
+    response = client.post("/clean-api", headers={"accept": "application/x-ndjson"},
+                           json={"api_url": f"{api.url}/offset", "pagination": "offset", "page_size": 5})
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["id"] for row in rows) == list(range(len(RECORDS)))
@@ -0,0 +1,54 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+CSV = "id,name,age,city\n1,Alice,30,Austin\n2,Bob,,Boston\n3,Carol,41,\n4,Dave,35,Austin\n5,Eve,29,Boston\n"
+
+
+def upload(client, params=None, headers=None):
+    files = {"file": ("people.csv", CSV.encode(), "text/csv")}
+    return client.post("/clean-data", params=params, headers=headers, files=files)
+
+
+@pytest.mark.parametrize("chunksize", [2, 50])
+def test_streamed_upload_cleans_every_row(client, chunksize):
+    response = upload(client, {"stream": "ndjson", "chunksize": chunksize})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["name"] for row in rows] == ["Alice", "Bob", "Carol", "Dave", "Eve"]
+    assert all(row["age"] is not None for row in rows)
+
+
+def test_streamed_csv_matches_whole_upload(client):
+    streamed = pd.read_csv(io.StringIO(upload(client, {"stream": "csv", "chunksize": 2}).text))
+    whole = pd.read_csv(io.StringIO(upload(client, headers={"accept": "text/csv"}).text))
+    assert streamed.shape == whole.shape
+    assert streamed["name"].tolist() == whole["name"].tolist()
+
+
+def test_unknown_stream_format_is_rejected(client):
+    response = upload(client, {"stream": "xml"})
+    assert response.status_code == 400
+
+
+def test_job_result_is_served_once_the_job_succeeds(client, backend):
+    files = {"file": ("people.csv", CSV.encode(), "text/csv")}
+    job = client.post("/jobs/clean-data", params={"chunksize": 2}, files=files).json()
+    backend.jobs.get(job["id"]).future.result(timeout=30)
+    status = client.get(f"/jobs/{job['id']}").json()
+    assert status["status"] == "succeeded"
+    assert status["progress"]["chunks_done"] == 3
+    rows = client.get(f"/jobs/{job['id']}/result").json()["cleaned_data"]
+    assert [row["name"] for row in rows] == ["Alice", "Bob", "Carol", "Dave", "Eve"]
+    assert client.get("/jobs/unknown").status_code == 404
+
+
+def test_metrics_endpoint_reports_cleaning_stages(client):
+    upload(client)
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'cleaning_stage_seconds_count{stage="clean_data"}' in response.text
+    assert 'http_request_seconds_count{method="POST",route="/clean-data",status="200"}' in response.text
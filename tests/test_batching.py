@@ -0,0 +1,49 @@
+import pandas as pd
+
+from batching import BatchPlanner, render_csv_rows
+from serialization import get_format
+
+
+def multiline_frame(rows=6):
+    return pd.DataFrame({"id": range(rows), "body": ["first line\nsecond line\nthird"] * rows})
+
+
+def test_render_csv_rows_keeps_one_record_per_row():
+    df = multiline_frame()
+    header, rows = render_csv_rows(df)
+    assert header == "id,body"
+    assert len(rows) == len(df)
+    assert rows[0] == '0,"first line\nsecond line\nthird"'
+
+
+def test_plan_counts_rows_not_lines():
+    df = multiline_frame()
+    _, batches = BatchPlanner(200, render_rows=get_format("csv").render_rows).plan(df)
+    assert sum(batch.rows for batch in batches) == len(df)
+    assert batches[-1].stop == len(df)
+
+
+def test_csv_format_round_trips_multiline_cells():
+    df = multiline_frame()
+    fmt = get_format("csv")
+    assert fmt.parse(fmt.serialize(df), df).equals(df)
+
+
+def test_plan_truncates_prompt_rows_only():
+    df = pd.DataFrame({"id": [1, 2], "body": ["x" * 10_000, "short"]})
+    prompt_df, batches = BatchPlanner(1500, render_rows=get_format("csv").render_rows).plan(df)
+    assert prompt_df["body"].str.len().iloc[0] < 10_000
+    assert df["body"].str.len().iloc[0] == 10_000
+    assert [batch.truncated for batch in batches] == [True, False]
+
+
+def test_aprocess_frame_keeps_truncated_text():
+    import asyncio
+
+    from ai_agent import AIAgent
+    from llm_backends import StubLLM
+
+    df = pd.DataFrame({"id": [1, 2, 3], "body": ["x" * 10_000, "short", None], "n": [1.0, None, 3.0]})
+    result = asyncio.run(AIAgent(llm=StubLLM()).aprocess_frame(df, token_budget=1500))
+    assert result["body"].iloc[0] == "x" * 10_000
+    assert result["body"].iloc[1] == "short"
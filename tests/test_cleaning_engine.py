@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from cleaning_engine import CleaningEngine
+from data_cleaning import DataCleaning
+
+
+def typed_frame():
+    return pd.DataFrame({
+        "id": [1, 2, 3, 3, 4, 5],
+        "salary": [50_000.0, np.nan, 70_000.0, 70_000.0, 65_000.0, np.nan],
+        "city": ["Austin", "Boston", None, None, "Austin", "Denver"],
+    })
+
+
+def test_matches_data_cleaning_on_typed_columns():
+    expected = DataCleaning().clean_data(typed_frame())
+    pd.testing.assert_frame_equal(CleaningEngine().clean_data(typed_frame()), expected)
+
+
+def test_numeric_text_is_coerced_before_filling():
+    df = pd.DataFrame({"age": ["30", None, "40", "x"]})
+    cleaned, report = CleaningEngine(numeric_threshold=0.6, remove_duplicates=False).clean(df)
+    assert cleaned["age"].tolist() == [30.0, 35.0, 40.0, 35.0]
+    assert report.loc["age", "coercion_failures"] == 1
+    assert report.loc["age", "filled"] == 2
+    # Below the threshold the column stays text and is left for the LLM
+    assert CleaningEngine().clean_data(df)["age"].tolist() == ["30", None, "40", "x"]
+
+
+def test_mode_fills_text_and_drop_removes_rows():
+    assert CleaningEngine(strategy="mode").clean_data(typed_frame())["city"].tolist() == [
+        "Austin", "Boston", "Austin", "Austin", "Denver"]
+    assert CleaningEngine(strategy="drop").clean_data(typed_frame())["id"].tolist() == [1, 4]
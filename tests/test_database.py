@@ -0,0 +1,66 @@
+import json
+
+import pandas as pd
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+from database import EngineRegistry, read_sql_chunks
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'people.db'}"
+    registry = EngineRegistry()
+    pd.DataFrame({"id": range(25), "age": [float(i) if i % 5 else None for i in range(25)]}).to_sql(
+        "people", registry.get(url), index=False
+    )
+    registry.dispose()
+    return url
+
+
+@pytest.fixture
+def registry():
+    registry = EngineRegistry(pool_size=1, max_overflow=0, pool_timeout=0.2)
+    yield registry
+    registry.dispose()
+
+
+def test_read_sql_chunks_streams_bounded_chunks(db_url, registry):
+    chunks = list(read_sql_chunks(registry.get(db_url), "SELECT * FROM people ORDER BY id", chunksize=10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert pd.concat(chunks)["id"].tolist() == list(range(25))
+
+
+def test_read_sql_chunks_yields_columns_of_empty_result(db_url, registry):
+    chunks = list(read_sql_chunks(registry.get(db_url), "SELECT id, age FROM people WHERE id < 0"))
+    assert len(chunks) == 1 and chunks[0].empty
+    assert list(chunks[0].columns) == ["id", "age"]
+
+
+def test_registry_shares_one_bounded_pool_per_url(db_url, registry):
+    engine = registry.get(db_url)
+    assert registry.get(db_url) is engine
+    assert isinstance(engine.pool, QueuePool) and engine.pool.size() == 1
+    assert list(registry.status()) == [db_url]
+
+
+def test_open_reader_holds_its_connection_until_closed(db_url, registry):
+    engine = registry.get(db_url)
+    reader = read_sql_chunks(engine, "SELECT * FROM people", chunksize=10)
+    next(reader)
+    with pytest.raises(PoolTimeout):
+        engine.connect()
+    reader.close()
+    with engine.connect():
+        assert engine.pool.checkedout() == 1
+    assert engine.pool.checkedout() == 0
+
+
+def test_clean_db_streams_every_row(client, db_url):
+    response = client.post("/clean-db", headers={"accept": "application/x-ndjson"},
+                           json={"db_url": db_url, "query": "SELECT * FROM people", "chunksize": 10})
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["id"] for row in rows) == list(range(25))
+    assert all(row["age"] is not None for row in rows)
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from deduplication import RowDeduplicator
+
+
+def test_ids_are_passed_through():
+    df = pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "user_uuid": ["a1", "b2", "c3", "d4"],
+        "city": ["Austin", "Austin", "Boston", "Austin"],
+    })
+    assert RowDeduplicator().resolve_key_columns(df) == ["city"]
+
+
+def test_unique_free_text_is_still_sent():
+    df = pd.DataFrame({
+        "id": [1, 2, 3],
+        "name": ["  alice", "Bob", "carol "],
+        "email": ["a@example.com", None, "c@example.com"],
+    })
+    dedup = RowDeduplicator()
+    assert dedup.resolve_key_columns(df) == ["name", "email"]
+    unique, plan = dedup.deduplicate(df)
+    assert len(unique) == 3
+    cleaned = unique.assign(name=unique["name"].str.strip().str.title())
+    assert dedup.expand(cleaned, plan, df)["name"].tolist() == ["Alice", "Bob", "Carol"]
+
+
+def test_duplicates_fan_back_out():
+    df = pd.DataFrame({"id": [10, 11, 12], "city": ["nyc", "nyc", "la"]})
+    dedup = RowDeduplicator()
+    unique, plan = dedup.deduplicate(df)
+    assert unique["city"].tolist() == ["nyc", "la"]
+    result = dedup.expand(unique.assign(city=["New York", "Los Angeles"]), plan, df)
+    assert result.to_dict("list") == {"id": [10, 11, 12], "city": ["New York", "New York", "Los Angeles"]}
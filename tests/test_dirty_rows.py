@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from dirty_rows import DirtyRowDetector
+
+
+def test_mask_flags_only_rows_with_problems():
+    df = pd.DataFrame({
+        "id": range(6),
+        "city": ["Austin", "Austin", " Austin", "austin", "Boston", None],
+        "age": ["31", "42", "x", "28", "35", "40"],
+    })
+    assert DirtyRowDetector().mask(df).tolist() == [False, False, True, True, False, True]
+
+
+def test_detect_names_the_check_and_cells_the_column():
+    df = pd.DataFrame({"city": ["Austin", "Austin", "austin", "Austin", "Austin"],
+                       "age": ["31", "4o", "28", "50", "61"]})
+    detector = DirtyRowDetector()
+    flags = detector.detect(df)
+    assert flags["inconsistent_format"].tolist() == [False, False, True, False, False]
+    assert flags["coercion_failure"].tolist() == [False, True, False, False, False]
+    cells = detector.cells(df)
+    assert cells["city"].tolist() == [False, False, True, False, False]
+    assert cells["age"].tolist() == [False, True, False, False, False]
+
+
+def test_numeric_columns_are_left_alone():
+    df = pd.DataFrame({"amount": [1.0, np.nan, 3.0], "when": pd.to_datetime(["2024-01-01", None, "2024-01-03"])})
+    assert not DirtyRowDetector().mask(df).any()
+
+
+def test_vocabularies_override_rarity():
+    df = pd.DataFrame({"tier": ["gold"] * 10 + ["silver"] * 10 + ["bronze"]})
+    assert not DirtyRowDetector().mask(df).any()
+    mask = DirtyRowDetector(vocabularies={"tier": ["gold", "silver"]}).mask(df)
+    assert mask.tolist() == [False] * 20 + [True]
@@ -0,0 +1,41 @@
+import io
+
+import pandas as pd
+import pytest
+
+from file_readers import FileReader, file_format
+
+CSV = b"id,city,amount,joined\n1,Austin,1.5,2024-01-02\n2,Austin,,2024-02-03\n3,Boston,3,\n4,Austin,x,2024-04-05\n"
+
+
+def test_file_format_comes_from_the_extension():
+    assert [file_format(name) for name in ("a.CSV", "b.pq", "c.arrow", "d.xlsx", "e.txt")] == [
+        "csv", "parquet", "feather", "xlsx", None]
+
+
+def test_arrow_csv_matches_pandas_with_categories():
+    arrow = FileReader().read(io.BytesIO(CSV), "csv")
+    pandas = FileReader(engine="pandas").read(io.BytesIO(CSV), "csv")
+    assert isinstance(arrow["city"].dtype, pd.CategoricalDtype)
+    # Missing text is None from Arrow and NaN from pandas; either is a null to the cleaners
+    pd.testing.assert_frame_equal(arrow.fillna(pd.NA), pandas.fillna(pd.NA), check_categorical=False)
+    assert arrow["joined"].tolist()[0] == "2024-01-02"  # Dates stay text
+
+
+def test_csv_chunks_type_each_chunk_on_its_own():
+    chunks = list(FileReader(category_ratio=None).iter_chunks(io.BytesIO(CSV), "csv", chunksize=3))
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    # The text in the last chunk does not break the numbers read before it
+    assert chunks[0]["amount"].tolist()[::2] == [1.5, 3.0]
+    assert chunks[1]["amount"].tolist() == ["x"]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather", "xlsx"])
+def test_binary_formats_round_trip_in_chunks(fmt):
+    df = pd.DataFrame({"id": [1, 2, 3], "city": ["Austin", "Boston", "Austin"], "amount": [1.5, None, 3.0]})
+    buffer = io.BytesIO()
+    {"parquet": df.to_parquet, "feather": df.to_feather, "xlsx": lambda b: df.to_excel(b, index=False)}[fmt](buffer)
+    buffer.seek(0)
+    chunks = list(FileReader(category_ratio=None).iter_chunks(buffer, fmt, chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df)
@@ -0,0 +1,41 @@
+import asyncio
+
+import pandas as pd
+
+from cleaning_engine import CleaningEngine
+from imputation import ImputationEngine, ImputerStore
+from pipeline import CleaningPipeline
+
+
+def grouped_frame(low, high):
+    return pd.DataFrame({
+        "group": ["a", "b"] * 50,
+        "value": [low, high] * 49 + [None, None],
+    })
+
+
+def test_group_fill_uses_group_means():
+    imputed = ImputationEngine(strategy="group").impute(grouped_frame(20.0, 60.0))
+    assert imputed["value"].tolist()[-2:] == [20.0, 60.0]
+
+
+def test_same_source_with_new_content_is_refitted():
+    pipeline = CleaningPipeline(CleaningEngine(imputer=ImputationEngine(store=ImputerStore(None))), None)
+
+    def run(df, fingerprint):
+        return asyncio.run(pipeline.arun(df, source="file:data.csv", fingerprint=fingerprint))
+
+    assert run(grouped_frame(20.0, 60.0), "upload:first")["value"].tolist()[-2:] == [20.0, 60.0]
+    assert run(grouped_frame(70.0, 10.0), "upload:second")["value"].tolist()[-2:] == [70.0, 10.0]
+    # The same content reuses its fitted model
+    assert run(grouped_frame(20.0, 60.0), "upload:first")["value"].tolist()[-2:] == [20.0, 60.0]
+
+
+def test_columns_with_nulls_only_in_later_chunks_get_a_plan():
+    engine = ImputationEngine(strategy="mean", store=ImputerStore(None))
+    first = pd.DataFrame({"x": [1.0, None, 3.0], "y": [10.0, 20.0, 30.0]})
+    second = pd.DataFrame({"x": [5.0, 7.0, 9.0], "y": [40.0, None, 60.0]})
+    assert engine.impute(first, source="chunks")["x"].tolist() == [1.0, 2.0, 3.0]
+    assert engine.impute(second, source="chunks")["y"].tolist() == [40.0, 50.0, 60.0]
+    # The refitted model replaces the stored one and still plans the first chunk's column
+    assert engine.impute(first, source="chunks")["x"].tolist() == [1.0, 7.0, 3.0]
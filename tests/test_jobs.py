@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pandas as pd
+
+from jobs import CANCELLED, FAILED, SUCCEEDED, JobManager
+
+
+def test_job_runs_to_completion_and_keeps_its_frames():
+    manager = JobManager(max_workers=1)
+    closed = threading.Event()
+
+    async def run(job):
+        job.add_total(2)
+        for frame in (pd.DataFrame({"a": [1, 2]}), pd.DataFrame({"a": [3]})):
+            job.add_frame(frame)
+            job.advance()
+
+    job = manager.submit("test", run, on_close=closed.set)
+    job.future.result(timeout=10)
+    assert job.status == SUCCEEDED and closed.is_set()
+    assert job.to_dict()["progress"] == {"chunks_done": 2, "rows_done": 3, "batches_done": 2, "batches_total": 2}
+    manager.shutdown()
+
+
+def test_failed_job_records_the_error_and_drops_partial_results():
+    manager = JobManager(max_workers=1)
+
+    async def run(job):
+        job.add_frame(pd.DataFrame({"a": [1]}))
+        raise ValueError("bad chunk")
+
+    job = manager.submit("test", run)
+    job.future.result(timeout=10)
+    assert (job.status, job.error, job.frames) == (FAILED, "bad chunk", [])
+    manager.shutdown()
+
+
+def test_cancel_stops_running_jobs_and_queued_ones_never_start():
+    manager = JobManager(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    ran = []
+
+    async def blocking(job):
+        started.set()
+        release.wait(10)
+        job.add_frame(pd.DataFrame({"a": [1]}))
+
+    async def queued(job):
+        ran.append(job.id)
+
+    running = manager.submit("test", blocking)
+    waiting = manager.submit("test", queued)
+    assert started.wait(10)
+    manager.cancel(waiting.id)
+    manager.cancel(running.id)
+    release.set()
+    running.future.result(timeout=10)
+    assert running.status == CANCELLED and running.frames == []
+    assert waiting.status == CANCELLED and ran == []
+    manager.shutdown()
+
+
+def test_finished_jobs_are_purged_after_the_ttl():
+    manager = JobManager(max_workers=1, ttl_seconds=0)
+
+    async def run(job):
+        pass
+
+    job = manager.submit("test", run)
+    job.future.result(timeout=10)
+    time.sleep(0.01)
+    manager.purge()
+    assert manager.get(job.id) is None
+    manager.shutdown()
@@ -0,0 +1,39 @@
+from llm_cache import LLMCache
+
+
+def test_memory_evictions_are_served_from_disk(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite"), max_memory_entries=1)
+    cache.set("a", "first")
+    cache.set("b", "second")
+    assert cache.get("b") == "second"
+    assert cache.get("a") == "first"  # Pushed out of memory by "b", still on disk
+    assert cache.get("missing") is None
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+    assert (stats["memory_entries"], stats["disk_entries"]) == (1, 2)
+
+
+def test_disk_keeps_the_most_recently_used_entries(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite"), max_memory_entries=0, max_disk_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite"), ttl_seconds=-1)
+    cache.set("a", "1")
+    assert cache.get("a") is None
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_keys_depend_on_content_not_dict_order():
+    key = LLMCache.make_key("prompt", {"model": "m", "temperature": 0})
+    assert key == LLMCache.make_key("prompt", {"temperature": 0, "model": "m"})
+    assert key != LLMCache.make_key("prompt", {"model": "m", "temperature": 1})
+    # Parts are delimited, so moving text between them changes the key
+    assert LLMCache.make_key("ab", "c") != LLMCache.make_key("a", "bc")
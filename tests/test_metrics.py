@@ -0,0 +1,42 @@
+from metrics import Metrics
+
+
+def test_render_uses_the_prometheus_text_format():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.describe("llm_batches_total", "LLM batches by source.")
+    metrics.inc("llm_batches_total", 2, source="cache")
+    metrics.inc("llm_batches_total", source="cache")
+    metrics.set("queue_depth", 4, queue='a"b')
+    metrics.observe("latency_seconds", 0.5)
+    metrics.add_collector(lambda: {"jobs_unfinished": 1})
+    lines = metrics.render().splitlines()
+
+    assert lines[:3] == ["# HELP llm_batches_total LLM batches by source.", "# TYPE llm_batches_total counter",
+                         'llm_batches_total{source="cache"} 3']
+    assert 'queue_depth{queue="a\\"b"} 4' in lines
+    assert "jobs_unfinished 1" in lines
+    assert "# TYPE latency_seconds histogram" in lines
+    assert [line for line in lines if line.startswith("latency_seconds_")] == [
+        'latency_seconds_bucket{le="0.1"} 0', 'latency_seconds_bucket{le="1.0"} 1', 'latency_seconds_bucket{le="+Inf"} 1',
+        "latency_seconds_sum 0.5", "latency_seconds_count 1"]
+
+
+def test_stage_records_time_rows_and_server_timing():
+    metrics = Metrics()
+    token = metrics.start_request()
+    with metrics.stage("clean_data", rows=10):
+        pass
+    with metrics.stage("clean_data", rows=5):
+        pass
+    assert metrics.end_request(token).startswith("clean_data;dur=")
+    text = metrics.render()
+    assert 'cleaning_stage_rows_total{stage="clean_data"} 15' in text
+    assert 'cleaning_stage_seconds_count{stage="clean_data"} 2' in text
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+    metrics.inc("llm_batches_total")
+    with metrics.stage("clean_data", rows=10):
+        pass
+    assert "llm_batches_total" not in metrics.render() and "cleaning_stage" not in metrics.render()
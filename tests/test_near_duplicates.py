@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from near_duplicates import NearDuplicateDetector, minhash_signatures, signature_similarity
+
+
+def people():
+    return pd.DataFrame({
+        "id": [1, 2, 3, 4, 5],
+        "name": ["Jonathan Smith", "jonathan  smith.", "Maria Garcia", "Jonathan Smyth", "Wei Zhang"],
+        "email": ["jon@example.com", "jon@example.com", "maria@example.com", "jon@example.com", "wei@example.com"],
+        "city": ["Springfield", None, "Riverside", "Springfield", "Lakewood"],
+    })
+
+
+def test_minhash_similarity_tracks_shared_trigrams():
+    signatures = minhash_signatures(np.array(["jonathan smith", "jonathan smith", "jonathan smyth", "wei zhang"],
+                                             dtype=object), size=64)
+    similarity = signature_similarity(signatures[[0, 0, 0]], signatures[[1, 2, 3]])
+    assert similarity[0] == 1.0
+    assert 0.4 < similarity[1] < 1.0
+    assert similarity[2] < 0.1
+    with pytest.raises(ValueError):
+        minhash_signatures(["a"], size=48)
+
+
+@pytest.mark.parametrize("method", ["sorted", "minhash"])
+def test_blocking_methods_find_the_same_records(method):
+    detector = NearDuplicateDetector(columns=["name", "email", "city"], method=method, threshold=0.7)
+    cluster_ids, pairs = detector.find(people())
+    assert cluster_ids.tolist() == [0, 0, 1, 0, 2]
+    scores = pairs.set_index(["left", "right"])["score"]
+    assert scores[(0, 1)] == 1.0  # A null city is left out of the score
+    assert 0.7 <= scores[(0, 3)] < 1.0
+
+
+def test_row_identifiers_are_not_compared():
+    assert NearDuplicateDetector().resolve_columns(people()) == ["email", "city"]
+
+
+@pytest.mark.parametrize("policy, expected", [
+    ("first", [1, None]),
+    ("most_complete", [1, "Springfield"]),
+    ("coalesce", [1, "Springfield"]),
+])
+def test_merge_policies(policy, expected):
+    df = pd.DataFrame({"id": [1, 2], "name": ["Ann Lee", "ann lee"], "city": [None, "Springfield"]})
+    merged, cluster_ids = NearDuplicateDetector(columns=["name"], policy=policy).deduplicate(df)
+    assert cluster_ids.tolist() == [0, 0]
+    assert len(merged) == 1
+    row = merged.iloc[0]
+    assert row["id"] == (2 if policy == "most_complete" else expected[0])
+    assert (row["city"] if pd.notna(row["city"]) else None) == expected[1]
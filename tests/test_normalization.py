@@ -0,0 +1,45 @@
+import asyncio
+
+import pandas as pd
+
+from normalization import NormalizationStore, ValueNormalizer, remap
+
+
+def test_remap_merges_categories_and_keeps_unmapped_values():
+    values = pd.Series(["NYC", "new york", None, "Boston"], dtype="category")
+    result = remap(values, {"NYC": "New York", "new york": "New York"})
+    assert isinstance(result.dtype, pd.CategoricalDtype)
+    assert result.tolist()[:2] == ["New York", "New York"] and pd.isna(result.tolist()[2])
+    assert result.tolist()[3] == "Boston"
+    assert list(result.cat.categories) == ["Boston", "New York"]
+    plain = remap(values.astype(object), {"NYC": "New York"})
+    assert plain.dtype == object and plain.tolist()[0] == "New York"
+
+
+class Dispatch:
+    """Title-cases every value it is sent and records the distinct values it saw."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def __call__(self, frame):
+        self.sent.append(frame.iloc[:, 0].tolist())
+        return frame.apply(lambda column: column.str.title())
+
+
+def test_each_distinct_value_is_asked_about_once(tmp_path):
+    df = pd.DataFrame({"city": ["austin", "Austin", "austin", "boston"] * 5, "note": [f"n{i}" for i in range(20)]})
+    store = NormalizationStore(str(tmp_path / "normalization.sqlite"))
+    dispatch = Dispatch()
+    result = asyncio.run(ValueNormalizer(store).anormalize(df, dispatch, "people"))
+    assert result["city"].tolist()[:4] == ["Austin", "Austin", "Austin", "Boston"]
+    assert result["note"].tolist() == df["note"].tolist()  # Free text is left alone
+    assert dispatch.sent == [["Austin", "austin", "boston"]]
+
+    # The dictionary is stored, so a fresh normalizer over the same store asks only about new values
+    df.loc[0, "city"] = "denver"
+    result = asyncio.run(ValueNormalizer(NormalizationStore(str(tmp_path / "normalization.sqlite"))).anormalize(
+        df, dispatch, "people"))
+    assert result["city"].tolist()[:2] == ["Denver", "Austin"]
+    assert dispatch.sent[1:] == [["denver"]]
+    assert store.mappings("people") == {"city": {"austin": "Austin", "boston": "Boston", "denver": "Denver"}}
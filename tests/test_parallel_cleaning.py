@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from data_cleaning import DataCleaning
+from parallel_cleaning import ParallelCleaning
+
+
+def test_parallel_matches_serial_on_signed_zeros():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"x": rng.choice([0.0, -0.0], 400), "k": rng.integers(0, 150, 400)})
+    expected = DataCleaning().clean_data(df.copy())
+    result = ParallelCleaning(workers=2, min_rows_per_worker=1).clean_data(df)
+    assert len(result) == len(expected) < len(df)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_mean_merges_partition_sums():
+    df = pd.DataFrame({"x": [0.1] * 999 + [np.nan], "k": range(1000)})
+    result = ParallelCleaning(workers=2, min_rows_per_worker=1).clean_data(df)
+    assert abs(result["x"].iloc[-1] - 0.1) < 1e-15
+
+
+def test_shared_frame_keeps_index_names_and_dtypes():
+    rng = np.random.default_rng(1)
+    rows = 600
+    df = pd.DataFrame({
+        "k": rng.integers(0, 5, rows),
+        "city": rng.choice(["Austin", "Boston", None], rows),
+        "tier": pd.Categorical(rng.choice(["gold", "silver"], rows)),
+        "x": rng.choice([1.5, np.nan], rows),
+        # Mixed types Arrow cannot hold, sent to the workers as they are
+        "mixed": [1 if i % 3 else "z" for i in range(rows)],
+        7: rng.integers(0, 2, rows),
+    }, index=[f"r{i}" for i in range(rows)])
+    expected = DataCleaning().clean_data(df.copy())
+    result = ParallelCleaning(workers=3, min_rows_per_worker=1).clean_data(df)
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,77 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import warnings
+
+import pandas as pd
+import pytest
+
+from ai_agent import AIAgent
+from cleaning_engine import CleaningEngine
+from dirty_rows import DirtyRowDetector
+from llm_backends import StubLLM, echo_data
+from memory_optimizer import MemoryOptimizer
+from pipeline import CleaningPipeline
+
+SAMPLE_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sample_data.csv")
+
+
+def run(df, cleaner=None):
+    pipeline = CleaningPipeline(cleaner or CleaningEngine(), AIAgent(llm=StubLLM()), dirty_detector=DirtyRowDetector(),
+                                optimizer=MemoryOptimizer(), token_budget=1500)
+    return asyncio.run(pipeline.arun(df))
+
+
+def test_merge_back_keeps_optimized_dtypes_without_warnings():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FutureWarning)
+        result = run(pd.read_csv(SAMPLE_DATA))
+    assert result["id"].dtype == "int8"
+    assert result["salary"].dtype == "int32"
+    assert result["id"].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_mean_fills_are_not_rounded_by_default():
+    df = pd.DataFrame({"age": [25.0, 30.0, None, 40.0, 35.0], "name": list("abcde")})
+    assert run(df)["age"].tolist() == [25.0, 30.0, 32.5, 40.0, 35.0]
+    assert run(df, CleaningEngine(preserve_integers=True))["age"].tolist() == [25, 30, 33, 40, 35]
+
+
+def test_merge_back_upcasts_columns_that_cannot_hold_the_answer():
+    result = CleaningPipeline(None, None)._values_for(pd.Series([True, False]), pd.Series(["yes", "no"]))
+    assert result is None
+
+
+class TitleCaseLLM:
+    """Answers dirty-format prompts with every value title-cased and patch prompts with the matching patches."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        lines = [line for line in echo_data(prompt).splitlines() if not line.startswith("Column types:")]
+        rows = list(csv.reader(lines))
+        if '{"patches": []}' not in prompt:
+            out = io.StringIO()
+            csv.writer(out, lineterminator="\n").writerows([rows[0]] + [[v.title() for v in row] for row in rows[1:]])
+            return out.getvalue()
+        header, patches = rows[0], []
+        for row in rows[1:]:
+            for column, value in zip(header[1:], row[1:]):
+                if value and value != value.title() and not value.isdigit():
+                    patches.append({"row": int(row[0]), "column": column, "value": value.title()})
+        return json.dumps({"patches": patches})
+
+
+@pytest.mark.parametrize("prompt_format", ["dirty", "patch"])
+def test_partial_formats_send_the_columns_the_detector_flags(prompt_format):
+    df = pd.DataFrame({"id": range(40), "city": ["Austin"] * 19 + ["Boston"] * 19 + ["austin", "AUSTIN"]})
+    llm = TitleCaseLLM()
+    pipeline = CleaningPipeline(CleaningEngine(), AIAgent(llm=llm, prompt_format=prompt_format),
+                                dirty_detector=DirtyRowDetector())
+    result = asyncio.run(pipeline.arun(df))
+    assert len(llm.prompts) == 1
+    assert result["city"].tolist()[-2:] == ["Austin", "Austin"]
@@ -0,0 +1,32 @@
+import json
+from decimal import Decimal
+
+import pandas as pd
+
+from profiles import FrameProfile, ProfileCache
+
+
+def frame_with_dates_and_decimals():
+    return pd.DataFrame({
+        "joined": pd.to_datetime(["2024-01-02", "2024-01-02", None, "2024-03-04"]),
+        "price": [Decimal("1.50"), Decimal("2.25"), None, Decimal("1.50")],
+        "name": ["a", "b", "a", None],
+    })
+
+
+def test_profile_with_dates_and_decimals_is_json_serializable():
+    profile = FrameProfile()
+    profile.update(frame_with_dates_and_decimals())
+    restored = FrameProfile.from_dict(json.loads(json.dumps(profile.to_dict())))
+    assert restored.columns["joined"].mode == pd.Timestamp("2024-01-02")
+    assert restored.columns["price"].inferred_type == "numeric"
+    assert restored.columns["price"].mean == profile.columns["price"].mean
+
+
+def test_profile_cache_stores_dates_and_decimals(tmp_path):
+    profile = FrameProfile()
+    profile.update(frame_with_dates_and_decimals())
+    ProfileCache(str(tmp_path / "profiles.sqlite")).set("key", profile)
+    restored = ProfileCache(str(tmp_path / "profiles.sqlite")).get("key")
+    assert restored.columns["joined"].count == 3
+    assert restored.columns["price"].fill_value("mode") == 1.5
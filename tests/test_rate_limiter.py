@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+
+import pandas as pd
+
+from ai_agent import AIAgent
+from llm_backends import echo_data
+from rate_limiter import RateLimiter, TokenBucket, backoff_delay
+
+
+def test_token_bucket_waits_for_refill():
+    async def take(count):
+        bucket = TokenBucket(capacity=2, refill_per_second=20)
+        start = time.monotonic()
+        for _ in range(count):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(take(2)) < 0.03
+    assert asyncio.run(take(4)) >= 0.09
+
+
+def test_oversized_request_waits_for_full_bucket():
+    async def take():
+        bucket = TokenBucket(capacity=10, refill_per_second=100)
+        await bucket.acquire(10)
+        start = time.monotonic()
+        await bucket.acquire(50)
+        return time.monotonic() - start
+
+    assert 0.09 <= asyncio.run(take()) < 1
+
+
+def test_rate_limiter_without_limits_never_waits():
+    async def take():
+        limiter = RateLimiter()
+        start = time.monotonic()
+        for _ in range(1000):
+            await limiter.acquire(10_000)
+        return time.monotonic() - start
+
+    assert asyncio.run(take()) < 0.1
+
+
+def test_rate_limiter_limits_tokens_per_minute():
+    async def take():
+        limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=600)
+        await limiter.acquire(600)
+        start = time.monotonic()
+        await limiter.acquire(1)
+        return time.monotonic() - start
+
+    assert asyncio.run(take()) >= 0.09
+
+
+def test_backoff_delay_is_capped():
+    assert all(0 <= backoff_delay(attempt, base=1.0, maximum=4.0) <= min(4.0, 2 ** attempt) for attempt in range(10))
+
+
+class SlowLLM:
+    """Echoes the batch after a delay, tracking how many calls overlap and failing the first `failures` calls."""
+
+    def __init__(self, latency=0.05, failures=0):
+        self.latency = latency
+        self.failures = failures
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self.calls <= self.failures
+        try:
+            time.sleep(self.latency)
+            if fail:
+                raise RuntimeError("transient")
+            return echo_data(prompt)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def frame(rows):
+    return pd.DataFrame({"id": [f"r{i}" for i in range(rows)], "value": [i * 1.5 for i in range(rows)]})
+
+
+def test_dispatcher_bounds_concurrency_and_keeps_order():
+    llm = SlowLLM()
+    df = frame(40)
+    cleaned = asyncio.run(AIAgent(llm=llm).aprocess_frame(df, batch_size=4, concurrency=3))
+    assert llm.calls == 10
+    assert llm.max_in_flight == 3
+    pd.testing.assert_frame_equal(cleaned, df)
+
+
+def test_dispatcher_retries_failed_batches():
+    llm = SlowLLM(latency=0, failures=2)
+    df = frame(8)
+    agent = AIAgent(llm=llm, backoff_base=0.001)
+    cleaned = asyncio.run(agent.aprocess_frame(df, batch_size=4, concurrency=1))
+    assert llm.calls == 4
+    pd.testing.assert_frame_equal(cleaned, df)
+
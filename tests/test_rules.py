@@ -0,0 +1,40 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from rules import RuleSet
+
+
+def in_set_suite(action="flag", value_set=(1, 2, 3)):
+    return RuleSet.from_dict({"expectations": [{
+        "expectation_type": "expect_column_values_to_be_in_set",
+        "kwargs": {"column": "tier", "value_set": list(value_set)},
+        "meta": {"action": action},
+    }]})
+
+
+def test_in_set_matches_integers_read_as_float():
+    df = pd.read_csv(io.StringIO("id,tier\n1,1\n2,2\n3,\n4,3\n"))
+    assert df["tier"].dtype == float
+    assert not in_set_suite().evaluate(df).to_numpy().any()
+
+
+def test_in_set_null_action_keeps_valid_values():
+    df = pd.read_csv(io.StringIO("id,tier\n1,1\n2,2\n3,\n4,3\n5,7\n"))
+    result = in_set_suite("null").enforce(df, record=False)
+    np.testing.assert_array_equal(result["tier"].to_numpy(), [1, 2, np.nan, 3, np.nan])
+
+
+def test_not_in_set_compares_numbers():
+    suite = RuleSet.from_dict({"expectations": [{
+        "expectation_type": "expect_column_values_to_not_be_in_set",
+        "kwargs": {"column": "tier", "value_set": [0]},
+    }]})
+    df = pd.DataFrame({"tier": [0.0, 1.0, np.nan]})
+    assert suite.evaluate(df).iloc[:, 0].tolist() == [True, False, False]
+
+
+def test_in_set_compares_text_as_strings():
+    df = pd.DataFrame({"tier": ["1", "gold", None], "city": ["a", "b", "c"]})
+    assert in_set_suite(value_set=[1, "gold"]).evaluate(df).iloc[:, 0].tolist() == [False, False, False]
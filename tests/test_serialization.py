@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+
+from ai_agent import AIAgent
+from llm_backends import echo_data
+from llm_cache import LLMCache
+from serialization import FORMATS, SerializationError, get_format
+
+
+def test_only_parseable_formats_are_offered():
+    assert sorted(FORMATS) == ["csv", "dirty", "jsonl", "patch"]
+    with pytest.raises(ValueError):
+        get_format("table")
+
+
+def batch():
+    return pd.DataFrame({"name": ["ann", "bob"], "age": [31, 42]}, index=[7, 9])
+
+
+def test_jsonl_rejects_rows_missing_a_key():
+    with pytest.raises(SerializationError):
+        get_format("jsonl").parse('{"a":"Ann","b":31}\n{"a":"Bob"}', batch())
+
+
+def test_jsonl_restores_numeric_columns():
+    parsed = get_format("jsonl").parse('{"a":"Ann","b":"31"}\n{"a":"Bob","b":42}', batch())
+    assert parsed.index.tolist() == [7, 9]
+    assert pd.api.types.is_numeric_dtype(parsed["age"])
+    assert parsed["age"].tolist() == [31, 42]
+
+
+@pytest.mark.parametrize("prompt_format, response", [
+    ("csv", "name,years\nAnn,31\nBob,42"),
+    ("csv", "name,age\nAnn,31"),
+    ("csv", 'name,age\n"Ann,31\nBob,42'),
+    ("jsonl", '{"a":"Ann","b":31}\n{"a":"Bob","b":42,"c":1}'),
+    ("jsonl", '{"a":"Ann","b":31}'),
+    ("jsonl", '{"a":"Ann","b":31}\n{"a":"Bob","b":42'),
+    ("dirty", "_row,name\n0,Ann\n0,Bob"),
+    ("dirty", "_row,name\n0,Ann\nx,Bob"),
+    ("dirty", "_row,age\n0,31\n1,42"),
+])
+def test_malformed_responses_are_rejected(prompt_format, response):
+    df = batch().assign(name=["ann", None])
+    with pytest.raises(SerializationError):
+        get_format(prompt_format).parse(response, df)
+
+
+class TruncatingLLM:
+    """Drops the last column of its first answer, then echoes the batch."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        lines = echo_data(prompt).splitlines()[1:]
+        if len(self.prompts) == 1:
+            lines = [json.dumps({key: value for key, value in json.loads(line).items() if key != "b"})
+                     for line in lines]
+        return "\n".join(lines)
+
+
+def test_malformed_responses_are_retried_and_not_cached():
+    llm, cache = TruncatingLLM(), LLMCache(path=None)
+    agent = AIAgent(llm=llm, cache=cache, prompt_format="jsonl")
+    result = asyncio.run(agent.aprocess_frame(batch()))
+    pd.testing.assert_frame_equal(result, batch())
+    assert len(llm.prompts) == 2
+    assert "previous answer was rejected" in llm.prompts[1]
+    # Only the accepted answer was cached, so the same batch is answered without asking again
+    pd.testing.assert_frame_equal(asyncio.run(agent.aprocess_frame(batch())), batch())
+    assert len(llm.prompts) == 2
+
+
+@pytest.mark.parametrize("response", [
+    '{"patches": [{"row": 0, "column": "name", "value": "Ann"}',
+    '{"patches": [{"row": 0, "column": "height", "value": 1}]}',
+    '{"patches": [{"row": 2, "column": "name", "value": "Ann"}]}',
+    '{"patches": [{"row": 0, "column": "age", "value": "unknown"}]}',
+    '{"edits": []}',
+])
+def test_malformed_patches_are_rejected(response):
+    with pytest.raises(SerializationError):
+        get_format("patch").parse(response, batch())
+
+
+def test_patches_are_applied_by_position_and_later_ones_win():
+    response = json.dumps([{"row": 1, "column": "name", "value": "Bob"}, {"row": 0, "column": "age", "value": "32"},
+                           {"row": 1, "column": "name", "value": "Robert"}])
+    parsed = get_format("patch").parse(response, batch())
+    assert parsed.index.tolist() == [7, 9]
+    assert parsed["name"].tolist() == ["ann", "Robert"]
+    assert parsed["age"].tolist() == [32, 42]
+    assert pd.api.types.is_integer_dtype(parsed["age"])
+
+
+def test_patch_can_widen_an_integer_column():
+    parsed = get_format("patch").apply(batch(), [(0, "age", 31.5), (1, "age", None)])
+    assert parsed["age"].tolist()[0] == 31.5
+    assert pd.isna(parsed["age"].tolist()[1])
+
+
+class PatchingLLM:
+    """Patches an unknown column first, then fills in every name."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        column = "nickname" if len(self.prompts) == 1 else "name"
+        return json.dumps({"patches": [{"row": 0, "column": column, "value": "Ann"},
+                                       {"row": 1, "column": column, "value": "Bob"}]})
+
+
+def test_rejected_patches_are_retried():
+    llm = PatchingLLM()
+    df = batch().assign(name=["ann", None])  # A null, so the batch needs the LLM
+    result = asyncio.run(AIAgent(llm=llm, prompt_format="patch").aprocess_frame(df))
+    assert result["name"].tolist() == ["Ann", "Bob"]
+    assert result["age"].tolist() == [31, 42]
+    assert len(llm.prompts) == 2 and "previous answer was rejected" in llm.prompts[1]
@@ -0,0 +1,72 @@
+import asyncio
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from streaming import encode_frames
+
+
+async def aiter(items):
+    for item in items:
+        yield item
+
+
+def encode(frames, fmt):
+    async def collect():
+        return b"".join([data async for data in encode_frames(aiter(frames), fmt)])
+    return asyncio.run(collect())
+
+
+def drifting_frames():
+    return [
+        pd.DataFrame({"age": pd.array([30, 41], dtype="Int8"), "city": pd.Categorical(["Austin", "Boston"]),
+                      "joined": pd.to_datetime(["2024-01-01", "2024-02-01"])}),
+        pd.DataFrame({"age": [32.5, None], "city": ["Chicago", None], "joined": [None, None]}),
+    ]
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+def test_arrow_stream_survives_dtype_drift(fmt):
+    data = encode(drifting_frames(), fmt)
+    if fmt == "arrow":
+        df = pa.ipc.open_stream(data).read_pandas()
+    else:
+        df = pq.read_table(io.BytesIO(data)).to_pandas()
+    assert df["age"].tolist()[:3] == [30.0, 41.0, 32.5]
+    assert df["city"].astype(object).tolist()[:3] == ["Austin", "Boston", "Chicago"]
+    assert df["joined"].isna().tolist() == [False, False, True, True]
+
+
+def test_csv_stream_writes_header_once():
+    frames = [pd.DataFrame({"a": [1, 2]}), pd.DataFrame({"a": [3]})]
+    assert encode(frames, "csv").decode() == "a\n1\n2\n3\n"
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+def test_arrow_stream_keeps_large_integer_ids(fmt):
+    ids = [2 ** 53 + 1, 2 ** 62]
+    data = encode([pd.DataFrame({"id": ids[:1]}), pd.DataFrame({"id": ids[1:]})], fmt)
+    df = pa.ipc.open_stream(data).read_pandas() if fmt == "arrow" else pq.read_table(io.BytesIO(data)).to_pandas()
+    assert df["id"].tolist() == ids
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+def test_arrow_stream_types_columns_null_in_the_first_chunk(fmt):
+    frames = [pd.DataFrame({"city": [None, None], "tier": pd.Categorical([None, None])}),
+              pd.DataFrame({"city": ["Austin", None], "tier": pd.Categorical(["gold", "gold"])})]
+    data = encode(frames, fmt)
+    df = pa.ipc.open_stream(data).read_pandas() if fmt == "arrow" else pq.read_table(io.BytesIO(data)).to_pandas()
+    assert df["city"].tolist() == [None, None, "Austin", None]
+    assert df["tier"].astype(object).tolist()[2:] == ["gold", "gold"]
+
+
+def test_arrow_stream_makes_room_for_later_fractions():
+    frames = [pd.DataFrame({"age": [30, 41]}), pd.DataFrame({"age": [32.5, None]}),
+              pd.DataFrame({"code": pd.Categorical([1, 2])}).assign(age=1)]
+    df = pa.ipc.open_stream(encode(frames[:2], "arrow")).read_pandas()
+    assert df["age"].tolist()[:3] == [30.0, 41.0, 32.5]
+    df = pa.ipc.open_stream(encode(frames[2:] * 2, "arrow")).read_pandas()
+    assert df["code"].astype(float).tolist() == [1.0, 2.0, 1.0, 2.0]